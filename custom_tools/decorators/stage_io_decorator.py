@@ -0,0 +1,20 @@
+def stage_io_decorator(inputs=None, outputs=None):
+    """
+    Declares the file manager entries a pipeline stage reads and writes, so the pipeline
+    scheduler can derive the dependencies between stages. Entries a stage modifies in place are
+    listed as both inputs and outputs.
+
+    Args:
+        inputs (list): The file manager entries the stage reads from other stages.
+        outputs (list): The file manager entries the stage creates or modifies for other stages.
+    """
+
+    def decorator(func):
+        setattr(
+            func,
+            "_stage_io_metadata",
+            {"inputs": list(inputs or []), "outputs": list(outputs or [])},
+        )
+        return func
+
+    return decorator
@@ -1,9 +1,11 @@
 import time
 import inspect
+import multiprocessing
 import os
 from functools import wraps
 
 from file_manager.n100.file_manager_buildings import Building_N100
+from custom_tools.general_tools import profiler
 
 
 TIMING_DECORATOR_LOG_FILE_USED = False
@@ -12,17 +14,19 @@ TIMING_DECORATOR_LOG_FILE_USED = False
 def timing_decorator(func):
     """Logs the execution time of a function to both the console and a log file"""
 
+    file_name = os.path.basename(inspect.getfile(func))
+    span_name = f"{os.path.splitext(file_name)[0]}.{func.__qualname__}"
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
 
-        result = func(*args, **kwargs)
+        with profiler.span(span_name, "timed_function"):
+            result = func(*args, **kwargs)
 
-        elapsed_time = time.time() - start_time
+        elapsed_time = time.perf_counter() - start_time
 
         function_name = func.__name__
-        file_path = inspect.getfile(func)
-        file_name = os.path.basename(file_path)
 
         formatted_file_name = file_name.ljust(40)
         formatted_function_name = function_name.ljust(55)
@@ -41,7 +45,7 @@ def timing_decorator(func):
 
 def format_time(seconds):
     """
-    Convert seconds to a formatted string: HH:MM:SS.
+    Convert seconds to a formatted string: HH:MM:SS.ss.
 
     Args:
         seconds (float): Time in seconds.
@@ -49,10 +53,9 @@ def format_time(seconds):
     Returns:
         str: Formatted time string.
     """
-    seconds = int(seconds)  # Convert to integer for rounding
     hours, remainder = divmod(seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
-    return f"{hours} hours, {minutes} minutes, {seconds} seconds"
+    return f"{int(hours)} hours, {int(minutes)} minutes, {seconds:.2f} seconds"
 
 
 def log_to_console_and_file(function_name, elapsed_time):
@@ -75,8 +78,13 @@ def log_to_file(message):
 
     log_file_path = Building_N100.overview__runtime_all_building_functions__n100.value
 
-    if os.path.exists(log_file_path) and not TIMING_DECORATOR_LOG_FILE_USED:
-        # if it's the first time this runtime, delete the log file
+    if (
+        os.path.exists(log_file_path)
+        and not TIMING_DECORATOR_LOG_FILE_USED
+        and multiprocessing.parent_process() is None
+    ):
+        # if it's the first time this runtime, delete the log file. Worker processes append to
+        # the log of the process that started them
         os.remove(log_file_path)
 
     TIMING_DECORATOR_LOG_FILE_USED = True
@@ -1,6 +1,9 @@
 import arcpy
+import uuid
+from contextlib import contextmanager
 from enum import Enum
 from custom_tools.decorators.partition_io_decorator import partition_io_decorator
+from custom_tools.general_tools import profiler
 
 
 # Selection Type definition used for select by attribute functions
@@ -69,7 +72,34 @@ def resolve_enum(enum_class, value):
     return None
 
 
+@contextmanager
+def temporary_feature_layer(input_layer):
+    """
+    Summary:
+        Creates a feature layer with a unique name from the input layer, and deletes it on exit.
+
+    Details:
+        - The layer name is unique, so calls running at the same time never share a layer.
+        - The layer is deleted even if the code using it fails.
+
+    Parameters:
+        input_layer (str): The path or name of the input feature layer.
+
+    Example:
+        >>> with custom_arcpy.temporary_feature_layer(input_layer) as layer:
+        ...     arcpy.management.SelectLayerByLocation(layer, "INTERSECT", select_features)
+        ...     arcpy.management.CopyFeatures(layer, output_name)
+    """
+    layer = f"temp_layer_{uuid.uuid4().hex}"
+    arcpy.management.MakeFeatureLayer(input_layer, layer)
+    try:
+        yield layer
+    finally:
+        arcpy.management.Delete(layer)
+
+
 # Define your function using the above enum
+@profiler.profile("custom_arcpy")
 @partition_io_decorator(
     input_param_names=["input_layer"],
     output_param_names=["output_name"],
@@ -107,6 +137,12 @@ def select_attribute_and_make_feature_layer(
         resolve_enum(SelectionType, selection_type) or SelectionType.NEW_SELECTION
     )
 
+    profiler.annotate(
+        tool="SelectLayerByAttribute",
+        input_layer=input_layer,
+        query=f"{selection_type.value} {'NOT ' if inverted else ''}({expression})",
+    )
+
     # Create a temporary feature layer from the input layer
     arcpy.management.MakeFeatureLayer(input_layer, output_name)
 
@@ -118,6 +154,7 @@ def select_attribute_and_make_feature_layer(
     print(f"{output_name} created temporarily.")
 
 
+@profiler.profile("custom_arcpy")
 @partition_io_decorator(
     input_param_names=["input_layer"],
     output_param_names=["output_name"],
@@ -131,7 +168,8 @@ def select_attribute_and_make_permanent_feature(
         then stores the selected features permanently in the specified output feature class.
 
     Details:
-        - A temporary feature layer is created from the `input_layer`.
+        - A new, non-inverted selection is done in one step with Select, without a feature layer.
+        - Otherwise a temporary feature layer is created from the `input_layer`.
         - The `selection_type` determines how the selection is applied to this layer. If `inverted` is True, the selection is inverted.
         - The selection is done on the feature layer using the `expression`.
         - The selected features are stored permanently in a new feature class specified by `output_name` using copy features.
@@ -157,23 +195,34 @@ def select_attribute_and_make_permanent_feature(
         resolve_enum(SelectionType, selection_type) or SelectionType.NEW_SELECTION
     )
 
-    # Create a temporary feature layer from the input layer
-    arcpy.management.MakeFeatureLayer(input_layer, "temp_layer")
+    # A new selection copies the features matching the expression, so a single Select does the
+    # same as selecting on a layer and copying it. Inverted selections keep the layer, since
+    # inverting also selects the features where the expression is null
+    fused = selection_type == SelectionType.NEW_SELECTION and not inverted
 
-    # Perform the attribute selection on the temporary layer
-    arcpy.management.SelectLayerByAttribute(
-        "temp_layer", selection_type.value, expression, invert_where_clause=inverted
+    profiler.annotate(
+        tool="Select" if fused else "SelectLayerByAttribute",
+        input_layer=input_layer,
+        query=f"{selection_type.value} {'NOT ' if inverted else ''}({expression})",
     )
 
-    # Copy only the selected features from the temporary layer into a new feature class
-    arcpy.management.CopyFeatures("temp_layer", output_name)
+    if fused:
+        arcpy.analysis.Select(input_layer, output_name, expression)
+    else:
+        with temporary_feature_layer(input_layer) as layer:
+            # Perform the attribute selection on the temporary layer
+            arcpy.management.SelectLayerByAttribute(
+                layer, selection_type.value, expression, invert_where_clause=inverted
+            )
+
+            # Copy only the selected features from the temporary layer into a new feature class
+            arcpy.management.CopyFeatures(layer, output_name)
 
-    # Delete the temporary layer to clean up
-    arcpy.management.Delete("temp_layer")
     print(f"{output_name} created permanently.")
 
 
 # Temporary Feature Layer with Location-based Selection
+@profiler.profile("custom_arcpy")
 @partition_io_decorator(
     input_param_names=["input_layer"],
     output_param_names=["output_name"],
@@ -224,6 +273,15 @@ def select_location_and_make_feature_layer(
         resolve_enum(SelectionType, selection_type) or SelectionType.NEW_SELECTION
     )
 
+    profiler.annotate(
+        tool="SelectLayerByLocation",
+        input_layer=input_layer,
+        query=(
+            f"{selection_type.value} {'NOT ' if inverted else ''}{overlap_type.value} "
+            f"{select_features} {search_distance or ''}".strip()
+        ),
+    )
+
     arcpy.management.MakeFeatureLayer(input_layer, output_name)
 
     try:
@@ -249,8 +307,10 @@ def select_location_and_make_feature_layer(
         print(f"{output_name} created temporarily.")
     except Exception as e:
         print(f"Error occurred: {e}")
+        raise
 
 
+@profiler.profile("custom_arcpy")
 @partition_io_decorator(
     input_param_names=["input_layer"],
     output_param_names=["output_name"],
@@ -270,7 +330,7 @@ def select_location_and_make_permanent_feature(
         and creates a new, permanent feature class as an output.
 
     Details:
-        - Initiates by creating a temporary feature layer from `input_layer`.
+        - Initiates by creating a uniquely named temporary feature layer from `input_layer`.
         - Applies a spatial selection based on `overlap_type` between the `input_layer` and `select_features`.
         - Utilizes `search_distance` if required by the `overlap_type` and provided, to define the proximity for selection.
         - The selection can be inverted if `inverted` is set to True, meaning it will select all features not meeting the spatial relationship criteria.
@@ -302,39 +362,47 @@ def select_location_and_make_permanent_feature(
         resolve_enum(SelectionType, selection_type) or SelectionType.NEW_SELECTION
     )
 
-    arcpy.management.MakeFeatureLayer(input_layer, "temp_layer")
+    profiler.annotate(
+        tool="SelectLayerByLocation",
+        input_layer=input_layer,
+        query=(
+            f"{selection_type.value} {'NOT ' if inverted else ''}{overlap_type.value} "
+            f"{select_features} {search_distance or ''}".strip()
+        ),
+    )
 
     try:
-        # If the overlap type requires a search distance and it's provided
-        if overlap_type in [OverlapType.WITHIN_A_DISTANCE] and search_distance:
-            arcpy.management.SelectLayerByLocation(
-                "temp_layer",
-                overlap_type.value,
-                select_features,
-                search_distance,
-                selection_type.value,
-                "INVERT" if inverted else "NOT_INVERT",
-            )
-        else:
-            arcpy.management.SelectLayerByLocation(
-                "temp_layer",
-                overlap_type.value,
-                select_features,
-                "",
-                selection_type.value,
-                "INVERT" if inverted else "NOT_INVERT",
-            )
-
-        arcpy.management.CopyFeatures("temp_layer", output_name)
+        with temporary_feature_layer(input_layer) as layer:
+            # If the overlap type requires a search distance and it's provided
+            if overlap_type in [OverlapType.WITHIN_A_DISTANCE] and search_distance:
+                arcpy.management.SelectLayerByLocation(
+                    layer,
+                    overlap_type.value,
+                    select_features,
+                    search_distance,
+                    selection_type.value,
+                    "INVERT" if inverted else "NOT_INVERT",
+                )
+            else:
+                arcpy.management.SelectLayerByLocation(
+                    layer,
+                    overlap_type.value,
+                    select_features,
+                    "",
+                    selection_type.value,
+                    "INVERT" if inverted else "NOT_INVERT",
+                )
+
+            arcpy.management.CopyFeatures(layer, output_name)
 
     except Exception as e:
         print(f"Error occurred: {e}")
+        raise
 
-    finally:
-        arcpy.management.Delete("temp_layer")
-        print(f"{output_name} created permanently.")
+    print(f"{output_name} created permanently.")
 
 
+@profiler.profile("custom_arcpy")
 @partition_io_decorator(
     input_param_names=["input_layer", "in_symbology_layer"],
     output_param_names=["output_name"],
@@ -0,0 +1,26 @@
+import geopandas as gpd
+
+
+def split_feature_class_path(feature_class_path: str):
+    """
+    Splits a feature class path into the data source and layer name geopandas needs to read it.
+    Feature classes in a file geodatabase are read as a layer of the .gdb, other paths are used as is.
+    """
+    normalized_path = feature_class_path.replace("\\", "/")
+    if ".gdb/" in normalized_path:
+        gdb_path, layer_name = normalized_path.split(".gdb/", 1)
+        return f"{gdb_path}.gdb", layer_name
+    return feature_class_path, None
+
+
+def read_features(feature_class_path: str, **kwargs):
+    data_source, layer_name = split_feature_class_path(feature_class_path)
+    return gpd.read_file(data_source, layer=layer_name, fid_as_index=True, **kwargs)
+
+
+def write_features(features: gpd.GeoDataFrame, feature_class_path: str):
+    data_source, layer_name = split_feature_class_path(feature_class_path)
+    if layer_name is None:
+        features.to_file(data_source)
+    else:
+        features.to_file(data_source, layer=layer_name, driver="OpenFileGDB")
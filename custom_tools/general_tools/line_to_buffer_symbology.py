@@ -1,4 +1,5 @@
 import arcpy
+import os
 from typing import Union
 
 from env_setup import environment_setup
@@ -9,6 +10,12 @@ from custom_tools.decorators.partition_io_decorator import partition_io_decorato
 
 
 class LineToBufferSymbology:
+    # Classified road lines shared by every instance in the process, keyed by the road lines and queries
+    _road_class_cache = {}
+
+    BUFFER_WIDTH_FIELD = "symbology_buffer_width"
+    BUFFER_DISTANCE_FIELD = "symbology_buffer_distance"
+
     def __init__(
         self,
         input_road_lines: str,
@@ -19,6 +26,7 @@ class LineToBufferSymbology:
         write_work_files_to_memory: bool = True,
         keep_work_files: bool = False,
         root_file: str = None,
+        single_pass: bool = False,
     ):
         """
         Initializes the LineToBufferSymbology class with the specified parameters.
@@ -28,6 +36,8 @@ class LineToBufferSymbology:
         :param output_road_buffer: Path to save the output road buffer.
         :param buffer_factor: Multiplicative factor to adjust buffer widths, avoid using 0.
         :param fixed_buffer_addition: Additional fixed width to add to buffer widths.
+        :param single_pass: If True, the roads are classified into their buffer width once and cached
+            for later calls, and all roads are buffered in one operation using a distance field.
         """
         self.input_road_lines = input_road_lines
         self.sql_selection_query = sql_selection_query
@@ -39,6 +49,7 @@ class LineToBufferSymbology:
         self.write_work_files_to_memory = write_work_files_to_memory
         self.keep_work_files = keep_work_files
         self.root_file = root_file
+        self.single_pass = single_pass
 
         self.selection_output_name = None
         self.buffer_output_name = None
@@ -101,7 +112,7 @@ class LineToBufferSymbology:
         """
         Processes each SQL query to select road lines and create buffers.
         """
-        unique_id = id(self)
+        unique_id = f"{os.getpid()}_{id(self)}"
         temporary_file = "in_memory\\"
         permanent_file = f"{self.root_file}_"
 
@@ -133,6 +144,112 @@ class LineToBufferSymbology:
 
         return buffer_output_name
 
+    def work_file_location(self):
+        if self.write_work_files_to_memory or self.root_file is None:
+            return "in_memory\\"
+        return f"{self.root_file}_"
+
+    def road_class_cache_key(self):
+        """
+        Creates the cache key of the classified roads. The feature count and extent are included so a
+        changed road feature class at the same path is classified again.
+        """
+        extent = arcpy.Describe(self.input_road_lines).extent
+        return (
+            self.input_road_lines,
+            self.work_file_location(),
+            int(arcpy.GetCount_management(self.input_road_lines).getOutput(0)),
+            (extent.XMin, extent.YMin, extent.XMax, extent.YMax),
+            tuple(self.sql_selection_query.items()),
+        )
+
+    def classify_road_lines(self):
+        """
+        Copies the road lines and assigns each road the buffer width of its symbology class. The
+        classes are calculated from the smallest to the largest width, so a road matching several
+        queries gets the largest width, like the merged per class buffers. Roads matching no query
+        are removed. The result is cached for later calls with other buffer factors and additions.
+
+        Returns:
+            str: The path of the classified road lines.
+        """
+        cache_key = self.road_class_cache_key()
+        classified_road_lines = LineToBufferSymbology._road_class_cache.get(cache_key)
+        if classified_road_lines is not None and arcpy.Exists(classified_road_lines):
+            return classified_road_lines
+
+        unique_id = f"{os.getpid()}_{id(self)}"
+        classified_road_lines = (
+            f"{self.work_file_location()}classified_road_lines__{unique_id}"
+        )
+        arcpy.management.CopyFeatures(self.input_road_lines, classified_road_lines)
+        arcpy.management.AddField(
+            in_table=classified_road_lines,
+            field_name=self.BUFFER_WIDTH_FIELD,
+            field_type="DOUBLE",
+        )
+        arcpy.management.AddField(
+            in_table=classified_road_lines,
+            field_name=self.BUFFER_DISTANCE_FIELD,
+            field_type="DOUBLE",
+        )
+
+        road_class_layer = f"road_class_selection__{unique_id}"
+        for sql_query, original_width in sorted(
+            self.sql_selection_query.items(), key=lambda item: item[1]
+        ):
+            arcpy.management.MakeFeatureLayer(
+                in_features=classified_road_lines,
+                out_layer=road_class_layer,
+                where_clause=sql_query,
+            )
+            arcpy.management.CalculateField(
+                in_table=road_class_layer,
+                field=self.BUFFER_WIDTH_FIELD,
+                expression=original_width,
+            )
+            arcpy.management.Delete(road_class_layer)
+
+        with arcpy.da.UpdateCursor(
+            classified_road_lines,
+            [self.BUFFER_WIDTH_FIELD],
+            where_clause=f"{self.BUFFER_WIDTH_FIELD} IS NULL",
+        ) as cursor:
+            for _ in cursor:
+                cursor.deleteRow()
+
+        LineToBufferSymbology._road_class_cache[cache_key] = classified_road_lines
+        print(f"Classified road lines into buffer widths: {classified_road_lines}")
+        return classified_road_lines
+
+    @classmethod
+    def clear_road_class_cache(cls):
+        """
+        Deletes the cached classified road lines.
+        """
+        for classified_road_lines in cls._road_class_cache.values():
+            if arcpy.Exists(classified_road_lines):
+                arcpy.management.Delete(classified_road_lines)
+        cls._road_class_cache.clear()
+
+    def buffer_classified_road_lines(self):
+        """
+        Buffers all classified roads in one operation, with the buffer distance of each road
+        calculated from its cached buffer width.
+        """
+        classified_road_lines = self.classify_road_lines()
+        arcpy.management.CalculateField(
+            in_table=classified_road_lines,
+            field=self.BUFFER_DISTANCE_FIELD,
+            expression=f"!{self.BUFFER_WIDTH_FIELD}! * {self.buffer_factor} + {self.fixed_buffer_addition}",
+        )
+        arcpy.analysis.PairwiseBuffer(
+            in_features=classified_road_lines,
+            out_feature_class=self.output_road_buffer,
+            buffer_distance_or_field=self.BUFFER_DISTANCE_FIELD,
+        )
+        print(f"Buffered classified road lines into {self.output_road_buffer}")
+
     def delete_working_files(self, *file_paths):
         """
         Deletes multiple feature classes or files.
@@ -176,7 +293,10 @@ class LineToBufferSymbology:
         output_param_names=["output_road_buffer"],
     )
     def run(self):
-        self.process_queries()
+        if self.single_pass:
+            self.buffer_classified_road_lines()
+        else:
+            self.process_queries()
 
 
 if __name__ == "__main__":
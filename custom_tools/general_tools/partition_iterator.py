@@ -4,15 +4,23 @@ import re
 import shutil
 import random
 import json
+import copy
+import hashlib
+import uuid
 from typing import Dict, Tuple, Literal
 import time
 from datetime import datetime
 import pprint
+from multiprocessing import Pool, cpu_count
 
 import env_setup.global_config
 import config
 from env_setup import environment_setup
-from custom_tools.general_tools import custom_arcpy
+from custom_tools.general_tools import custom_arcpy, profiler
+from custom_tools.general_tools.partition_spatial_index import (
+    PartitionSpatialIndex,
+    object_id_where_clause,
+)
 from custom_tools.decorators.timing_decorator import timing_decorator
 
 from input_data import input_n50, input_n100
@@ -35,6 +43,10 @@ class PartitionIterator:
     # Class-level constants
     PARTITION_FIELD = "partition_select"
     ORIGINAL_ID_FIELD = "original_id_field"
+    SEARCH_DISTANCE_UNITS_IN_METERS = {"meters": 1.0, "kilometers": 1000.0}
+    # Above this many OID ranges and single OIDs, a candidate where clause is slower to parse
+    # than selecting by location from all features
+    MAXIMUM_CANDIDATE_WHERE_CLAUSE_TERMS = 5000
 
     def __init__(
         self,
@@ -52,6 +64,9 @@ class PartitionIterator:
         context_selection: bool = True,
         safe_output_final_cleanup: bool = True,
         object_id_field: str = "OBJECTID",
+        parallel_processing: bool = False,
+        cpu_usage_percentage: float = 0.9,
+        resume_from_checkpoint: bool = False,
     ):
         """
         Initialize the PartitionIterator with input datasets for partitioning and processing.
@@ -62,6 +77,11 @@ class PartitionIterator:
         :param alias_path_outputs: A nested dictionary of output feature class for final results.
         :param feature_count: Feature count for cartographic partitioning.
         :param partition_method: Method used for creating cartographic partitions.
+        :param parallel_processing: If True, partitions are processed by a pool of worker processes,
+            each working in its own scratch geodatabase.
+        :param cpu_usage_percentage: The share of CPU cores used as workers when parallel_processing is True.
+        :param resume_from_checkpoint: If True, a run manifest is kept next to the documentation directory, and
+            a run with the same inputs, custom functions and partition settings resumes from the last completed partition.
         """
 
         # Raw inputs and initial setup
@@ -82,6 +102,9 @@ class PartitionIterator:
         self.object_id_field = object_id_field
         self.selection_of_context_features = context_selection
         self.safe_final_output_cleanup = safe_output_final_cleanup
+        self.parallel_processing = parallel_processing
+        self.cpu_usage_percentage = cpu_usage_percentage
+        self.resume_from_checkpoint = resume_from_checkpoint
 
         # Initial processing results
         self.nested_alias_type_data = {}
@@ -95,8 +118,28 @@ class PartitionIterator:
         self.iteration_file_paths_list = []
         self.first_call_directory_documentation = True
 
+        # Variables related to parallel processing
+        self.worker_directory = os.path.join(
+            os.path.dirname(os.path.dirname(root_file_partition_iterator)),
+            f"{os.path.basename(root_file_partition_iterator)}_workers",
+        )
+        self.coordinator_final_outputs = {}
+
+        # Variables related to checkpointing
+        self.run_manifest_path = f"{self.dictionary_documentation_path}_run_manifest.json"
+        self.run_manifest = None
+        self.resumed_run = False
+        self.run_fingerprint = None
+        self.raw_nested_alias_type_data = {}
+        self.partition_hashes = {}
+
+        # Variables related to the spatial indexes used for partition selections
+        self.spatial_indexes = {}
+        self.partition_envelopes = {}
+
         # Variables related to custom operations
         self.custom_functions = custom_functions or []
+        self.unresolved_custom_functions = copy.deepcopy(self.custom_functions)
         self.custom_func_io_params = {}
 
         self.total_start_time = None
@@ -419,6 +462,265 @@ class PartitionIterator:
             final_outputs, final_outputs_directory, file_name, object_id
         )
 
+    @staticmethod
+    def fingerprint_feature_class(feature_class):
+        """
+        Creates a fingerprint of a feature class from its feature count, extent, fields and geometries.
+
+        Args:
+            feature_class: The feature class to fingerprint.
+
+        Returns:
+            str: A md5 hex digest identifying the content of the feature class.
+        """
+        description = arcpy.Describe(feature_class)
+        extent = description.extent
+        fields = sorted(field.name for field in arcpy.ListFields(feature_class))
+
+        geometry_hash = hashlib.md5()
+        with arcpy.da.SearchCursor(feature_class, ["OID@", "SHAPE@WKB"]) as cursor:
+            for oid, wkb in cursor:
+                geometry_hash.update(str(oid).encode())
+                if wkb is not None:
+                    geometry_hash.update(wkb)
+
+        fingerprint = {
+            "count": int(arcpy.management.GetCount(feature_class).getOutput(0)),
+            "extent": [extent.XMin, extent.YMin, extent.XMax, extent.YMax],
+            "fields": fields,
+            "geometries": geometry_hash.hexdigest(),
+        }
+        return hashlib.md5(json.dumps(fingerprint).encode()).hexdigest()
+
+    def create_run_fingerprint(self):
+        """
+        Creates a fingerprint of everything a run depends on: the input data, the custom function
+        configuration and the partition settings. A checkpoint is only resumed if this is unchanged.
+        """
+        input_fingerprints = {
+            alias: {
+                type_info: PartitionIterator.fingerprint_feature_class(path)
+                for type_info, path in types.items()
+                if type_info in ["input", "context", "reference"] and arcpy.Exists(path)
+            }
+            for alias, types in self.raw_nested_alias_type_data.items()
+        }
+
+        run_configuration = {
+            "inputs": input_fingerprints,
+            "outputs": self.nested_final_outputs,
+            "custom_functions": self.unresolved_custom_functions,
+            "partition_settings": {
+                "scale": self.scale,
+                "feature_count": self.feature_count,
+                "partition_method": self.partition_method,
+                "search_distance": self.search_distance,
+                "context_selection": self.selection_of_context_features,
+                "parallel_processing": self.parallel_processing,
+            },
+        }
+        # Classes and functions are identified by their qualified name
+        run_configuration_json = json.dumps(
+            run_configuration,
+            sort_keys=True,
+            default=lambda value: getattr(value, "__qualname__", str(value)),
+        )
+        return hashlib.md5(run_configuration_json.encode()).hexdigest()
+
+    def create_partition_hashes(self):
+        """
+        Hashes the geometry of each partition so a checkpointed partition is only skipped if it is unchanged.
+        """
+        self.partition_hashes = {}
+        with arcpy.da.SearchCursor(
+            self.partition_feature, [self.object_id_field, "SHAPE@WKB"]
+        ) as cursor:
+            for object_id, wkb in cursor:
+                self.partition_hashes[str(object_id)] = hashlib.md5(wkb).hexdigest()
+
+    def write_run_manifest(self):
+        """
+        Writes the run manifest to a temporary file before replacing the old manifest, so a crash
+        while writing never leaves a corrupt manifest behind.
+        """
+        if self.run_manifest is None:
+            return
+        temporary_manifest_path = f"{self.run_manifest_path}.tmp"
+        with open(temporary_manifest_path, "w") as f:
+            json.dump(self.run_manifest, f, indent=4)
+        os.replace(temporary_manifest_path, self.run_manifest_path)
+
+    def create_run_manifest(self):
+        """
+        Creates a new run manifest after the data preparation and partitioning is done.
+        """
+        if not self.resume_from_checkpoint:
+            return
+        self.create_partition_hashes()
+        self.run_manifest = {
+            "run_fingerprint": self.run_fingerprint,
+            "run_completed": False,
+            "partition_field": self.PARTITION_FIELD,
+            "original_id_field": self.ORIGINAL_ID_FIELD,
+            "nested_alias_type_data": self.nested_alias_type_data,
+            "partition_feature": self.partition_feature,
+            "partitions": {},
+        }
+        self.write_run_manifest()
+        print(f"Created run manifest: {self.run_manifest_path}")
+
+    def load_run_manifest(self):
+        """
+        Loads the run manifest of an earlier run if it matches the current run.
+
+        Returns:
+            bool: True if the earlier run can be resumed, False if the run needs to start from scratch.
+        """
+        if not os.path.exists(self.run_manifest_path):
+            print("No run manifest found, starting a new run.")
+            return False
+
+        with open(self.run_manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        if manifest.get("run_completed", True):
+            print("The previous run was completed, starting a new run.")
+            return False
+        if manifest.get("run_fingerprint") != self.run_fingerprint:
+            print("Inputs or configuration changed since the previous run, starting a new run.")
+            return False
+
+        prepared_data = [manifest["partition_feature"]] + [
+            path
+            for types in manifest["nested_alias_type_data"].values()
+            for type_info, path in types.items()
+            if type_info in ["input_copy", "context_copy"]
+        ]
+        missing_data = [path for path in prepared_data if not arcpy.Exists(path)]
+        if missing_data:
+            print(f"Prepared data is missing: {missing_data}, starting a new run.")
+            return False
+
+        self.PARTITION_FIELD = manifest["partition_field"]
+        self.ORIGINAL_ID_FIELD = manifest["original_id_field"]
+        self.nested_alias_type_data = manifest["nested_alias_type_data"]
+        self.run_manifest = manifest
+        self.create_partition_hashes()
+
+        completed = sum(
+            1
+            for object_id in manifest["partitions"]
+            if self.is_partition_completed(int(object_id))
+        )
+        print(f"Resuming run with {completed} completed partitions.")
+        return True
+
+    def is_partition_completed(self, object_id):
+        """
+        Checks whether the partition was completed in a checkpointed run and is unchanged since.
+        """
+        if self.run_manifest is None:
+            return False
+        record = self.run_manifest["partitions"].get(str(object_id))
+        return (
+            record is not None
+            and record["status"] == "completed"
+            and record["partition_hash"] == self.partition_hashes.get(str(object_id))
+        )
+
+    @staticmethod
+    def find_maximum_oid_of_feature_class(feature_class):
+        """
+        Returns the maximum OID of a feature class, or None if the feature class does not exist.
+        """
+        if not arcpy.Exists(feature_class):
+            return None
+        oid_field = arcpy.Describe(feature_class).OIDFieldName
+        with arcpy.da.SearchCursor(
+            feature_class,
+            [oid_field],
+            sql_clause=(None, f"ORDER BY {oid_field} DESC"),
+        ) as cursor:
+            for row in cursor:
+                return row[0]
+        return 0
+
+    def rollback_partition(self, record):
+        """
+        Removes the features a partially completed partition appended to the final outputs.
+
+        Args:
+            record (dict): The manifest record of the partition, holding the maximum OID of each
+                final output before the partition was started.
+        """
+        for final_output_path, maximum_oid in record["final_output_max_oids"].items():
+            if not arcpy.Exists(final_output_path):
+                continue
+            if maximum_oid is None:
+                arcpy.management.Delete(final_output_path)
+                print(f"Rolled back partition output by deleting: {final_output_path}")
+                continue
+
+            oid_field = arcpy.Describe(final_output_path).OIDFieldName
+            with arcpy.da.UpdateCursor(
+                final_output_path,
+                [oid_field],
+                where_clause=f"{oid_field} > {maximum_oid}",
+            ) as cursor:
+                for _ in cursor:
+                    cursor.deleteRow()
+            print(
+                f"Rolled back partition output by deleting features above OID {maximum_oid} in: {final_output_path}"
+            )
+
+    def start_partition_checkpoint(self, object_id):
+        """
+        Records the start of a partition. If the partition was left incomplete by an earlier run,
+        its appended features are rolled back first.
+        """
+        if self.run_manifest is None:
+            return
+        record = self.run_manifest["partitions"].get(str(object_id))
+        if record is not None and record["status"] == "started":
+            self.rollback_partition(record)
+
+        self.run_manifest["partitions"][str(object_id)] = {
+            "status": "started",
+            "partition_hash": self.partition_hashes.get(str(object_id)),
+            "final_output_max_oids": {
+                final_output_path: PartitionIterator.find_maximum_oid_of_feature_class(
+                    final_output_path
+                )
+                for types in self.nested_final_outputs.values()
+                for final_output_path in types.values()
+            },
+        }
+        self.write_run_manifest()
+
+    def complete_partition_checkpoint(self, object_id, partition_outputs=None):
+        """
+        Records a partition as completed.
+
+        Args:
+            object_id (int): The OBJECTID of the partition feature.
+            partition_outputs (dict): The partition outputs written by a worker process, if any.
+        """
+        if self.run_manifest is None:
+            return
+        self.run_manifest["partitions"][str(object_id)] = {
+            "status": "completed",
+            "partition_hash": self.partition_hashes.get(str(object_id)),
+            "partition_outputs": partition_outputs,
+        }
+        self.write_run_manifest()
+
+    def complete_run_manifest(self):
+        if self.run_manifest is None:
+            return
+        self.run_manifest["run_completed"] = True
+        self.write_run_manifest()
+        print(f"Run completed, updated run manifest: {self.run_manifest_path}")
+
     def generate_unique_field_name(self, input_feature, field_name):
         existing_field_names = [field.name for field in arcpy.ListFields(input_feature)]
         unique_field_name = field_name
@@ -543,6 +845,101 @@ class PartitionIterator:
                     type_path=context_data_copy,
                 )
 
+        self.build_spatial_indexes()
+
+    def build_spatial_indexes(self):
+        """
+        Builds a spatial index over each input and context copy, so partition selections only
+        need to test the features near each partition.
+        """
+        self.spatial_indexes = {}
+        for alias, types in self.nested_alias_type_data.items():
+            for type_info in ["input_copy", "context_copy"]:
+                if type_info in types:
+                    self.get_spatial_index(alias, type_info)
+
+    def get_spatial_index(self, alias, type_info):
+        """
+        Returns the spatial index of an alias type, building it if it does not exist yet.
+        """
+        key = f"{alias}_{type_info}"
+        if key not in self.spatial_indexes:
+            self.spatial_indexes[key] = PartitionSpatialIndex.from_feature_class(
+                self.nested_alias_type_data[alias][type_info]
+            )
+        return self.spatial_indexes[key]
+
+    def search_distance_in_meters(self):
+        distance, _, unit = self.search_distance.partition(" ")
+        unit = unit.strip().lower()
+        if unit not in self.SEARCH_DISTANCE_UNITS_IN_METERS:
+            raise ValueError(
+                f"Unsupported search distance unit in '{self.search_distance}', "
+                f"use one of: {', '.join(self.SEARCH_DISTANCE_UNITS_IN_METERS)}"
+            )
+        return float(distance) * self.SEARCH_DISTANCE_UNITS_IN_METERS[unit]
+
+    def get_partition_envelope(self, object_id, expanded=False):
+        """
+        Returns the envelope of a partition, optionally expanded by the search distance.
+        """
+        if not self.partition_envelopes:
+            with arcpy.da.SearchCursor(
+                self.partition_feature, [self.object_id_field, "SHAPE@"]
+            ) as cursor:
+                for partition_id, shape in cursor:
+                    extent = shape.extent
+                    self.partition_envelopes[partition_id] = (
+                        extent.XMin,
+                        extent.YMin,
+                        extent.XMax,
+                        extent.YMax,
+                    )
+
+        xmin, ymin, xmax, ymax = self.partition_envelopes[object_id]
+        if expanded:
+            distance = self.search_distance_in_meters()
+            return xmin - distance, ymin - distance, xmax + distance, ymax + distance
+        return xmin, ymin, xmax, ymax
+
+    def make_partition_candidate_layer(self, alias, type_info, object_id, expanded):
+        """
+        Makes a feature layer of the features that can be selected by location for a partition,
+        found with a spatial index lookup instead of a scan of the whole feature class.
+
+        Args:
+            alias: The alias to select from.
+            type_info: The type of the alias to select from.
+            object_id: The OBJECTID of the partition feature.
+            expanded (bool): If True, the candidates include the features within the search distance.
+
+        Returns:
+            tuple: The name of the candidate layer and the number of candidates.
+        """
+        candidates = self.get_spatial_index(alias, type_info).query(
+            *self.get_partition_envelope(object_id, expanded)
+        )
+        candidate_layer = f"{alias}_{type_info}_partition_candidates_{'buffer' if expanded else 'core'}_{self.scale}"
+        self.iteration_file_paths_list.append(candidate_layer)
+
+        input_path = self.nested_alias_type_data[alias][type_info]
+        where_clause = object_id_where_clause(
+            arcpy.Describe(input_path).OIDFieldName,
+            candidates,
+            maximum_terms=self.MAXIMUM_CANDIDATE_WHERE_CLAUSE_TERMS,
+        )
+        if where_clause is None:
+            # The candidates are only a prefilter, so scattered candidates fall back to all features
+            print(
+                f"{len(candidates)} scattered candidates in {alias}, selecting from all features"
+            )
+        arcpy.management.MakeFeatureLayer(
+            in_features=input_path,
+            out_layer=candidate_layer,
+            where_clause=where_clause,
+        )
+        return candidate_layer, len(candidates)
+
     def select_partition_feature(self, iteration_partition, object_id):
         """
         Selects partition feature based on OBJECTID.
@@ -568,36 +965,36 @@ class PartitionIterator:
             return None, False
 
         if "input_copy" in self.nested_alias_type_data[alias]:
-            input_path = self.nested_alias_type_data[alias]["input_copy"]
             input_features_partition_selection = (
                 f"in_memory/{alias}_partition_base_select_{self.scale}"
             )
             self.iteration_file_paths_list.append(input_features_partition_selection)
 
-            custom_arcpy.select_location_and_make_feature_layer(
-                input_layer=input_path,
-                overlap_type=custom_arcpy.OverlapType.HAVE_THEIR_CENTER_IN.value,
-                select_features=iteration_partition,
-                output_name=input_features_partition_selection,
+            core_candidates, count_core_candidates = (
+                self.make_partition_candidate_layer(
+                    alias, "input_copy", object_id, expanded=False
+                )
             )
 
             aliases_with_features = {}
-            count_points = int(
-                arcpy.management.GetCount(input_features_partition_selection).getOutput(
-                    0
+            count_points = 0
+            if count_core_candidates > 0:
+                custom_arcpy.select_location_and_make_feature_layer(
+                    input_layer=core_candidates,
+                    overlap_type=custom_arcpy.OverlapType.HAVE_THEIR_CENTER_IN.value,
+                    select_features=iteration_partition,
+                    output_name=input_features_partition_selection,
+                )
+                count_points = int(
+                    arcpy.management.GetCount(
+                        input_features_partition_selection
+                    ).getOutput(0)
                 )
-            )
             aliases_with_features[alias] = count_points
 
             if aliases_with_features[alias] > 0:
                 print(f"{alias} has {count_points} features in {iteration_partition}")
 
-                arcpy.CalculateField_management(
-                    in_table=input_features_partition_selection,
-                    field=self.PARTITION_FIELD,
-                    expression="1",
-                )
-
                 iteration_append_feature = f"{self.root_file_partition_iterator}_{alias}_iteration_append_feature_{self.scale}"
                 self.iteration_file_paths_list.append(iteration_append_feature)
 
@@ -612,13 +1009,25 @@ class PartitionIterator:
                     schema_type="NO_TEST",
                 )
 
+                # The partition field is calculated on the iteration copies so the shared input_copy
+                # is never written to, which keeps it safe to read from several worker processes.
+                arcpy.CalculateField_management(
+                    in_table=iteration_append_feature,
+                    field=self.PARTITION_FIELD,
+                    expression="1",
+                )
+
                 input_features_partition_context_selection = f"in_memory/{alias}_input_features_partition_context_selection_{self.scale}"
                 self.iteration_file_paths_list.append(
                     input_features_partition_context_selection
                 )
 
+                buffer_candidates, _ = self.make_partition_candidate_layer(
+                    alias, "input_copy", object_id, expanded=True
+                )
+
                 custom_arcpy.select_location_and_make_feature_layer(
-                    input_layer=input_path,
+                    input_layer=buffer_candidates,
                     overlap_type=custom_arcpy.OverlapType.WITHIN_A_DISTANCE,
                     select_features=iteration_partition,
                     output_name=input_features_partition_context_selection,
@@ -633,14 +1042,24 @@ class PartitionIterator:
                     selection_type="REMOVE_FROM_SELECTION",
                 )
 
+                input_features_partition_context_copy = f"in_memory/{alias}_input_features_partition_context_copy_{self.scale}"
+                self.iteration_file_paths_list.append(
+                    input_features_partition_context_copy
+                )
+
+                arcpy.management.CopyFeatures(
+                    in_features=input_features_partition_context_selection,
+                    out_feature_class=input_features_partition_context_copy,
+                )
+
                 arcpy.CalculateField_management(
-                    in_table=input_features_partition_context_selection,
+                    in_table=input_features_partition_context_copy,
                     field=self.PARTITION_FIELD,
                     expression="0",
                 )
 
                 arcpy.management.Append(
-                    inputs=input_features_partition_context_selection,
+                    inputs=input_features_partition_context_copy,
                     target=iteration_append_feature,
                     schema_type="NO_TEST",
                 )
@@ -682,17 +1101,20 @@ class PartitionIterator:
                 )
         return inputs_present_in_partition
 
-    def process_context_features(self, alias, iteration_partition):
+    def process_context_features(self, alias, iteration_partition, object_id):
         """
         Process context features for a given partition if input features are present.
         """
         if "context_copy" in self.nested_alias_type_data[alias]:
-            context_path = self.nested_alias_type_data[alias]["context_copy"]
             context_selection_path = f"{self.root_file_partition_iterator}_{alias}_context_iteration_selection"
             self.iteration_file_paths_list.append(context_selection_path)
 
+            context_candidates, _ = self.make_partition_candidate_layer(
+                alias, "context_copy", object_id, expanded=True
+            )
+
             custom_arcpy.select_location_and_make_permanent_feature(
-                input_layer=context_path,
+                input_layer=context_candidates,
                 overlap_type=custom_arcpy.OverlapType.WITHIN_A_DISTANCE,
                 select_features=iteration_partition,
                 output_name=context_selection_path,
@@ -720,7 +1142,7 @@ class PartitionIterator:
                     f"iteration partition {object_id} has no context features for {alias} in the partition feature"
                 )
             else:
-                self.process_context_features(alias, iteration_partition)
+                self.process_context_features(alias, iteration_partition, object_id)
 
     def format_time(self, seconds):
         """
@@ -972,47 +1394,237 @@ class PartitionIterator:
                     schema_type="NO_TEST",
                 )
 
-    def partition_iteration(self):
-        aliases = self.nested_alias_type_data.keys()
-        self.find_maximum_object_id()
-
+    def prepare_partition_iteration(self):
+        """
+        Creates the dummy features and cleans up leftover iteration files before partitions are processed.
+        """
         self.create_dummy_features(types_to_include=["input_copy", "context_copy"])
         self.initialize_dummy_used()
 
         self.delete_iteration_files(*self.iteration_file_paths_list)
         self.iteration_file_paths_list.clear()
 
+    def process_partition(self, aliases, object_id):
+        """
+        Selects the features of a single partition, executes the custom functions on them and
+        appends the results to the final outputs.
+
+        Args:
+            aliases: The aliases to process.
+            object_id (int): The OBJECTID of the partition feature.
+
+        Returns:
+            bool: True if any input features were present in the partition.
+        """
+        self.reset_dummy_used()
+
+        self.iteration_file_paths_list.clear()
+        iteration_partition = f"{self.root_file_partition_iterator}_partition_feature_{self.scale}_{object_id}"
+        self.select_partition_feature(iteration_partition, object_id)
+
+        inputs_present_in_partition = self._process_inputs_in_partition(
+            aliases, iteration_partition, object_id
+        )
+
+        if inputs_present_in_partition:
+            self._process_context_features_and_others(
+                aliases, iteration_partition, object_id
+            )
+            # Resolves from the unresolved parameters so every partition gets the paths of its own iteration
+            self.custom_functions = copy.deepcopy(self.unresolved_custom_functions)
+            self.prepare_io_custom_logic()
+            self.export_dictionaries_to_json(
+                file_name="iteration",
+                iteration=True,
+                object_id=object_id,
+            )
+            self.execute_custom_functions()
+            for alias in aliases:
+                self.append_iteration_to_final(alias)
+        self.delete_iteration_files(*self.iteration_file_paths_list)
+        return inputs_present_in_partition
+
+    def partition_iteration(self):
+        aliases = self.nested_alias_type_data.keys()
+        self.find_maximum_object_id()
+        self.prepare_partition_iteration()
+
         for object_id in range(1, self.max_object_id + 1):
+            if self.is_partition_completed(object_id):
+                print(f"\nSkipping completed partition: {object_id}")
+                continue
+
             self.iteration_start_time = time.time()
             print(f"\nProcessing Partition: {object_id} out of {self.max_object_id}")
-            self.reset_dummy_used()
+            self.start_partition_checkpoint(object_id)
+            inputs_present_in_partition = self.process_partition(aliases, object_id)
+            self.complete_partition_checkpoint(object_id)
+            self.track_iteration_time(object_id, inputs_present_in_partition)
 
-            self.iteration_file_paths_list.clear()
-            iteration_partition = f"{self.partition_feature}_{object_id}"
-            self.select_partition_feature(iteration_partition, object_id)
+    def prepare_worker_directory(self):
+        """
+        Creates an empty directory holding the scratch geodatabases of the worker processes.
+        """
+        self.delete_worker_directory()
+        os.makedirs(self.worker_directory)
+        print(f"Created worker directory: {self.worker_directory}")
 
-            inputs_present_in_partition = self._process_inputs_in_partition(
-                aliases, iteration_partition, object_id
-            )
+    def delete_worker_directory(self):
+        """
+        Deletes the worker geodatabases and their directory if they exist.
+        """
+        if not os.path.exists(self.worker_directory):
+            return
+        for worker_gdb in os.listdir(self.worker_directory):
+            worker_gdb_path = os.path.join(self.worker_directory, worker_gdb)
+            if arcpy.Exists(worker_gdb_path):
+                arcpy.management.Delete(worker_gdb_path)
+        shutil.rmtree(self.worker_directory, ignore_errors=True)
+        print(f"Deleted worker directory: {self.worker_directory}")
+
+    def configure_worker(self):
+        """
+        Configures this instance to work inside a worker process. Each worker gets its own scratch
+        geodatabase so that no two processes write to the same workspace.
+        """
+        # A resumed run reuses the worker directory, so the name must not clash with earlier workers
+        worker_gdb_name = f"partition_worker_{os.getpid()}_{uuid.uuid4().hex[:8]}.gdb"
+        arcpy.management.CreateFileGDB(
+            out_folder_path=self.worker_directory,
+            out_name=worker_gdb_name,
+        )
+        worker_gdb = os.path.join(self.worker_directory, worker_gdb_name)
 
-            if inputs_present_in_partition:
-                self._process_context_features_and_others(
-                    aliases, iteration_partition, object_id
+        self.root_file_partition_iterator = os.path.join(
+            worker_gdb, os.path.basename(self.root_file_partition_iterator)
+        )
+        # Root files of custom functions are redirected so their work files are written to the worker gdb
+        for custom_func in self.unresolved_custom_functions:
+            root_file = custom_func["params"].get("root_file")
+            if isinstance(root_file, str):
+                custom_func["params"]["root_file"] = os.path.join(
+                    worker_gdb, os.path.basename(root_file)
                 )
-                self.prepare_io_custom_logic()
-                self.export_dictionaries_to_json(
-                    file_name="iteration",
-                    iteration=True,
-                    object_id=object_id,
+
+        self.coordinator_final_outputs = copy.deepcopy(self.nested_final_outputs)
+        self.prepare_partition_iteration()
+
+    def process_partition_in_worker(self, object_id):
+        """
+        Processes a single partition inside a worker process, writing the final outputs of the
+        partition to the worker gdb.
+
+        Args:
+            object_id (int): The OBJECTID of the partition feature.
+
+        Returns:
+            dict: The partition outputs for each alias and type that got any features.
+        """
+        self.nested_final_outputs = {
+            alias: {
+                type_info: f"{self.root_file_partition_iterator}_{alias}_{type_info}_partition_{object_id}"
+                for type_info in types
+            }
+            for alias, types in self.coordinator_final_outputs.items()
+        }
+        self.process_partition(self.nested_alias_type_data.keys(), object_id)
+
+        return {
+            alias: {
+                type_info: path
+                for type_info, path in types.items()
+                if arcpy.Exists(path)
+            }
+            for alias, types in self.nested_final_outputs.items()
+        }
+
+    def merge_partition_outputs(self, partition_outputs):
+        """
+        Merges the outputs of each partition into the final outputs. Partitions are merged in
+        OBJECTID order so the result does not depend on which worker finished first.
+
+        Args:
+            partition_outputs (dict): The partition outputs keyed by the partition OBJECTID.
+        """
+        for alias, types in self.nested_final_outputs.items():
+            for type_info, final_output_path in types.items():
+                partition_paths = [
+                    partition_outputs[object_id][alias][type_info]
+                    for object_id in sorted(partition_outputs)
+                    if type_info in partition_outputs[object_id].get(alias, {})
+                ]
+                if not partition_paths:
+                    print(f"No partition outputs found for {alias} of type {type_info}")
+                    continue
+
+                arcpy.management.CopyFeatures(
+                    in_features=partition_paths[0],
+                    out_feature_class=final_output_path,
+                )
+                if len(partition_paths) > 1:
+                    arcpy.management.Append(
+                        inputs=partition_paths[1:],
+                        target=final_output_path,
+                        schema_type="NO_TEST",
+                    )
+                print(
+                    f"Merged {len(partition_paths)} partition outputs into {final_output_path}"
                 )
-                self.execute_custom_functions()
-            if inputs_present_in_partition:
-                for alias in aliases:
-                    self.append_iteration_to_final(alias)
-                self.delete_iteration_files(*self.iteration_file_paths_list)
-            else:
-                self.delete_iteration_files(*self.iteration_file_paths_list)
-            self.track_iteration_time(object_id, inputs_present_in_partition)
+
+    def parallel_partition_iteration(self):
+        """
+        Processes the partitions using a pool of worker processes. Each worker processes whole
+        partitions in its own scratch gdb, and the coordinator merges the partition outputs.
+        """
+        self.find_maximum_object_id()
+
+        # Partitions completed by a checkpointed run are reused if their outputs still exist
+        partition_outputs = {}
+        object_ids = []
+        for object_id in range(1, self.max_object_id + 1):
+            if self.is_partition_completed(object_id):
+                outputs = self.run_manifest["partitions"][str(object_id)][
+                    "partition_outputs"
+                ]
+                if all(
+                    arcpy.Exists(path)
+                    for types in outputs.values()
+                    for path in types.values()
+                ):
+                    partition_outputs[object_id] = outputs
+                    continue
+            object_ids.append(object_id)
+        if partition_outputs:
+            print(f"Skipping {len(partition_outputs)} completed partitions")
+
+        if self.resumed_run:
+            os.makedirs(self.worker_directory, exist_ok=True)
+        else:
+            self.prepare_worker_directory()
+        num_processes = max(
+            1, min(int(cpu_count() * self.cpu_usage_percentage), len(object_ids))
+        )
+        print(f"Processing {len(object_ids)} partitions using {num_processes} processes")
+
+        # Workers inherit the profiling run id, so their spans are written to this run
+        profiler.run_id()
+        with Pool(
+            processes=num_processes,
+            initializer=_initialize_partition_worker,
+            initargs=(self,),
+        ) as pool:
+            for object_id, outputs in pool.imap_unordered(
+                _process_partition_in_worker, object_ids
+            ):
+                partition_outputs[object_id] = outputs
+                self.complete_partition_checkpoint(object_id, outputs)
+                total_runtime = self.format_time(time.time() - self.total_start_time)
+                print(
+                    f"\nFinished partition {object_id} ({len(partition_outputs)} out of {self.max_object_id}), current runtime: {total_runtime}"
+                )
+
+        self.merge_partition_outputs(partition_outputs)
+        self.delete_worker_directory()
 
     @timing_decorator
     def run(self):
@@ -1022,20 +1634,51 @@ class PartitionIterator:
         if self.raw_output_data is not None:
             self.unpack_alias_path_outputs(self.raw_output_data)
 
+        self.raw_nested_alias_type_data = copy.deepcopy(self.nested_alias_type_data)
         self.export_dictionaries_to_json(file_name="post_initialization")
         print("Initialization done\n")
 
-        print("\nStarting Data Preparation...")
-        self.delete_final_outputs()
-        self.prepare_input_data()
-        self.export_dictionaries_to_json(file_name="post_data_preparation")
+        if self.resume_from_checkpoint:
+            self.run_fingerprint = self.create_run_fingerprint()
+            self.resumed_run = self.load_run_manifest()
+
+        if self.resumed_run:
+            print("\nResuming from checkpoint, skipping Data Preparation and Partitioning...")
+        else:
+            print("\nStarting Data Preparation...")
+            self.delete_final_outputs()
+            self.prepare_input_data()
+            self.export_dictionaries_to_json(file_name="post_data_preparation")
 
-        print("\nCreating Cartographic Partitions...")
-        self.create_cartographic_partitions()
+            print("\nCreating Cartographic Partitions...")
+            self.create_cartographic_partitions()
+            self.create_run_manifest()
 
         print("\nStarting on Partition Iteration...")
-        self.partition_iteration()
+        if self.parallel_processing:
+            self.parallel_partition_iteration()
+        else:
+            self.partition_iteration()
         self.export_dictionaries_to_json(file_name="post_runtime")
+        self.complete_run_manifest()
+
+
+# Worker process state, set by the pool initializer
+_partition_worker = None
+
+
+def _initialize_partition_worker(partition_iterator):
+    global _partition_worker
+    environment_setup.main()
+    # The cores are already used by the worker processes
+    arcpy.env.parallelProcessingFactor = "1"
+    partition_iterator.configure_worker()
+    _partition_worker = partition_iterator
+
+
+def _process_partition_in_worker(object_id):
+    print(f"\nProcessing Partition: {object_id} in process {os.getpid()}")
+    return object_id, _partition_worker.process_partition_in_worker(object_id)
 
 
 if __name__ == "__main__":
@@ -1213,6 +1856,7 @@ if __name__ == "__main__":
         scale=env_setup.global_config.scale_n100,
         dictionary_documentation_path=Building_N100.iteration___json_documentation___building_n100.value,
         feature_count="33000",
+        parallel_processing=True,
     )
 
     # Run the partition iterator
@@ -0,0 +1,211 @@
+import arcpy
+import numpy as np
+
+# Some databases reject IN lists longer than this
+MAXIMUM_IN_LIST_LENGTH = 1000
+
+
+class PartitionSpatialIndex:
+    """
+    A uniform grid over the envelopes of the features in a feature class. It is built once,
+    and each partition then finds its candidate features with a lookup of the grid cells it
+    covers instead of scanning the whole feature class.
+
+    The candidates are a superset of the features selected by location, since a feature can only
+    have its center in, or be within a distance of, a partition if its envelope intersects the
+    (expanded) envelope of the partition. The exact spatial relationship is then tested by arcpy
+    on the candidates only.
+    """
+
+    def __init__(self, object_ids, envelopes, cell_size=None):
+        """
+        Args:
+            object_ids: The OIDs of the features.
+            envelopes: The envelopes of the features as rows of (xmin, ymin, xmax, ymax).
+            cell_size (float): The size of the grid cells. Defaults to a cell size giving roughly
+                one feature per cell on evenly distributed data.
+        """
+        self.object_ids = np.asarray(object_ids, dtype=np.int64)
+        self.envelopes = np.asarray(envelopes, dtype=np.float64).reshape(-1, 4)
+
+        if len(self.object_ids) == 0:
+            self.origin = np.zeros(2)
+            self.cell_size = 1.0
+            self.cell_keys = np.empty(0, dtype=np.int64)
+            self.cell_starts = np.empty(0, dtype=np.int64)
+            self.cell_feature_indices = np.empty(0, dtype=np.int64)
+            self.number_of_columns = 1
+            self.number_of_rows = 1
+            return
+
+        self.origin = self.envelopes[:, :2].min(axis=0)
+        data_width, data_height = self.envelopes[:, 2:].max(axis=0) - self.origin
+
+        if cell_size is None:
+            cell_size = max(data_width, data_height) / max(
+                np.sqrt(len(self.object_ids)), 1.0
+            )
+            # Cells smaller than the typical feature make large features span many cells
+            typical_feature_size = np.median(
+                np.maximum(
+                    self.envelopes[:, 2] - self.envelopes[:, 0],
+                    self.envelopes[:, 3] - self.envelopes[:, 1],
+                )
+            )
+            cell_size = max(cell_size, typical_feature_size, 1.0)
+        self.cell_size = float(cell_size)
+        self.number_of_columns = int(data_width // self.cell_size) + 1
+        self.number_of_rows = int(data_height // self.cell_size) + 1
+
+        self._build_cells()
+
+    @classmethod
+    def from_feature_class(cls, feature_class, cell_size=None):
+        """
+        Builds the index by reading the envelopes of a feature class once.
+
+        Args:
+            feature_class: The feature class to index.
+            cell_size (float): The size of the grid cells.
+        """
+        if arcpy.Describe(feature_class).shapeType == "Point":
+            with arcpy.da.SearchCursor(feature_class, ["OID@", "SHAPE@XY"]) as cursor:
+                rows = [(oid, x, y, x, y) for oid, (x, y) in cursor if x is not None]
+        else:
+            rows = []
+            with arcpy.da.SearchCursor(feature_class, ["OID@", "SHAPE@"]) as cursor:
+                for oid, shape in cursor:
+                    if shape is None:
+                        continue
+                    extent = shape.extent
+                    rows.append(
+                        (oid, extent.XMin, extent.YMin, extent.XMax, extent.YMax)
+                    )
+
+        rows = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        print(f"Built spatial index for {len(rows)} features in {feature_class}")
+        return cls(rows[:, 0], rows[:, 1:], cell_size)
+
+    def _cell_ranges(self, envelopes):
+        minimum = np.floor((envelopes[:, :2] - self.origin) / self.cell_size)
+        maximum = np.floor((envelopes[:, 2:] - self.origin) / self.cell_size)
+        return minimum.astype(np.int64), maximum.astype(np.int64)
+
+    def _build_cells(self):
+        """
+        Registers each feature in every cell its envelope overlaps, storing the feature indices
+        sorted by cell key so the features of a cell form a contiguous slice.
+        """
+        minimum, maximum = self._cell_ranges(self.envelopes)
+        columns = maximum[:, 0] - minimum[:, 0] + 1
+        rows = maximum[:, 1] - minimum[:, 1] + 1
+        cells_per_feature = columns * rows
+
+        feature_indices = np.repeat(np.arange(len(self.object_ids)), cells_per_feature)
+        first_entry = np.repeat(
+            np.cumsum(cells_per_feature) - cells_per_feature, cells_per_feature
+        )
+        offset = np.arange(len(feature_indices)) - first_entry
+        cell_x = minimum[feature_indices, 0] + offset % columns[feature_indices]
+        cell_y = minimum[feature_indices, 1] + offset // columns[feature_indices]
+        keys = cell_y * self.number_of_columns + cell_x
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        self.cell_feature_indices = feature_indices[order]
+        self.cell_keys, self.cell_starts = np.unique(sorted_keys, return_index=True)
+        self.cell_starts = np.append(self.cell_starts, len(sorted_keys))
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """
+        Finds the features with an envelope intersecting the query envelope.
+
+        Returns:
+            np.ndarray: The sorted OIDs of the intersecting features.
+        """
+        if len(self.cell_keys) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        query = np.array([[xmin, ymin, xmax, ymax]], dtype=np.float64)
+        minimum, maximum = self._cell_ranges(query)
+        minimum = np.maximum(minimum[0], 0)
+        maximum = maximum[0]
+        maximum[0] = min(maximum[0], self.number_of_columns - 1)
+        maximum[1] = min(maximum[1], self.number_of_rows - 1)
+        if (maximum < minimum).any():
+            return np.empty(0, dtype=np.int64)
+
+        cell_x, cell_y = np.meshgrid(
+            np.arange(minimum[0], maximum[0] + 1),
+            np.arange(minimum[1], maximum[1] + 1),
+        )
+        query_keys = (cell_y * self.number_of_columns + cell_x).ravel()
+
+        positions = np.searchsorted(self.cell_keys, query_keys)
+        found = positions < len(self.cell_keys)
+        found[found] = self.cell_keys[positions[found]] == query_keys[found]
+        positions = positions[found]
+        if len(positions) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = np.unique(
+            np.concatenate(
+                [
+                    self.cell_feature_indices[
+                        self.cell_starts[position] : self.cell_starts[position + 1]
+                    ]
+                    for position in positions
+                ]
+            )
+        )
+        envelopes = self.envelopes[candidates]
+        intersecting = (
+            (envelopes[:, 0] <= xmax)
+            & (envelopes[:, 2] >= xmin)
+            & (envelopes[:, 1] <= ymax)
+            & (envelopes[:, 3] >= ymin)
+        )
+        return np.sort(self.object_ids[candidates[intersecting]])
+
+
+def object_id_where_clause(object_id_field, object_ids, maximum_terms=None):
+    """
+    Creates a where clause selecting the given OIDs. Runs of consecutive OIDs are written as
+    BETWEEN ranges to keep the clause short, and the remaining OIDs as IN lists of at most
+    MAXIMUM_IN_LIST_LENGTH OIDs.
+
+    Args:
+        object_id_field (str): The name of the OID field.
+        object_ids: The sorted OIDs to select.
+        maximum_terms (int): If given, the largest number of ranges and single OIDs the clause
+            may hold. Scattered OIDs give long clauses that are slow to parse.
+
+    Returns:
+        str: The where clause, or None if it would hold more than maximum_terms terms.
+    """
+    object_ids = np.asarray(object_ids, dtype=np.int64)
+    if len(object_ids) == 0:
+        return "1 = 0"
+
+    run_breaks = np.flatnonzero(np.diff(object_ids) != 1) + 1
+    run_starts = object_ids[np.concatenate(([0], run_breaks))]
+    run_ends = object_ids[np.concatenate((run_breaks - 1, [len(object_ids) - 1]))]
+
+    is_range = run_ends - run_starts >= 2
+    number_of_terms = int(is_range.sum()) + int(
+        (run_ends - run_starts + 1)[~is_range].sum()
+    )
+    if maximum_terms is not None and number_of_terms > maximum_terms:
+        return None
+
+    single_ids = []
+    clauses = []
+    for start, end, range_run in zip(run_starts, run_ends, is_range):
+        if range_run:
+            clauses.append(f"({object_id_field} BETWEEN {start} AND {end})")
+        else:
+            single_ids.extend(range(start, end + 1))
+    for chunk_start in range(0, len(single_ids), MAXIMUM_IN_LIST_LENGTH):
+        chunk = single_ids[chunk_start : chunk_start + MAXIMUM_IN_LIST_LENGTH]
+        clauses.append(f"{object_id_field} IN ({', '.join(map(str, chunk))})")
+    return " OR ".join(clauses)
@@ -0,0 +1,122 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def stage_name(stage) -> str:
+    return f"{stage.__module__.split('.')[-1]}.{stage.__name__}"
+
+
+def stage_io(stage):
+    """
+    Returns the file manager entries a stage reads and writes as sets of paths, or None if the
+    stage has not declared them with stage_io_decorator.
+    """
+    metadata = getattr(stage, "_stage_io_metadata", None)
+    if metadata is None:
+        return None
+
+    def paths(entries):
+        return {getattr(entry, "value", entry) for entry in entries}
+
+    return paths(metadata["inputs"]), paths(metadata["outputs"])
+
+
+def stage_dependencies(stages) -> list:
+    """
+    Derives the dependencies between stages from their declared inputs and outputs. A stage
+    depends on an earlier stage if either writes an entry the other reads or writes, so the
+    stages can run in any order that respects the dependencies and still give the same result as
+    running them in list order. A stage without declarations depends on all earlier stages, and
+    all later stages depend on it.
+
+    Returns:
+        list: The positions of the stages each stage depends on.
+    """
+    declared_io = [stage_io(stage) for stage in stages]
+    dependencies = []
+    for position, io in enumerate(declared_io):
+        depends_on = set()
+        for earlier_position in range(position):
+            earlier_io = declared_io[earlier_position]
+            if io is None or earlier_io is None:
+                depends_on.add(earlier_position)
+                continue
+            inputs, outputs = io
+            earlier_inputs, earlier_outputs = earlier_io
+            if (
+                earlier_outputs & inputs
+                or earlier_outputs & outputs
+                or earlier_inputs & outputs
+            ):
+                depends_on.add(earlier_position)
+        dependencies.append(depends_on)
+    return dependencies
+
+
+def run_pipeline(
+    stages,
+    run_in_parallel: bool = False,
+    max_workers: int = None,
+    initializer=None,
+    stage_cache=None,
+):
+    """
+    Runs pipeline stages in dependency order. Stages run one at a time in list order, or
+    concurrently in separate processes as soon as the stages they depend on have finished.
+
+    Args:
+        stages (list): The module level stage functions, in an order that is valid when they run
+            one at a time.
+        run_in_parallel (bool): If True, independent stages run concurrently.
+        max_workers (int): The maximum number of worker processes, by default the number of CPUs.
+        initializer: A function run once in each worker process before its first stage, such as
+            the environment setup.
+        stage_cache (StageCache): If given, stages with unchanged inputs, parameters and code
+            restore their outputs from the cache instead of running.
+    """
+    if not run_in_parallel:
+        for stage in stages:
+            if stage_cache is None:
+                stage()
+            else:
+                stage_cache.record(stage, stage_cache.run(stage))
+        return
+
+    dependencies = stage_dependencies(stages)
+    for stage, stage_dependency in zip(stages, dependencies):
+        waits_for = ", ".join(stage_name(stages[position]) for position in sorted(stage_dependency))
+        print(f"{stage_name(stage)} waits for: {waits_for or 'nothing'}")
+
+    finished = set()
+    running = {}
+    max_workers = max_workers or min(os.cpu_count(), len(stages))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=initializer) as executor:
+        while len(finished) < len(stages):
+            for position, stage in enumerate(stages):
+                if (
+                    position not in finished
+                    and position not in running.values()
+                    and dependencies[position] <= finished
+                ):
+                    print(f"Starting stage {stage_name(stage)}")
+                    if stage_cache is None:
+                        running[executor.submit(stage)] = position
+                    else:
+                        running[executor.submit(stage_cache.run, stage)] = position
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception:
+                    for pending_future in running:
+                        pending_future.cancel()
+                    print(f"Stage {stage_name(stages[position])} failed")
+                    raise
+                if stage_cache is not None:
+                    stage_cache.record(stages[position], result)
+                finished.add(position)
+                print(
+                    f"Finished stage {stage_name(stages[position])} ({len(finished)}/{len(stages)})"
+                )
@@ -0,0 +1,237 @@
+import os
+
+import arcpy
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from custom_tools.general_tools.partition_spatial_index import object_id_where_clause
+
+# Above this many OID ranges and single OIDs, the points are copied with cursors instead of a
+# where clause, which is slow to parse
+MAXIMUM_WHERE_CLAUSE_TERMS = 5000
+
+
+def find_point_clusters(coordinates, search_distance, minimum_points=2):
+    """
+    Finds DBSCAN clusters among points using a KD-tree, matching the DBSCAN method of
+    arcpy.gapro.FindPointClusters.
+
+    A point is a core point if at least `minimum_points` points, itself included, are within the
+    search distance. Core points within the search distance of each other share a cluster, and other
+    points within the search distance of a core point join the cluster of the nearest core point.
+
+    Args:
+        coordinates (np.ndarray): The (n, 2) coordinates of the points.
+        search_distance (float): The search distance in the units of the coordinates.
+        minimum_points (int): The minimum number of points forming a cluster.
+
+    Returns:
+        np.ndarray: The cluster id of each point. Clusters are numbered from 1 in the order of their
+        first point, and points not in a cluster get -1, as CLUSTER_ID from FindPointClusters.
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    number_of_points = len(coordinates)
+    labels = np.full(number_of_points, -1, dtype=np.int64)
+    if number_of_points == 0:
+        return labels
+
+    tree = cKDTree(coordinates)
+    pairs = tree.query_pairs(r=search_distance, output_type="ndarray")
+    neighbour_counts = np.bincount(pairs.ravel(), minlength=number_of_points) + 1
+    is_core = neighbour_counts >= minimum_points
+
+    core_pairs = pairs[is_core[pairs[:, 0]] & is_core[pairs[:, 1]]]
+    graph = coo_matrix(
+        (np.ones(len(core_pairs)), (core_pairs[:, 0], core_pairs[:, 1])),
+        shape=(number_of_points, number_of_points),
+    )
+    _, components = connected_components(graph, directed=False)
+
+    # Numbers the clusters of the core points in the order of their first point
+    core_components = components[is_core]
+    unique_components, first_index = np.unique(core_components, return_index=True)
+    cluster_numbers = np.empty(components.max() + 1, dtype=np.int64)
+    cluster_numbers[unique_components[np.argsort(first_index)]] = np.arange(
+        1, len(unique_components) + 1
+    )
+    labels[is_core] = cluster_numbers[core_components]
+
+    # Border points join the cluster of their nearest core point within the search distance
+    border_points = np.flatnonzero(~is_core)
+    if len(border_points) > 0 and is_core.any():
+        core_indices = np.flatnonzero(is_core)
+        distances, nearest = cKDTree(coordinates[core_indices]).query(
+            coordinates[border_points], distance_upper_bound=search_distance
+        )
+        within = np.isfinite(distances)
+        labels[border_points[within]] = labels[core_indices[nearest[within]]]
+
+    return labels
+
+
+def convex_hull(points):
+    """
+    Calculates the convex hull of points with the monotone chain algorithm.
+
+    Returns:
+        np.ndarray: The hull vertices in counterclockwise order, without repeating the first vertex.
+    """
+    points = np.unique(np.asarray(points, dtype=np.float64), axis=0)
+    if len(points) <= 2:
+        return points
+
+    def cross(origin, a, b):
+        return (a[0] - origin[0]) * (b[1] - origin[1]) - (a[1] - origin[1]) * (
+            b[0] - origin[0]
+        )
+
+    lower = []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    upper = []
+    for point in points[::-1]:
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return np.array(lower[:-1] + upper[:-1])
+
+
+def minimum_area_rectangle_center(points):
+    """
+    Finds the center of the minimum area bounding rectangle of points, the point FeatureToPoint
+    returns for a RECTANGLE_BY_AREA minimum bounding geometry. The minimum area rectangle has a side
+    on an edge of the convex hull, so only the hull edge directions are tested.
+    """
+    hull = convex_hull(points)
+    if len(hull) == 1:
+        return hull[0]
+    if len(hull) == 2:
+        return hull.mean(axis=0)
+
+    edges = np.roll(hull, -1, axis=0) - hull
+    angles = np.arctan2(edges[:, 1], edges[:, 0])
+    cosines, sines = np.cos(angles), np.sin(angles)
+
+    # Hull vertices rotated so each edge in turn is parallel to the x-axis
+    rotated_x = hull[:, 0][np.newaxis, :] * cosines[:, np.newaxis] + hull[:, 1][
+        np.newaxis, :
+    ] * sines[:, np.newaxis]
+    rotated_y = -hull[:, 0][np.newaxis, :] * sines[:, np.newaxis] + hull[:, 1][
+        np.newaxis, :
+    ] * cosines[:, np.newaxis]
+    widths = rotated_x.max(axis=1) - rotated_x.min(axis=1)
+    heights = rotated_y.max(axis=1) - rotated_y.min(axis=1)
+    best = np.argmin(widths * heights)
+
+    center_x = (rotated_x[best].max() + rotated_x[best].min()) / 2
+    center_y = (rotated_y[best].max() + rotated_y[best].min()) / 2
+    return np.array(
+        [
+            center_x * cosines[best] - center_y * sines[best],
+            center_x * sines[best] + center_y * cosines[best],
+        ]
+    )
+
+
+def select_cluster_representatives(object_ids, coordinates, labels):
+    """
+    Chooses one representative point per cluster: the point nearest the center of the minimum area
+    bounding rectangle of the cluster. Ties are won by the point with the lowest OBJECTID.
+
+    Args:
+        object_ids: The OBJECTID of each point.
+        coordinates: The (n, 2) coordinates of the points.
+        labels: The cluster id of each point, -1 for points not in a cluster.
+
+    Returns:
+        dict: The OBJECTID of the representative of each cluster id.
+    """
+    object_ids = np.asarray(object_ids)
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    labels = np.asarray(labels)
+
+    clustered = np.flatnonzero(labels > 0)
+    order = clustered[np.argsort(labels[clustered], kind="stable")]
+    cluster_ids, group_starts = np.unique(labels[order], return_index=True)
+
+    representatives = {}
+    for cluster_id, members in zip(
+        cluster_ids.tolist(), np.split(order, group_starts[1:])
+    ):
+        center = minimum_area_rectangle_center(coordinates[members])
+        distances = np.hypot(*(coordinates[members] - center).T)
+        nearest = members[np.lexsort((object_ids[members], distances))[0]]
+        representatives[cluster_id] = object_ids[nearest].item()
+    return representatives
+
+
+def read_points(input_points, fields=()):
+    """
+    Reads the OBJECTID, coordinates and the given fields of points in one cursor pass.
+
+    Returns:
+        tuple: The OBJECTIDs, the (n, 2) coordinates and a dict of the field values as arrays.
+    """
+    with arcpy.da.SearchCursor(input_points, ["OID@", "SHAPE@XY", *fields]) as cursor:
+        rows = [row for row in cursor]
+
+    object_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    coordinates = np.array([row[1] for row in rows], dtype=np.float64).reshape(-1, 2)
+    field_values = {
+        field: np.array([row[2 + index] for row in rows])
+        for index, field in enumerate(fields)
+    }
+    return object_ids, coordinates, field_values
+
+
+def write_points_by_object_id(input_points, object_ids, output_points):
+    """
+    Writes the points with the given OBJECTIDs to a new feature class with a single copy. When the
+    OBJECTIDs are too scattered for a short where clause, the points are copied with cursors.
+    """
+    object_id_field = arcpy.Describe(input_points).OIDFieldName
+    where_clause = object_id_where_clause(
+        object_id_field, np.sort(object_ids), maximum_terms=MAXIMUM_WHERE_CLAUSE_TERMS
+    )
+    if where_clause is not None:
+        arcpy.analysis.Select(
+            in_features=input_points,
+            out_feature_class=output_points,
+            where_clause=where_clause,
+        )
+    else:
+        copy_points_by_object_id(input_points, object_ids, output_points)
+    print(f"{output_points} created with {len(object_ids)} points.")
+
+
+def copy_points_by_object_id(input_points, object_ids, output_points):
+    """
+    Copies the points with the given OBJECTIDs to a new feature class with the schema of the input,
+    reading the input with one SearchCursor and writing with one InsertCursor.
+    """
+    description = arcpy.Describe(input_points)
+    arcpy.management.CreateFeatureclass(
+        out_path=os.path.dirname(output_points),
+        out_name=os.path.basename(output_points),
+        geometry_type=description.shapeType,
+        template=input_points,
+        spatial_reference=description.spatialReference,
+    )
+
+    fields = [
+        field.name
+        for field in arcpy.ListFields(input_points)
+        if field.editable and field.type not in ("OID", "Geometry")
+    ]
+    selected_object_ids = set(np.asarray(object_ids, dtype=np.int64).tolist())
+    with arcpy.da.InsertCursor(output_points, ["SHAPE@", *fields]) as insert_cursor:
+        with arcpy.da.SearchCursor(
+            input_points, ["OID@", "SHAPE@", *fields]
+        ) as search_cursor:
+            for row in search_cursor:
+                if row[0] in selected_object_ids:
+                    insert_cursor.insertRow(row[1:])
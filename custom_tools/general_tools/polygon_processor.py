@@ -45,6 +45,13 @@ class PolygonProcessor:
         The name of the field in the input feature class that contains symbol type information.
     index_field_name : str
         The name of the field in the input feature class used for indexing during join operations.
+    vectorized : bool, optional
+        If True, the corners of all polygons are calculated in one array operation and inserted as
+        coordinate arrays, skipping the WKT conversion and the multiprocessing pool. Defaults to False.
+    carry_attributes : bool, optional
+        If True, the attributes of the points are read together with their coordinates and written
+        with the polygons in a single insert, replacing the JoinField round-trip. Implies the
+        vectorized corner calculation. Defaults to False.
 
     Attributes
     ----------
@@ -82,19 +89,25 @@ class PolygonProcessor:
         building_symbol_dimensions,
         symbol_field_name,
         index_field_name,
+        vectorized=False,
+        carry_attributes=False,
     ):
         self.input_building_points = input_building_points
         self.output_polygon_feature_class = output_polygon_feature_class
         self.building_symbol_dimensions = building_symbol_dimensions
         self.symbol_field_name = symbol_field_name
         self.index_field_name = index_field_name
+        self.vectorized = vectorized
+        self.carry_attributes = carry_attributes
         # Delay initialization of attributes that depend on external resources
         self.spatial_reference_system = None
         self.origin_id_field = None
 
         # Constants and configurations
         self.IN_MEMORY_WORKSPACE = config.default_project_workspace
-        self.TEMPORARY_FEATURE_CLASS_NAME = "temporary_polygon_feature_class"
+        self.TEMPORARY_FEATURE_CLASS_NAME = (
+            f"temporary_polygon_feature_class_{os.getpid()}"
+        )
         self.BATCH_PERCENTAGE = None
         self.NUMBER_OF_SUBSETS = None
         self.PERCENTAGE_OF_CPU_CORES = 1
@@ -163,6 +176,117 @@ class PolygonProcessor:
         polygon_corners.append(polygon_corners[0])  # Close the polygon
         return object_id, self.convert_corners_to_wkt(polygon_corners)
 
+    def calculate_polygon_corners(self, x_coordinates, y_coordinates, symbol_values):
+        """
+        Calculates the corners of all polygons in one array operation. The symbol dimensions are
+        looked up once per unique symbol value instead of once per point.
+        Args:
+            x_coordinates (np.ndarray): The x-coordinates of the points.
+            y_coordinates (np.ndarray): The y-coordinates of the points.
+            symbol_values (np.ndarray): The symbol value of each point.
+        Returns:
+            np.ndarray: An array of shape (number of points, 5, 2) holding the closed, clockwise
+            corner coordinates of each polygon.
+        """
+        unique_symbol_values, symbol_indices = np.unique(
+            symbol_values, return_inverse=True
+        )
+        symbol_dimensions = np.array(
+            [
+                self.building_symbol_dimensions[symbol_value]
+                for symbol_value in unique_symbol_values.tolist()
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        half_dimensions = symbol_dimensions[symbol_indices] / 2
+
+        corner_directions = np.array(
+            [[-1, -1], [-1, 1], [1, 1], [1, -1], [-1, -1]], dtype=np.float64
+        )
+        centers = np.column_stack((x_coordinates, y_coordinates)).astype(np.float64)
+        return (
+            centers[:, np.newaxis, :]
+            + corner_directions[np.newaxis, :, :] * half_dimensions[:, np.newaxis, :]
+        )
+
+    def insert_vectorized_polygons(self):
+        """
+        Reads the input points once, calculates all polygon corners in one operation and inserts
+        them as coordinate arrays into the output feature class.
+        """
+        input_data_array = arcpy.da.FeatureClassToNumPyArray(
+            self.input_building_points,
+            ["SHAPE@X", "SHAPE@Y", self.index_field_name, self.symbol_field_name],
+        )
+        polygon_corners = self.calculate_polygon_corners(
+            input_data_array["SHAPE@X"],
+            input_data_array["SHAPE@Y"],
+            input_data_array[self.symbol_field_name],
+        )
+
+        with arcpy.da.InsertCursor(
+            self.output_polygon_feature_class, [self.origin_id_field, "SHAPE@"]
+        ) as cursor:
+            for object_id, corners in zip(
+                input_data_array[self.index_field_name].tolist(),
+                polygon_corners.tolist(),
+            ):
+                cursor.insertRow([object_id, corners])
+
+    def attribute_fields_to_carry(self):
+        """
+        Returns the names of the editable attribute fields of the input points.
+        """
+        return [
+            field.name
+            for field in arcpy.ListFields(self.input_building_points)
+            if field.type not in ("OID", "Geometry") and field.editable
+        ]
+
+    def insert_polygons_with_attributes(self):
+        """
+        Reads the coordinates and attributes of the input points in one pass, and inserts the
+        polygons together with the attributes in one pass. The output is created with the input
+        points as template, so no temporary feature class or join is needed.
+        """
+        if arcpy.Exists(self.output_polygon_feature_class):
+            arcpy.management.Delete(self.output_polygon_feature_class)
+
+        output_workspace, output_class_name = os.path.split(
+            self.output_polygon_feature_class
+        )
+        arcpy.CreateFeatureclass_management(
+            output_workspace,
+            output_class_name,
+            "POLYGON",
+            template=self.input_building_points,
+            spatial_reference=self.spatial_reference_system,
+        )
+
+        attribute_fields = self.attribute_fields_to_carry()
+        symbol_field_index = attribute_fields.index(self.symbol_field_name)
+
+        with arcpy.da.SearchCursor(
+            self.input_building_points, ["SHAPE@X", "SHAPE@Y"] + attribute_fields
+        ) as cursor:
+            input_rows = [row for row in cursor]
+        if not input_rows:
+            print(f"No points found in {self.input_building_points}")
+            return
+
+        x_coordinates, y_coordinates, *attribute_columns = zip(*input_rows)
+        polygon_corners = self.calculate_polygon_corners(
+            np.array(x_coordinates),
+            np.array(y_coordinates),
+            np.array(attribute_columns[symbol_field_index]),
+        )
+
+        with arcpy.da.InsertCursor(
+            self.output_polygon_feature_class, attribute_fields + ["SHAPE@"]
+        ) as cursor:
+            for row, corners in zip(input_rows, polygon_corners.tolist()):
+                cursor.insertRow(list(row[2:]) + [corners])
+
     # Data Handling and Batch Processing
     def create_output_feature_class_if_not_exists(self):
         """
@@ -307,16 +431,26 @@ class PolygonProcessor:
 
         self.setup_spatial_reference_and_origin_id()
 
+        if self.carry_attributes:
+            self.insert_polygons_with_attributes()
+            print(
+                f"Output feature class: {self.output_polygon_feature_class} completed."
+            )
+            return
+
         self.create_output_feature_class_if_not_exists()
 
-        # Processing data in batches
-        data_to_be_processed = self.prepare_data_for_processing()
-        well_known_text_data = self.process_data(data_to_be_processed)
+        if self.vectorized:
+            self.insert_vectorized_polygons()
+        else:
+            # Processing data in batches
+            data_to_be_processed = self.prepare_data_for_processing()
+            well_known_text_data = self.process_data(data_to_be_processed)
 
-        self.process_data_in_batches(well_known_text_data)
-        arcpy.Delete_management(
-            f"{self.IN_MEMORY_WORKSPACE}/{self.TEMPORARY_FEATURE_CLASS_NAME}"
-        )
+            self.process_data_in_batches(well_known_text_data)
+            arcpy.Delete_management(
+                f"{self.IN_MEMORY_WORKSPACE}/{self.TEMPORARY_FEATURE_CLASS_NAME}"
+            )
 
         print("starting adding fields with join")
 
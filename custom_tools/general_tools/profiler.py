@@ -0,0 +1,385 @@
+import csv
+import glob
+import inspect
+import json
+import os
+import time
+import uuid
+from functools import wraps
+
+import config
+from file_manager.n100.file_manager_buildings import Building_N100
+
+# Set enable_profiling = True in config to record spans
+PROFILING_ENABLED = getattr(config, "enable_profiling", False)
+
+# Worker processes inherit the run id through the environment, so all their spans end up in the
+# directory of the run that started them
+RUN_ID_VARIABLE = "N100_PROFILING_RUN_ID"
+
+_span_stack = []
+
+
+def run_id() -> str:
+    """
+    Returns the id of the current run, creating it on the first call. Call it before starting
+    worker processes, so they inherit the id instead of creating their own.
+    """
+    if RUN_ID_VARIABLE not in os.environ:
+        os.environ[RUN_ID_VARIABLE] = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    return os.environ[RUN_ID_VARIABLE]
+
+
+def run_directory() -> str:
+    return os.path.join(Building_N100.overview__profiling__n100.value, run_id())
+
+
+def peak_rss_bytes():
+    """
+    Returns the peak resident memory of the process, or None if it cannot be measured.
+    """
+    try:
+        import resource
+
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        # The resource module is not available on Windows, where psutil reports the peak working set
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)
+    except ImportError:
+        return None
+
+
+def count_features(dataset):
+    """
+    Counts the features of a dataset, or returns None if it cannot be counted.
+    """
+    if not isinstance(dataset, str):
+        return None
+    try:
+        import arcpy
+
+        if not arcpy.Exists(dataset):
+            return None
+        return int(arcpy.management.GetCount(dataset)[0])
+    except Exception:
+        return None
+
+
+def count_datasets(datasets) -> dict:
+    return {str(dataset): count_features(dataset) for dataset in datasets}
+
+
+class span:
+    """
+    Records the wall time, CPU time, peak memory and feature counts of a block of code as a span.
+    Spans opened inside another span are recorded as its children. Each process appends its spans
+    as JSON lines to its own file in the directory of the run, so parallel processes never
+    overwrite each other. Does nothing unless profiling is enabled.
+
+    Example:
+        >>> with profiler.span("aggregate_polygons", inputs=[input_path]) as current_span:
+        ...     arcpy.cartography.AggregatePolygons(input_path, output_path, ...)
+        ...     current_span.outputs = [output_path]
+    """
+
+    def __init__(self, name, category="function", inputs=None, outputs=None, **attributes):
+        self.name = name
+        self.category = category
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        self.attributes = attributes
+
+    def __enter__(self):
+        if not PROFILING_ENABLED:
+            return self
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = _span_stack[-1].span_id if _span_stack else None
+        self.input_features = count_datasets(self.inputs)
+        _span_stack.append(self)
+        self.start_time = time.time()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if not PROFILING_ENABLED:
+            return False
+        wall_seconds = time.perf_counter() - self.start_wall
+        cpu_seconds = time.process_time() - self.start_cpu
+        _span_stack.pop()
+
+        record = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "pid": os.getpid(),
+            "start_time": self.start_time,
+            "wall_seconds": wall_seconds,
+            "cpu_seconds": cpu_seconds,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "input_features": self.input_features,
+            "output_features": count_datasets(self.outputs),
+            "error": None if exception_type is None else exception_type.__name__,
+        }
+        record.update(self.attributes)
+
+        directory = run_directory()
+        os.makedirs(directory, exist_ok=True)
+        with open(
+            os.path.join(directory, f"spans_{os.getpid()}.jsonl"), "a", encoding="utf-8"
+        ) as file:
+            file.write(json.dumps(record, default=str) + "\n")
+        return False
+
+
+def annotate(**attributes):
+    """
+    Adds attributes, such as the tool a function ran, to the innermost open span.
+    """
+    if PROFILING_ENABLED and _span_stack:
+        _span_stack[-1].attributes.update(attributes)
+
+
+def profile(category="function"):
+    """
+    Records each call of the decorated function as a span. For functions decorated with
+    partition_io_decorator, the datasets passed to the input and output parameters are counted.
+    """
+
+    def decorator(func):
+        name = f"{func.__module__.split('.')[-1]}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILING_ENABLED:
+                return func(*args, **kwargs)
+
+            inputs, outputs = [], []
+            metadata = getattr(func, "_partition_io_metadata", None)
+            if metadata is not None:
+                arguments = inspect.signature(func).bind_partial(*args, **kwargs).arguments
+                inputs = [
+                    arguments[parameter]
+                    for parameter in metadata["inputs"] or []
+                    if parameter in arguments
+                ]
+                outputs = [
+                    arguments[parameter]
+                    for parameter in metadata["outputs"] or []
+                    if parameter in arguments
+                ]
+
+            with span(name, category, inputs=inputs, outputs=outputs):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def read_spans(directory=None) -> list:
+    """
+    Reads the spans of all processes of a run, by default the current run.
+    """
+    spans = []
+    for path in sorted(glob.glob(os.path.join(directory or run_directory(), "spans_*.jsonl"))):
+        with open(path, "r", encoding="utf-8") as file:
+            spans.extend(json.loads(line) for line in file if line.strip())
+    return spans
+
+
+def write_chrome_trace(directory=None) -> str:
+    """
+    Writes the spans of a run in the Chrome trace format, viewable in chrome://tracing or Perfetto.
+
+    Returns:
+        str: The path to the trace file.
+    """
+    directory = directory or run_directory()
+    events = [
+        {
+            "name": record["name"],
+            "cat": record["category"],
+            "ph": "X",
+            "ts": record["start_time"] * 1e6,
+            "dur": record["wall_seconds"] * 1e6,
+            "pid": record["pid"],
+            "tid": record["pid"],
+            "args": {
+                key: value
+                for key, value in record.items()
+                if key not in ("name", "category", "start_time", "wall_seconds", "pid")
+            },
+        }
+        for record in read_spans(directory)
+    ]
+    trace_path = os.path.join(directory, "trace.json")
+    with open(trace_path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    return trace_path
+
+
+def write_summary(directory=None, top: int = 25) -> str:
+    """
+    Summarizes the spans of a run by name, with the number of calls, the total and self wall time
+    (excluding time spent in child spans), the CPU time and the highest peak memory. The summary
+    is written as CSV and the spans with the most self time are printed.
+
+    Returns:
+        str: The path to the summary file.
+    """
+    directory = directory or run_directory()
+    spans = read_spans(directory)
+
+    child_seconds = {}
+    for record in spans:
+        if record["parent_id"] is not None:
+            child_seconds[record["parent_id"]] = (
+                child_seconds.get(record["parent_id"], 0.0) + record["wall_seconds"]
+            )
+
+    summary = {}
+    for record in spans:
+        row = summary.setdefault(
+            record["name"],
+            {
+                "name": record["name"],
+                "category": record["category"],
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "self_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "peak_rss_bytes": 0,
+            },
+        )
+        row["calls"] += 1
+        row["wall_seconds"] += record["wall_seconds"]
+        row["self_seconds"] += record["wall_seconds"] - child_seconds.get(
+            record["span_id"], 0.0
+        )
+        row["cpu_seconds"] += record["cpu_seconds"]
+        row["peak_rss_bytes"] = max(row["peak_rss_bytes"], record["peak_rss_bytes"] or 0)
+
+    rows = sorted(summary.values(), key=lambda row: row["self_seconds"], reverse=True)
+    summary_path = os.path.join(directory, "summary.csv")
+    with open(summary_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(
+            file,
+            fieldnames=[
+                "name",
+                "category",
+                "calls",
+                "wall_seconds",
+                "self_seconds",
+                "cpu_seconds",
+                "peak_rss_bytes",
+            ],
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"{'Name'.ljust(70)} {'Calls':>7} {'Self (s)':>10} {'Wall (s)':>10} {'CPU (s)':>10}")
+    for row in rows[:top]:
+        print(
+            f"{row['name'][:70].ljust(70)} {row['calls']:>7} {row['self_seconds']:>10.2f} "
+            f"{row['wall_seconds']:>10.2f} {row['cpu_seconds']:>10.2f}"
+        )
+    return summary_path
+
+
+def write_selection_table(directory=None) -> str:
+    """
+    Aggregates the selection calls of a run, the spans annotated with the tool they ran, by
+    function, input and query. Each row has the number of calls, the time spent, the total and
+    selected feature counts, and how many calls selected nothing or everything, so expensive
+    selections that do not filter anything stand out. Sorted by time spent.
+
+    Returns:
+        str: The path to the selection table.
+    """
+    directory = directory or run_directory()
+
+    table = {}
+    for record in read_spans(directory):
+        if "tool" not in record:
+            continue
+        total_features = record["input_features"].get(str(record.get("input_layer")))
+        selected_features = sum(
+            count for count in record["output_features"].values() if count is not None
+        )
+        key = (
+            record["name"],
+            record["tool"],
+            str(record.get("input_layer")),
+            str(record.get("query")),
+        )
+        row = table.setdefault(
+            key,
+            {
+                "name": record["name"],
+                "tool": record["tool"],
+                "input_layer": key[2],
+                "query": key[3],
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "total_features": 0,
+                "selected_features": 0,
+                "empty_selections": 0,
+                "full_selections": 0,
+                "errors": 0,
+            },
+        )
+        row["calls"] += 1
+        row["wall_seconds"] += record["wall_seconds"]
+        if record["error"] is not None:
+            row["errors"] += 1
+            continue
+        row["selected_features"] += selected_features
+        if total_features is not None:
+            row["total_features"] += total_features
+            row["full_selections"] += selected_features == total_features > 0
+        row["empty_selections"] += selected_features == 0
+
+    rows = sorted(table.values(), key=lambda row: row["wall_seconds"], reverse=True)
+    table_path = os.path.join(directory, "selections.csv")
+    with open(table_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(
+            file,
+            fieldnames=[
+                "name",
+                "tool",
+                "input_layer",
+                "query",
+                "calls",
+                "wall_seconds",
+                "total_features",
+                "selected_features",
+                "empty_selections",
+                "full_selections",
+                "errors",
+            ],
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+    return table_path
+
+
+def write_reports(directory=None):
+    """
+    Writes the Chrome trace, the summary and the selection table of a run, if profiling is
+    enabled.
+    """
+    if not PROFILING_ENABLED:
+        return
+    trace_path = write_chrome_trace(directory)
+    summary_path = write_summary(directory)
+    selection_table_path = write_selection_table(directory)
+    print(f"Profiling trace written to {trace_path}")
+    print(f"Profiling summary written to {summary_path}")
+    print(f"Selection table written to {selection_table_path}")
@@ -0,0 +1,337 @@
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import shutil
+import sys
+
+import arcpy
+
+from custom_tools.general_tools.pipeline_scheduler import stage_io, stage_name
+
+
+# Modules holding settings, constants and paths rather than code. Their source is not hashed,
+# instead each stage is keyed on the values it references from them, so editing one constant only
+# invalidates the stages using it
+VALUE_PACKAGES = ("config", "constants", "file_manager", "input_data")
+
+# Packages whose referenced values are paths to source data read directly by the stages
+SOURCE_DATA_PACKAGES = ("input_data",)
+
+REPOSITORY_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def top_package(module_name: str) -> str:
+    return module_name.split(".")[0]
+
+
+def is_repository_module(module) -> bool:
+    path = getattr(module, "__file__", None)
+    return path is not None and os.path.abspath(path).startswith(REPOSITORY_ROOT + os.sep)
+
+
+def module_source(module) -> str:
+    # inspect.getsource fails on empty modules, such as most __init__ files
+    with open(module.__file__, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def imported_modules(module) -> list:
+    """
+    Returns the already imported modules named by the import statements of a module, including
+    imports inside functions.
+    """
+    names = []
+    for node in ast.walk(ast.parse(module_source(module))):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = importlib.util.resolve_name(
+                "." * node.level + (node.module or ""), module.__package__
+            )
+            names.append(base)
+            names.extend(f"{base}.{alias.name}" for alias in node.names)
+    return [sys.modules[name] for name in names if name in sys.modules]
+
+
+def stage_modules(stage) -> list:
+    """
+    Returns the module defining a stage and the repository modules it imports, directly or
+    through other repository modules, except the modules of VALUE_PACKAGES.
+    """
+    stack = [inspect.getmodule(stage)]
+    modules = {}
+    while stack:
+        module = stack.pop()
+        if module.__name__ in modules:
+            continue
+        modules[module.__name__] = module
+        stack.extend(
+            imported
+            for imported in imported_modules(module)
+            if is_repository_module(imported)
+            and top_package(imported.__name__) not in VALUE_PACKAGES
+        )
+    return [modules[name] for name in sorted(modules)]
+
+
+def referenced_values(module) -> tuple:
+    """
+    Collects the values a module references as name.attribute from the modules and classes of
+    VALUE_PACKAGES, such as N100_Values.buffer_clearance_distance_m, config.scale_n100 or
+    input_n50.Grunnriss. File manager entries are left out, as they are the declared stage inputs
+    and outputs.
+
+    Returns:
+        tuple: The referenced parameters as a dict of their representation by qualified name, and
+        the set of referenced source data paths.
+    """
+    parameters = {}
+    source_data = set()
+    for node in ast.walk(ast.parse(module_source(module))):
+        if not (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)):
+            continue
+        owner = module.__dict__.get(node.value.id)
+        if inspect.ismodule(owner):
+            owner_name = owner.__name__
+        elif inspect.isclass(owner):
+            owner_name = f"{owner.__module__}.{owner.__qualname__}"
+        else:
+            continue
+        package = top_package(owner_name)
+        if package not in VALUE_PACKAGES or package == "file_manager":
+            continue
+        if not hasattr(owner, node.attr):
+            continue
+
+        value = getattr(owner, node.attr)
+        value = getattr(value, "value", value)
+        if package in SOURCE_DATA_PACKAGES:
+            if isinstance(value, str):
+                source_data.add(value)
+        elif not callable(value):
+            parameters[f"{owner_name}.{node.attr}"] = repr(value)
+    return parameters, source_data
+
+
+def dataset_fingerprint(path: str) -> str:
+    """
+    Fingerprints a dataset by its content. Feature classes and tables are fingerprinted by their
+    row count, extent, schema and a checksum of their geometries and attributes, other files by a
+    checksum of their bytes.
+
+    Returns:
+        str: The fingerprint, or "missing" if the dataset does not exist.
+    """
+    if not arcpy.Exists(path):
+        return "missing"
+
+    checksum = hashlib.sha256()
+    if os.path.isfile(path):
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    description = arcpy.Describe(path)
+    fields = [
+        field
+        for field in arcpy.ListFields(path)
+        if field.type not in ("OID", "Geometry", "GlobalID")
+        and field.name.lower() not in ("shape_length", "shape_area")
+    ]
+    checksum.update(
+        repr([(field.name, field.type, field.length) for field in fields]).encode()
+    )
+
+    cursor_fields = [field.name for field in fields]
+    if getattr(description, "shapeType", None):
+        extent = description.extent
+        checksum.update(
+            repr(
+                (
+                    description.shapeType,
+                    description.spatialReference.factoryCode,
+                    extent.XMin,
+                    extent.YMin,
+                    extent.XMax,
+                    extent.YMax,
+                )
+            ).encode()
+        )
+        cursor_fields.append("SHAPE@WKB")
+
+    row_count = 0
+    with arcpy.da.SearchCursor(
+        path, cursor_fields, sql_clause=(None, f"ORDER BY {description.OIDFieldName}")
+    ) as cursor:
+        for row in cursor:
+            row_count += 1
+            checksum.update(repr(row[: len(fields)]).encode())
+            if len(row) > len(fields) and row[-1] is not None:
+                checksum.update(bytes(row[-1]))
+    checksum.update(str(row_count).encode())
+    return checksum.hexdigest()
+
+
+def source_data_fingerprint(path: str) -> str:
+    """
+    Fingerprints a source dataset, such as an N50 or N100 feature class, without reading its rows,
+    which would take long for the national datasets. The fingerprint covers the schema, row count
+    and extent, and the latest modification time of the files of its file geodatabase, which any
+    edit to the geodatabase updates. Other files are fingerprinted by a checksum of their bytes.
+
+    Returns:
+        str: The fingerprint, or "missing" if the dataset does not exist.
+    """
+    if os.path.isfile(path) or not arcpy.Exists(path):
+        return dataset_fingerprint(path)
+
+    description = arcpy.Describe(path)
+    summary = [
+        [(field.name, field.type, field.length) for field in arcpy.ListFields(path)],
+        int(arcpy.management.GetCount(path)[0]),
+    ]
+    if getattr(description, "shapeType", None):
+        extent = description.extent
+        summary.append(
+            (
+                description.shapeType,
+                description.spatialReference.factoryCode,
+                extent.XMin,
+                extent.YMin,
+                extent.XMax,
+                extent.YMax,
+            )
+        )
+
+    workspace = path
+    while not workspace.lower().endswith(".gdb") and os.path.dirname(workspace) != workspace:
+        workspace = os.path.dirname(workspace)
+    if workspace.lower().endswith(".gdb") and os.path.isdir(workspace):
+        summary.append(max(entry.stat().st_mtime_ns for entry in os.scandir(workspace)))
+
+    return hashlib.sha256(repr(summary).encode()).hexdigest()
+
+
+class StageCache:
+    """
+    Skips pipeline stages whose inputs, parameters and code are unchanged since they last ran.
+
+    Each stage is keyed on the fingerprints of the input datasets it declares with
+    stage_io_decorator, the source of its module and the repository modules it imports, and the
+    constants, config settings and source data it references, such as N100_Values members or
+    input_n50 paths. After a stage runs, its declared outputs are copied to a cache geodatabase
+    and its key is written to a JSON manifest. When the key of a stage matches the manifest, its
+    outputs are restored from the cache instead of running it.
+    """
+
+    def __init__(self, cache_directory: str):
+        """
+        Args:
+            cache_directory (str): The directory holding the cache geodatabase and manifest.
+        """
+        self.cache_directory = cache_directory
+        self.cache_gdb = os.path.join(cache_directory, "stage_cache.gdb")
+        self.manifest_path = os.path.join(cache_directory, "stage_cache_manifest.json")
+        # Source data does not change during a run, so each dataset is fingerprinted once
+        self.source_data_fingerprints = {}
+
+        os.makedirs(cache_directory, exist_ok=True)
+        if not arcpy.Exists(self.cache_gdb):
+            arcpy.management.CreateFileGDB(cache_directory, "stage_cache.gdb")
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                self.manifest = json.load(file)
+
+    def stage_key(self, stage, inputs) -> str:
+        sources = {}
+        parameters = {}
+        source_data = set()
+        for module in stage_modules(stage):
+            sources[module.__name__] = hashlib.sha256(
+                module_source(module).encode()
+            ).hexdigest()
+            module_parameters, module_source_data = referenced_values(module)
+            parameters.update(module_parameters)
+            source_data |= module_source_data
+
+        for path in source_data - self.source_data_fingerprints.keys():
+            self.source_data_fingerprints[path] = source_data_fingerprint(path)
+
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "inputs": {path: dataset_fingerprint(path) for path in inputs},
+                    "parameters": parameters,
+                    "sources": sources,
+                    "source_data": {
+                        path: self.source_data_fingerprints[path] for path in source_data
+                    },
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    def cached_path(self, output: str) -> str:
+        if os.path.splitext(output)[1]:
+            return os.path.join(self.cache_directory, os.path.basename(output))
+        return os.path.join(self.cache_gdb, os.path.basename(output))
+
+    @staticmethod
+    def copy_dataset(source: str, destination: str):
+        if os.path.isfile(source):
+            shutil.copyfile(source, destination)
+            return
+        if arcpy.Exists(destination):
+            arcpy.management.Delete(destination)
+        arcpy.management.Copy(source, destination)
+
+    def run(self, stage) -> dict:
+        """
+        Runs a stage, or restores its outputs from the cache if its key is unchanged. Stages that
+        do not declare their inputs and outputs always run.
+
+        Returns:
+            dict: The manifest entry of the stage, to be stored with record.
+        """
+        name = stage_name(stage)
+        io = stage_io(stage)
+        if io is None:
+            stage()
+            return None
+        inputs, outputs = io
+
+        key = self.stage_key(stage, inputs)
+        entry = self.manifest.get(name)
+        if (
+            entry is not None
+            and entry["key"] == key
+            and all(arcpy.Exists(self.cached_path(output)) for output in outputs)
+        ):
+            for output in outputs:
+                self.copy_dataset(self.cached_path(output), output)
+            print(f"Restored the outputs of {name} from the stage cache")
+            return entry
+
+        stage()
+        for output in outputs:
+            if arcpy.Exists(output):
+                self.copy_dataset(output, self.cached_path(output))
+        return {"key": key, "outputs": sorted(outputs)}
+
+    def record(self, stage, entry: dict):
+        """
+        Stores the manifest entry returned by run. Kept apart from run so stages running in worker
+        processes do not write the manifest concurrently.
+        """
+        if entry is None:
+            return
+        self.manifest[stage_name(stage)] = entry
+        with open(self.manifest_path, "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, indent=2, sort_keys=True)
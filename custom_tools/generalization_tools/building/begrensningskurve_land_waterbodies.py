@@ -1,4 +1,5 @@
 import arcpy
+import os
 
 
 from input_data import input_n100
@@ -55,7 +56,7 @@ class BegrensningskurveLandWaterbodies:
 
     def reset_temp_files(self):
         """Reset temporary file attributes."""
-        unique_id = id(self)
+        unique_id = f"{os.getpid()}_{id(self)}"
         temporary_file = "in_memory\\"
         permanent_file = f"{self.root_file}_"
         if self.root_file is None:
@@ -1,6 +1,7 @@
 import arcpy
+import os
 import math
-from typing import Union, List, Dict, Tuple
+from typing import Union, List, Dict, Tuple, Literal
 
 from env_setup import environment_setup
 from constants.n100_constants import N100_Symbology, N100_SQLResources, N100_Values
@@ -9,6 +10,9 @@ from input_data import input_n100
 from custom_tools.general_tools import custom_arcpy
 from custom_tools.general_tools.line_to_buffer_symbology import LineToBufferSymbology
 from custom_tools.general_tools.polygon_processor import PolygonProcessor
+from custom_tools.generalization_tools.building.buffer_increments import (
+    calculate_buffer_increments,
+)
 from custom_tools.decorators.partition_io_decorator import partition_io_decorator
 
 
@@ -25,7 +29,27 @@ class BufferDisplacement:
         input_misc_objects: Dict[str, List[Union[str, int]]] = None,
         write_work_files_to_memory: bool = True,
         keep_work_files: bool = False,
+        incremental: bool = False,
+        geometry_backend: Literal["arcpy", "shapely"] = "arcpy",
     ):
+        """
+        Displaces building points away from roads and other barriers by erasing the building symbols
+        with gradually larger barrier buffers.
+
+        :param input_road_lines: Path to the input road lines.
+        :param input_building_points: Path to the building points to displace.
+        :param output_building_points: Path to save the displaced building points.
+        :param sql_selection_query: Dictionary containing SQL queries and associated road buffer widths.
+        :param root_file: Base path for work files.
+        :param buffer_displacement_meter: The clearance added to the barriers in the last increments.
+        :param building_symbol_dimensions: Dictionary mapping symbol values to building symbol dimensions.
+        :param input_misc_objects: Dictionary mapping names to other barriers and their buffer widths.
+        :param incremental: If True, the building points and barriers that can interact are selected
+            once before the increments. Each increment then only buffers the barriers near building
+            points, and only reprocesses the building points its barrier can reach.
+        :param geometry_backend: "arcpy" runs the geoprocessing tools, "shapely" runs the same displacement
+            with vectorized shapely operations through ShapelyBufferDisplacement, which does not need ArcGIS.
+        """
         self.input_road_lines = input_road_lines
         self.input_building_points = input_building_points
         self.sql_selection_query = sql_selection_query
@@ -37,6 +61,13 @@ class BufferDisplacement:
 
         self.write_work_files_to_memory = write_work_files_to_memory
         self.keep_work_files = keep_work_files
+        self.incremental = incremental
+        self.geometry_backend = geometry_backend
+
+        self.barrier_road_lines = self.input_road_lines
+        self.barrier_misc_objects = self.input_misc_objects
+        self.maximum_building_half_diagonal = None
+        self.unaffected_building_points = None
 
         self.buffer_displacement_meter = buffer_displacement_meter
         self.building_symbol_dimensions = building_symbol_dimensions
@@ -46,14 +77,10 @@ class BufferDisplacement:
         self.maximum_buffer_increase_tolerance = None
         self.tolerance = None
         self.target_value = None
-        self.previous_value = 0
-        self.current_value = 0
-        self.rest_value = 0
-        self.iteration_fixed_buffer_addition = 0
         self.increments = []
 
         self.file_location = None
-        self.unique_id = id(self)
+        self.unique_id = f"{os.getpid()}_{id(self)}"
 
         self.output_road_buffer = None
         self.misc_buffer_output = None
@@ -105,68 +132,154 @@ class BufferDisplacement:
         self.target_value = self.largest_road_dimension + buffer_displacement_meter
 
     def calculate_buffer_increments(self):
-        iteration_buffer_factor = 0
-
-        found_valid_increment = False
-
-        while iteration_buffer_factor < 1:
-            next_buffer_factor = iteration_buffer_factor + 0.001
-
-            if not found_valid_increment:
-                increment_value = next_buffer_factor * self.largest_road_dimension
-            else:
-                increment_value = (
-                    next_buffer_factor * self.largest_road_dimension
-                ) - self.previous_value
-
-            if increment_value >= self.tolerance:
-                if not found_valid_increment:
-                    iteration_buffer_factor = next_buffer_factor - 0.001
-                iteration_buffer_factor = round(iteration_buffer_factor, 3)
-                self.increments.append((iteration_buffer_factor, 0))
-                self.current_value = (
-                    iteration_buffer_factor * self.largest_road_dimension
-                )
-                self.previous_value = self.current_value
-                found_valid_increment = True
-                iteration_buffer_factor = next_buffer_factor
-
-                continue
+        self.increments = calculate_buffer_increments(
+            largest_road_dimension=self.largest_road_dimension,
+            tolerance=self.tolerance,
+            buffer_displacement_meter=self.buffer_displacement_meter,
+        )
 
-            iteration_buffer_factor = next_buffer_factor
-            self.current_value = iteration_buffer_factor * self.largest_road_dimension
+        print(self.increments)
 
-        if self.previous_value != self.current_value:
-            self.current_value = self.largest_road_dimension
-            increase_from_last_cleanup = self.current_value - self.previous_value
+        return self.increments
 
-            self.rest_value = self.tolerance - increase_from_last_cleanup
+    @staticmethod
+    def calculate_barrier_distance(
+        buffer_width, factor: Union[int, float], fixed_addition: Union[int, float]
+    ):
+        """
+        Calculates the buffer distance of a barrier for an increment.
+        """
+        if buffer_width == 0:
+            return 0.1
+        return (buffer_width * factor) + fixed_addition
 
-            self.rest_value = round(self.rest_value, 1)
-            self.increments.append((1, self.rest_value))
-            self.current_value = self.rest_value
-        else:
-            self.current_value = 0
+    def prepare_incremental_barriers(self):
+        """
+        Selects the building points within reach of any barrier at the largest increment, and the
+        barriers that can reach those building points. Building points outside the reach are never
+        displaced, so they are left out of the increments. Each increment can move a point at most
+        the largest building half diagonal, so after all increments a point is within that distance
+        times the number of increments of its original position. Barriers beyond the reach plus
+        this displacement never displace anything and are left out as well.
+        """
+        self.maximum_building_half_diagonal = max(
+            math.hypot(width, height) / 2
+            for width, height in self.building_symbol_dimensions.values()
+        )
+        barrier_widths = list(self.sql_selection_query.values()) + [
+            buffer_width for _, buffer_width in self.input_misc_objects.values()
+        ]
+        maximum_barrier_distance = max(
+            self.calculate_barrier_distance(buffer_width, factor, fixed_addition)
+            for buffer_width in barrier_widths
+            for factor, fixed_addition in self.increments
+        )
+        reach_distance = maximum_barrier_distance + self.maximum_building_half_diagonal
+        reach = f"{reach_distance} Meters"
+        # Barriers must also cover the positions the points can be displaced to
+        maximum_displacement = len(self.increments) * self.maximum_building_half_diagonal
+        barrier_reach = f"{reach_distance + maximum_displacement} Meters"
+
+        barrier_sources = [self.input_road_lines] + [
+            feature_path for feature_path, _ in self.input_misc_objects.values()
+        ]
+        building_points_layer = f"incremental_building_points__{self.unique_id}"
+        arcpy.management.MakeFeatureLayer(
+            self.input_building_points, building_points_layer
+        )
+        for index, barrier_source in enumerate(barrier_sources):
+            arcpy.management.SelectLayerByLocation(
+                in_layer=building_points_layer,
+                overlap_type="WITHIN_A_DISTANCE",
+                select_features=barrier_source,
+                search_distance=reach,
+                selection_type="NEW_SELECTION" if index == 0 else "ADD_TO_SELECTION",
+            )
+
+        affected_building_points = (
+            f"{self.root_file}_affected_building_points__{self.unique_id}"
+        )
+        self.working_files_list_2.append(affected_building_points)
+        arcpy.management.CopyFeatures(building_points_layer, affected_building_points)
 
-        self.target_value = self.buffer_displacement_meter
+        arcpy.management.SelectLayerByAttribute(
+            building_points_layer, selection_type="SWITCH_SELECTION"
+        )
+        self.unaffected_building_points = (
+            f"{self.root_file}_unaffected_building_points__{self.unique_id}"
+        )
+        self.working_files_list_2.append(self.unaffected_building_points)
+        arcpy.management.CopyFeatures(
+            building_points_layer, self.unaffected_building_points
+        )
+        arcpy.management.Delete(building_points_layer)
 
-        while self.current_value <= self.target_value:
-            missing_value = self.target_value - self.current_value
+        self.barrier_road_lines = (
+            f"{self.root_file}_barrier_road_lines__{self.unique_id}"
+        )
+        self.working_files_list_2.append(self.barrier_road_lines)
+        custom_arcpy.select_location_and_make_permanent_feature(
+            input_layer=self.input_road_lines,
+            overlap_type=custom_arcpy.OverlapType.WITHIN_A_DISTANCE,
+            select_features=affected_building_points,
+            output_name=self.barrier_road_lines,
+            search_distance=barrier_reach,
+        )
 
-            if missing_value <= self.tolerance:
-                self.increments.append((1, self.buffer_displacement_meter))
+        self.barrier_misc_objects = {}
+        for feature_name, (feature_path, buffer_width) in self.input_misc_objects.items():
+            barrier_misc_object = (
+                f"{self.root_file}_barrier_{feature_name}__{self.unique_id}"
+            )
+            self.working_files_list_2.append(barrier_misc_object)
+            custom_arcpy.select_location_and_make_permanent_feature(
+                input_layer=feature_path,
+                overlap_type=custom_arcpy.OverlapType.WITHIN_A_DISTANCE,
+                select_features=affected_building_points,
+                output_name=barrier_misc_object,
+                search_distance=barrier_reach,
+            )
+            self.barrier_misc_objects[feature_name] = [barrier_misc_object, buffer_width]
+
+        self.current_building_points = affected_building_points
+        print(
+            f"Incremental displacement prepared, building points outside {reach} of the barriers are kept as is."
+        )
 
-                break
+    def split_building_points_by_barrier(self, factor_name, fixed_addition_name):
+        """
+        Splits the current building points into the points whose symbol can intersect the merged
+        barrier of this increment and the points that are out of its reach.
 
-            increment_value = min(self.tolerance, missing_value)
-            self.iteration_fixed_buffer_addition = increment_value + self.current_value
+        Returns:
+            tuple: The building points to process and the building points kept as is.
+        """
+        building_points_layer = f"incremental_increment_points__{self.unique_id}"
+        arcpy.management.MakeFeatureLayer(
+            self.current_building_points, building_points_layer
+        )
+        arcpy.management.SelectLayerByLocation(
+            in_layer=building_points_layer,
+            overlap_type="WITHIN_A_DISTANCE",
+            select_features=self.merged_barrier_output,
+            search_distance=f"{self.maximum_building_half_diagonal} Meters",
+        )
 
-            self.increments.append((1, self.iteration_fixed_buffer_addition))
-            self.current_value = self.iteration_fixed_buffer_addition
+        building_points_to_process = f"{self.file_location}_building_points_to_process_factor_{factor_name}_add_{fixed_addition_name}__{self.unique_id}"
+        self.working_files_list.append(building_points_to_process)
+        arcpy.management.CopyFeatures(building_points_layer, building_points_to_process)
 
-        print(self.increments)
+        arcpy.management.SelectLayerByAttribute(
+            building_points_layer, selection_type="SWITCH_SELECTION"
+        )
+        building_points_out_of_reach = f"{self.file_location}_building_points_out_of_reach_factor_{factor_name}_add_{fixed_addition_name}__{self.unique_id}"
+        self.working_files_list.append(building_points_out_of_reach)
+        arcpy.management.CopyFeatures(
+            building_points_layer, building_points_out_of_reach
+        )
+        arcpy.management.Delete(building_points_layer)
 
-        return self.increments
+        return building_points_to_process, building_points_out_of_reach
 
     def process_buffer_factor(
         self, factor: Union[int, float], fixed_addition: Union[int, float]
@@ -181,7 +294,7 @@ class BufferDisplacement:
         self.working_files_list.append(self.output_road_buffer)
 
         line_to_buffer_symbology = LineToBufferSymbology(
-            input_road_lines=self.input_road_lines,
+            input_road_lines=self.barrier_road_lines,
             sql_selection_query=self.sql_selection_query,
             output_road_buffer=self.output_road_buffer,
             root_file=self.root_file,
@@ -189,12 +302,13 @@ class BufferDisplacement:
             fixed_buffer_addition=fixed_addition,
             keep_work_files=self.keep_work_files,
             write_work_files_to_memory=self.write_work_files_to_memory,
+            single_pass=True,
         )
         line_to_buffer_symbology.run()
 
         misc_buffer_outputs = []
 
-        for feature_name, feature_details in self.input_misc_objects.items():
+        for feature_name, feature_details in self.barrier_misc_objects.items():
             feature_path, buffer_width = feature_details
             calculated_buffer_width = (buffer_width * factor) + fixed_addition
             self.misc_buffer_output = f"{self.file_location}_{feature_name}_buffer_factor_{factor_name}_add_{fixed_addition_name}__{self.unique_id}"
@@ -222,15 +336,24 @@ class BufferDisplacement:
             output=self.merged_barrier_output,
         )
 
+        building_points_to_process = self.current_building_points
+        building_points_out_of_reach = None
+        if self.incremental:
+            building_points_to_process, building_points_out_of_reach = (
+                self.split_building_points_by_barrier(factor_name, fixed_addition_name)
+            )
+
         self.output_building_points_to_polygon = f"{self.root_file}_building_factor_{factor_name}_add_{fixed_addition_name}__{self.unique_id}"
         self.working_files_list.append(self.output_building_points_to_polygon)
 
         building_polygons = PolygonProcessor(
-            input_building_points=self.current_building_points,
+            input_building_points=building_points_to_process,
             output_polygon_feature_class=self.output_building_points_to_polygon,
             building_symbol_dimensions=self.building_symbol_dimensions,
             symbol_field_name="symbol_val",
             index_field_name="OBJECTID",
+            vectorized=True,
+            carry_attributes=True,
         )
         building_polygons.run()
 
@@ -252,7 +375,17 @@ class BufferDisplacement:
             point_location="INSIDE",
         )
 
-        self.current_building_points = self.output_feature_to_points
+        if building_points_out_of_reach is None:
+            self.current_building_points = self.output_feature_to_points
+            return
+
+        merged_building_points = f"{self.root_file}_merged_building_points_factor_{factor_name}_add_{fixed_addition_name}__{self.unique_id}"
+        self.working_files_list_2.append(merged_building_points)
+        arcpy.management.Merge(
+            inputs=[self.output_feature_to_points, building_points_out_of_reach],
+            output=merged_building_points,
+        )
+        self.current_building_points = merged_building_points
 
     def delete_working_files(self, *file_paths):
         """
@@ -270,6 +403,22 @@ class BufferDisplacement:
         if arcpy.Exists(feature_class_path):
             arcpy.management.Delete(feature_class_path)
 
+    def run_shapely_backend(self):
+        # Imported here so the arcpy backend does not require geopandas
+        from custom_tools.generalization_tools.building.buffer_displacement_shapely import (
+            ShapelyBufferDisplacement,
+        )
+
+        ShapelyBufferDisplacement(
+            input_road_lines=self.input_road_lines,
+            input_building_points=self.input_building_points,
+            output_building_points=self.output_building_points,
+            sql_selection_query=self.sql_selection_query,
+            buffer_displacement_meter=self.buffer_displacement_meter,
+            building_symbol_dimensions=self.building_symbol_dimensions,
+            input_misc_objects=self.input_misc_objects,
+        ).run()
+
     @partition_io_decorator(
         input_param_names=[
             "input_road_lines",
@@ -279,9 +428,15 @@ class BufferDisplacement:
         output_param_names=["output_building_points"],
     )
     def run(self):
+        if self.geometry_backend == "shapely":
+            self.run_shapely_backend()
+            return
+
         self.initialize_work_file_location()
         self.finding_dimensions(self.buffer_displacement_meter)
         self.calculate_buffer_increments()
+        if self.incremental:
+            self.prepare_incremental_barriers()
 
         for factor, addition in self.increments:
             self.process_buffer_factor(factor, addition)
@@ -289,12 +444,19 @@ class BufferDisplacement:
             if not self.keep_work_files:
                 self.delete_working_files(*self.working_files_list)
 
-        arcpy.management.Copy(
-            in_data=self.current_building_points,
-            out_data=self.output_building_points,
-        )
+        if self.incremental:
+            arcpy.management.Merge(
+                inputs=[self.current_building_points, self.unaffected_building_points],
+                output=self.output_building_points,
+            )
+        else:
+            arcpy.management.Copy(
+                in_data=self.current_building_points,
+                out_data=self.output_building_points,
+            )
         if not self.keep_work_files:
             self.delete_working_files(*self.working_files_list_2)
+            LineToBufferSymbology.clear_road_class_cache()
 
 
 if __name__ == "__main__":
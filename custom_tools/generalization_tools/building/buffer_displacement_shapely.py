@@ -0,0 +1,247 @@
+import numpy as np
+import geopandas as gpd
+import shapely
+from typing import Union, List, Dict, Tuple
+
+from custom_tools.general_tools.geodataframe_io import read_features, write_features
+from custom_tools.generalization_tools.building.buffer_increments import (
+    calculate_buffer_increments,
+    find_buffer_tolerance,
+)
+
+
+class ShapelyBufferDisplacement:
+    """
+    The shapely geometry backend of BufferDisplacement. It displaces building points the same way as
+    the arcpy backend, by erasing the building symbols with gradually larger barrier buffers and
+    moving each point inside what is left of its symbol, but uses vectorized shapely operations on
+    GeoDataFrames so it runs without ArcGIS.
+
+    The arcpy tools map to shapely as follows: PairwiseBuffer to shapely.buffer, Merge and Erase to
+    shapely.difference against the union of the barriers intersecting each symbol, and FeatureToPoint
+    with INSIDE to shapely.point_on_surface.
+    """
+
+    def __init__(
+        self,
+        input_road_lines: str,
+        input_building_points: str,
+        output_building_points: str,
+        sql_selection_query: dict,
+        buffer_displacement_meter: int = 30,
+        building_symbol_dimensions: Dict[int, Tuple[int, int]] = None,
+        input_misc_objects: Dict[str, List[Union[str, int]]] = None,
+        symbol_field_name: str = "symbol_val",
+    ):
+        """
+        :param input_road_lines: Path to the input road lines.
+        :param input_building_points: Path to the building points to displace.
+        :param output_building_points: Path to save the displaced building points.
+        :param sql_selection_query: Dictionary containing SQL queries and associated road buffer widths.
+        :param buffer_displacement_meter: The clearance added to the barriers in the last increments.
+        :param building_symbol_dimensions: Dictionary mapping symbol values to building symbol dimensions.
+        :param input_misc_objects: Dictionary mapping names to other barriers and their buffer widths.
+        :param symbol_field_name: The field holding the symbol value of the building points.
+        """
+        self.input_road_lines = input_road_lines
+        self.input_building_points = input_building_points
+        self.output_building_points = output_building_points
+        self.sql_selection_query = sql_selection_query
+        self.buffer_displacement_meter = buffer_displacement_meter
+        self.building_symbol_dimensions = building_symbol_dimensions
+        self.input_misc_objects = input_misc_objects or {}
+        self.symbol_field_name = symbol_field_name
+
+        self.increments = calculate_buffer_increments(
+            largest_road_dimension=max(self.sql_selection_query.values()),
+            tolerance=find_buffer_tolerance(self.building_symbol_dimensions),
+            buffer_displacement_meter=self.buffer_displacement_meter,
+        )
+
+    @staticmethod
+    def calculate_barrier_distances(base_widths: np.ndarray, factor, fixed_addition):
+        """
+        Calculates the buffer distance of each barrier for an increment. Barriers with a width of 0
+        are buffered with 0.1 meters, as in the arcpy backend.
+        """
+        return np.where(base_widths == 0, 0.1, base_widths * factor + fixed_addition)
+
+    def classify_road_widths(self, road_lines: gpd.GeoDataFrame) -> np.ndarray:
+        """
+        Assigns each road its symbology buffer width by evaluating each SQL query once with the
+        data source. A road matching several queries gets the largest width, as the merged buffers of
+        the arcpy backend do. Roads matching no query get NaN and are not used as barriers.
+        """
+        road_widths = np.full(len(road_lines), np.nan)
+        for sql_query, width in self.sql_selection_query.items():
+            selected_roads = read_features(
+                self.input_road_lines,
+                where=" ".join(sql_query.split()),
+                columns=[],
+                read_geometry=False,
+            )
+            positions = road_lines.index.get_indexer(selected_roads.index)
+            positions = positions[positions >= 0]
+            road_widths[positions] = np.fmax(road_widths[positions], width)
+        return road_widths
+
+    def create_building_squares(self, building_points: gpd.GeoDataFrame) -> np.ndarray:
+        """
+        Creates the building symbol squares of all points in one vectorized operation.
+        """
+        symbol_values = building_points[self.symbol_field_name].to_numpy()
+        unique_symbol_values, symbol_indices = np.unique(
+            symbol_values, return_inverse=True
+        )
+        half_dimensions = (
+            np.array(
+                [
+                    self.building_symbol_dimensions[symbol_value]
+                    for symbol_value in unique_symbol_values.tolist()
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 2)[symbol_indices]
+            / 2
+        )
+        coordinates = shapely.get_coordinates(building_points.geometry.values)
+        return shapely.box(
+            coordinates[:, 0] - half_dimensions[:, 0],
+            coordinates[:, 1] - half_dimensions[:, 1],
+            coordinates[:, 0] + half_dimensions[:, 0],
+            coordinates[:, 1] + half_dimensions[:, 1],
+        )
+
+    def select_barriers_in_reach(
+        self,
+        barrier_geometries: np.ndarray,
+        barrier_widths: np.ndarray,
+        building_points: gpd.GeoDataFrame,
+    ):
+        """
+        Keeps only the barriers that can reach a building symbol at the largest increment.
+        """
+        maximum_barrier_distance = max(
+            self.calculate_barrier_distances(barrier_widths, factor, fixed_addition).max()
+            for factor, fixed_addition in self.increments
+        )
+        maximum_building_half_diagonal = max(
+            np.hypot(width, height) / 2
+            for width, height in self.building_symbol_dimensions.values()
+        )
+        _, barrier_indices = shapely.STRtree(barrier_geometries).query(
+            building_points.geometry.values,
+            predicate="dwithin",
+            distance=maximum_barrier_distance + maximum_building_half_diagonal,
+        )
+        barrier_indices = np.unique(barrier_indices)
+        return barrier_geometries[barrier_indices], barrier_widths[barrier_indices]
+
+    def process_buffer_factor(
+        self,
+        building_points: gpd.GeoDataFrame,
+        barrier_geometries: np.ndarray,
+        barrier_widths: np.ndarray,
+        factor: Union[int, float],
+        fixed_addition: Union[int, float],
+    ) -> gpd.GeoDataFrame:
+        """
+        Processes a single increment: buffers the barriers, erases them from the building symbols
+        they intersect and moves those points inside what is left of their symbol. Symbols that are
+        erased completely are removed, as Erase does in the arcpy backend.
+        """
+        barriers = shapely.buffer(
+            barrier_geometries,
+            self.calculate_barrier_distances(barrier_widths, factor, fixed_addition),
+        )
+        building_squares = self.create_building_squares(building_points)
+
+        square_indices, barrier_indices = shapely.STRtree(barriers).query(
+            building_squares, predicate="intersects"
+        )
+        if len(square_indices) == 0:
+            return building_points
+
+        order = np.argsort(square_indices, kind="stable")
+        square_indices = square_indices[order]
+        barrier_indices = barrier_indices[order]
+        affected_squares, group_starts = np.unique(square_indices, return_index=True)
+        barrier_groups = np.split(barrier_indices, group_starts[1:])
+
+        barrier_unions = np.array(
+            [shapely.union_all(barriers[group]) for group in barrier_groups],
+            dtype=object,
+        )
+        erased_squares = shapely.difference(
+            building_squares[affected_squares], barrier_unions
+        )
+
+        geometries = building_points.geometry.values.copy()
+        geometries[affected_squares] = shapely.point_on_surface(erased_squares)
+        keep = np.ones(len(building_points), dtype=bool)
+        keep[affected_squares] = ~shapely.is_empty(erased_squares)
+
+        displaced_points = building_points.copy()
+        displaced_points.geometry = geometries
+        return displaced_points[keep]
+
+    def displace(
+        self,
+        building_points: gpd.GeoDataFrame,
+        road_lines: gpd.GeoDataFrame,
+        road_widths: np.ndarray,
+        misc_objects: List[Tuple[gpd.GeoDataFrame, Union[int, float]]],
+    ) -> gpd.GeoDataFrame:
+        """
+        Displaces the building points away from the roads and misc objects through all increments.
+
+        Args:
+            building_points: The building points with a symbol value field.
+            road_lines: The road lines.
+            road_widths: The symbology buffer width of each road, NaN for roads that are not barriers.
+            misc_objects: The misc object features with their buffer width.
+
+        Returns:
+            GeoDataFrame: The displaced building points.
+        """
+        is_barrier_road = ~np.isnan(road_widths)
+        barrier_geometries = np.concatenate(
+            [road_lines.geometry.values[is_barrier_road]]
+            + [np.asarray(features.geometry.values) for features, _ in misc_objects]
+        )
+        barrier_widths = np.concatenate(
+            [road_widths[is_barrier_road]]
+            + [np.full(len(features), width, dtype=np.float64) for features, width in misc_objects]
+        )
+        barrier_geometries = np.asarray(barrier_geometries, dtype=object)
+
+        if len(building_points) == 0 or len(barrier_geometries) == 0:
+            return building_points
+
+        barrier_geometries, barrier_widths = self.select_barriers_in_reach(
+            barrier_geometries, barrier_widths, building_points
+        )
+
+        for factor, fixed_addition in self.increments:
+            building_points = self.process_buffer_factor(
+                building_points, barrier_geometries, barrier_widths, factor, fixed_addition
+            )
+            print(
+                f"Processed buffer factor {factor} with addition {fixed_addition}, {len(building_points)} building points"
+            )
+        return building_points
+
+    def run(self):
+        building_points = read_features(self.input_building_points)
+        road_lines = read_features(self.input_road_lines)
+        road_widths = self.classify_road_widths(road_lines)
+        misc_objects = [
+            (read_features(feature_path), buffer_width)
+            for feature_path, buffer_width in self.input_misc_objects.values()
+        ]
+
+        displaced_building_points = self.displace(
+            building_points, road_lines, road_widths, misc_objects
+        )
+        write_features(displaced_building_points, self.output_building_points)
+        print(f"Output feature class: {self.output_building_points} completed.")
+        return displaced_building_points
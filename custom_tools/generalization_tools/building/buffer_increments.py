@@ -0,0 +1,96 @@
+from typing import Dict, List, Tuple, Union
+
+
+def find_buffer_tolerance(building_symbol_dimensions: Dict[int, Tuple[int, int]]):
+    """
+    Finds the largest buffer increase allowed between two increments, which is just below half the
+    smallest building symbol dimension so no building symbol can be jumped over by a barrier.
+    """
+    if not building_symbol_dimensions:
+        raise ValueError("building_symbol_dimensions is required.")
+
+    smallest_building_dimension = min(
+        min(dimensions) for dimensions in building_symbol_dimensions.values()
+    )
+    return smallest_building_dimension / 2 - 1
+
+
+def calculate_buffer_increments(
+    largest_road_dimension: Union[int, float],
+    tolerance: Union[int, float],
+    buffer_displacement_meter: Union[int, float],
+) -> List[Tuple[Union[int, float], Union[int, float]]]:
+    """
+    Calculates the (buffer factor, fixed addition) increments used to gradually grow the barriers.
+    The buffer factor first grows the road buffers to their symbology width in steps no larger than
+    the tolerance, then the fixed addition grows them by buffer_displacement_meter.
+
+    Args:
+        largest_road_dimension: The largest road buffer width in the road symbology.
+        tolerance: The largest buffer increase allowed between two increments.
+        buffer_displacement_meter: The clearance added to the barriers after the factor reaches 1.
+
+    Returns:
+        list: The increments as (buffer factor, fixed addition) tuples.
+    """
+    increments = []
+    previous_value = 0
+    current_value = 0
+    iteration_buffer_factor = 0
+
+    found_valid_increment = False
+
+    while iteration_buffer_factor < 1:
+        next_buffer_factor = iteration_buffer_factor + 0.001
+
+        if not found_valid_increment:
+            increment_value = next_buffer_factor * largest_road_dimension
+        else:
+            increment_value = (
+                next_buffer_factor * largest_road_dimension
+            ) - previous_value
+
+        if increment_value >= tolerance:
+            if not found_valid_increment:
+                iteration_buffer_factor = next_buffer_factor - 0.001
+            iteration_buffer_factor = round(iteration_buffer_factor, 3)
+            increments.append((iteration_buffer_factor, 0))
+            current_value = iteration_buffer_factor * largest_road_dimension
+            previous_value = current_value
+            found_valid_increment = True
+            iteration_buffer_factor = next_buffer_factor
+
+            continue
+
+        iteration_buffer_factor = next_buffer_factor
+        current_value = iteration_buffer_factor * largest_road_dimension
+
+    if previous_value != current_value:
+        current_value = largest_road_dimension
+        increase_from_last_cleanup = current_value - previous_value
+
+        rest_value = tolerance - increase_from_last_cleanup
+
+        rest_value = round(rest_value, 1)
+        increments.append((1, rest_value))
+        current_value = rest_value
+    else:
+        current_value = 0
+
+    target_value = buffer_displacement_meter
+
+    while current_value <= target_value:
+        missing_value = target_value - current_value
+
+        if missing_value <= tolerance:
+            increments.append((1, buffer_displacement_meter))
+
+            break
+
+        increment_value = min(tolerance, missing_value)
+        iteration_fixed_buffer_addition = increment_value + current_value
+
+        increments.append((1, iteration_fixed_buffer_addition))
+        current_value = iteration_fixed_buffer_addition
+
+    return increments
@@ -1,5 +1,6 @@
 # Importing modules
 import arcpy
+import os
 
 # Importing custom files
 import config
@@ -90,7 +91,7 @@ class ResolveBuildingConflicts:
         self.points_to_squares = None
 
     def constructing_work_files(self):
-        unique_id = id(self)
+        unique_id = f"{os.getpid()}_{id(self)}"
 
         self.points_to_squares = (
             f"{self.base_path_for_features}_points_to_squares_{unique_id}"
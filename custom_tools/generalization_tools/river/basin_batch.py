@@ -0,0 +1,146 @@
+import os
+from functools import partial
+from multiprocessing import Pool
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from custom_tools.general_tools.geodataframe_io import read_features
+
+
+def read_rivers_and_basins(
+    rivers_path: str,
+    basins_path: str,
+    basin_field: str = "nedborfelt",
+    basin_names=None,
+):
+    """
+    Reads the rivers and the drainage basin polygons once.
+
+    Args:
+        rivers_path (str): Path to the river lines.
+        basins_path (str): Path to the drainage basin polygons.
+        basin_field (str): The field holding the basin names.
+        basin_names: The names of the basins to read, or None to read all basins.
+
+    Returns:
+        tuple: The rivers and the basins as GeoDataFrames, in the coordinate system of the rivers.
+        The rivers are single part lines indexed by their OBJECTID, so a multipart river becomes
+        several rows sharing its OBJECTID.
+    """
+    # Lines read from a file geodatabase are MultiLineStrings, even with a single part
+    rivers = read_features(rivers_path).explode(index_parts=False)
+    basins = read_features(basins_path, columns=[basin_field])
+    if basin_names is not None:
+        basins = basins[basins[basin_field].isin(list(basin_names))]
+    if basins.crs != rivers.crs:
+        basins = basins.to_crs(rivers.crs)
+    print(f"Read {len(rivers)} rivers and {len(basins)} drainage basin polygons")
+    return rivers, basins
+
+
+def assign_rivers_to_basins(
+    rivers: gpd.GeoDataFrame, basins: gpd.GeoDataFrame, basin_field: str = "nedborfelt"
+):
+    """
+    Assigns the rivers to the basins they intersect with a single spatial join. A river
+    intersecting several basins is assigned to each of them, as when selecting the rivers of each
+    basin by location.
+
+    Returns:
+        dict: The rivers of each basin name, indexed by their OBJECTID.
+    """
+    # The parts of a multipart river share its OBJECTID, so rows are told apart by position
+    rivers = rivers.assign(_river_position=np.arange(len(rivers)))
+    joined = gpd.sjoin(
+        rivers, basins[[basin_field, "geometry"]], how="inner", predicate="intersects"
+    ).drop(columns="index_right")
+
+    basin_rivers = {}
+    for basin_name, rivers_in_basin in joined.groupby(basin_field, sort=True):
+        # Basins made of several polygons would otherwise repeat rivers
+        basin_rivers[basin_name] = rivers_in_basin[
+            ~rivers_in_basin["_river_position"].duplicated()
+        ].drop(columns="_river_position")
+    print(f"Assigned rivers to {len(basin_rivers)} drainage basins")
+    return basin_rivers
+
+
+def _process_basin(basin_function, function_kwargs, basin_item):
+    basin_name, rivers_in_basin = basin_item
+    return basin_name, basin_function(rivers_in_basin, **function_kwargs)
+
+
+def map_basins(
+    basin_rivers: dict,
+    basin_function,
+    cpu_usage_percentage: float = 0.9,
+    **function_kwargs,
+) -> dict:
+    """
+    Runs a function on the rivers of each basin independently in a process pool. Basins are
+    dispatched largest first so a large basin does not finish last.
+
+    Args:
+        basin_rivers (dict): The rivers of each basin, as returned by assign_rivers_to_basins.
+        basin_function: A module level function taking the rivers of a basin as a GeoDataFrame,
+            and the function_kwargs.
+        cpu_usage_percentage (float): The share of the CPU cores to use for worker processes.
+        **function_kwargs: Keyword arguments passed on to basin_function.
+
+    Returns:
+        dict: The result of basin_function for each basin name, in basin name order.
+    """
+    basin_items = sorted(
+        basin_rivers.items(), key=lambda item: len(item[1]), reverse=True
+    )
+    process_basin = partial(_process_basin, basin_function, function_kwargs)
+    number_of_processes = min(
+        max(1, int(os.cpu_count() * cpu_usage_percentage)), len(basin_items)
+    )
+
+    results = {}
+    if number_of_processes <= 1:
+        for basin_name, result in map(process_basin, basin_items):
+            results[basin_name] = result
+            print(f"Processed basin {len(results)}/{len(basin_items)}: {basin_name}")
+    else:
+        with Pool(processes=number_of_processes) as pool:
+            for basin_name, result in pool.imap_unordered(process_basin, basin_items):
+                results[basin_name] = result
+                print(
+                    f"Processed basin {len(results)}/{len(basin_items)}: {basin_name}"
+                )
+    return {basin_name: results[basin_name] for basin_name in sorted(results)}
+
+
+def process_basins(
+    basin_rivers: dict,
+    basin_function,
+    cpu_usage_percentage: float = 0.9,
+    **function_kwargs,
+) -> gpd.GeoDataFrame:
+    """
+    Processes the basins independently in a process pool with map_basins and merges the results
+    into one GeoDataFrame.
+
+    Args:
+        basin_rivers (dict): The rivers of each basin, as returned by assign_rivers_to_basins.
+        basin_function: A module level function taking the rivers of a basin as a GeoDataFrame,
+            and the function_kwargs, and returning the processed rivers as a GeoDataFrame.
+        cpu_usage_percentage (float): The share of the CPU cores to use for worker processes.
+        **function_kwargs: Keyword arguments passed on to basin_function.
+
+    Returns:
+        GeoDataFrame: The processed rivers of all basins, in basin name order.
+    """
+    results = map_basins(
+        basin_rivers, basin_function, cpu_usage_percentage, **function_kwargs
+    )
+    if not results:
+        return gpd.GeoDataFrame()
+    return gpd.GeoDataFrame(
+        pd.concat(list(results.values())),
+        crs=next(iter(results.values())).crs,
+    )
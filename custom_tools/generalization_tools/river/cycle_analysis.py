@@ -0,0 +1,110 @@
+import numpy as np
+
+from custom_tools.generalization_tools.river.river_network import RiverNetwork
+
+
+def biconnected_components(network: RiverNetwork):
+    """
+    Splits the edges of a network into biconnected components with an iterative version of
+    Tarjan's algorithm, in O(V + E) time. An edge lies on a cycle exactly when it is not a bridge,
+    so parallel edges and self loops are on cycles, and each bridge is a component of its own.
+
+    Returns:
+        tuple: The biconnected component of each edge, True for each edge that is a bridge, and
+        the number of connected components of the network.
+    """
+    offsets, neighbours, edges = (array.tolist() for array in network.undirected_adjacency())
+    number_of_nodes = network.number_of_nodes
+    is_self_loop = network.from_nodes == network.to_nodes
+
+    discovery = [-1] * number_of_nodes
+    low = [0] * number_of_nodes
+    edge_components = np.full(network.number_of_edges, -1, dtype=np.int64)
+    is_bridge = np.zeros(network.number_of_edges, dtype=bool)
+    edge_stack = []
+    number_of_biconnected_components = 0
+    number_of_connected_components = 0
+    time = 0
+
+    for root in range(number_of_nodes):
+        if discovery[root] != -1:
+            continue
+        number_of_connected_components += 1
+        discovery[root] = low[root] = time
+        time += 1
+        # Each frame holds a node, the edge it was reached through and its next adjacency slot
+        stack = [[root, -1, offsets[root]]]
+        while stack:
+            frame = stack[-1]
+            node, parent_edge, slot = frame
+            if slot < offsets[node + 1]:
+                frame[2] += 1
+                edge = edges[slot]
+                neighbour = neighbours[slot]
+                if edge == parent_edge or neighbour == node:
+                    continue
+                if discovery[neighbour] == -1:
+                    edge_stack.append(edge)
+                    discovery[neighbour] = low[neighbour] = time
+                    time += 1
+                    stack.append([neighbour, edge, offsets[neighbour]])
+                elif discovery[neighbour] < discovery[node]:
+                    # A back edge to an ancestor, only taken from the descendant's side
+                    edge_stack.append(edge)
+                    low[node] = min(low[node], discovery[neighbour])
+                continue
+
+            stack.pop()
+            if parent_edge < 0:
+                continue
+            parent = stack[-1][0]
+            low[parent] = min(low[parent], low[node])
+            if low[node] > discovery[parent]:
+                is_bridge[parent_edge] = True
+            if low[node] >= discovery[parent]:
+                while True:
+                    edge = edge_stack.pop()
+                    edge_components[edge] = number_of_biconnected_components
+                    if edge == parent_edge:
+                        break
+                number_of_biconnected_components += 1
+
+    self_loops = np.flatnonzero(is_self_loop)
+    edge_components[self_loops] = number_of_biconnected_components + np.arange(
+        len(self_loops)
+    )
+    return edge_components, is_bridge, number_of_connected_components
+
+
+def cycle_statistics(network: RiverNetwork) -> dict:
+    """
+    Summarizes the cycles of a network.
+
+    Returns:
+        dict: The number of nodes and edges, the number of connected components, the cyclomatic
+        number (the number of independent cycles), the number of edges on a cycle, and the number
+        of biconnected components with a cycle and the number of edges in the largest of them.
+    """
+    edge_components, is_bridge, number_of_connected_components = (
+        biconnected_components(network)
+    )
+    cyclic_component_sizes = np.bincount(edge_components[~is_bridge])
+    cyclic_component_sizes = cyclic_component_sizes[cyclic_component_sizes > 0]
+    return {
+        "number_of_nodes": network.number_of_nodes,
+        "number_of_edges": network.number_of_edges,
+        "connected_components": number_of_connected_components,
+        "cyclomatic_number": network.number_of_edges
+        - network.number_of_nodes
+        + number_of_connected_components,
+        "edges_in_cycles": int(np.count_nonzero(~is_bridge)),
+        "cyclic_components": len(cyclic_component_sizes),
+        "largest_cyclic_component": int(cyclic_component_sizes.max(initial=0)),
+    }
+
+
+def basin_cycle_statistics(basin_rivers) -> dict:
+    """
+    Summarizes the cycles of the river network of one basin, for use with basin_batch.map_basins.
+    """
+    return cycle_statistics(RiverNetwork.from_geodataframe(basin_rivers))
@@ -0,0 +1,42 @@
+import numpy as np
+import shapely
+
+
+def find_dangle_conflicts(
+    buffer_geometries,
+    buffer_line_ids,
+    line_geometries,
+    line_ids,
+    polygon_geometries,
+) -> np.ndarray:
+    """
+    Finds the dangle buffers that intersect another line or a water polygon. The buffers are
+    queried in bulk against one spatial index over the lines and one over the polygons, so each
+    buffer is only tested against the features near it.
+
+    Args:
+        buffer_geometries: The buffers around the dangles.
+        buffer_line_ids: The id of the line each dangle belongs to, so its own line is ignored.
+        line_geometries: The river lines.
+        line_ids: The id of each river line.
+        polygon_geometries: The water polygons.
+
+    Returns:
+        np.ndarray: True for each buffer that intersects a line other than its own or a polygon.
+    """
+    buffer_geometries = np.asarray(buffer_geometries, dtype=object)
+    buffer_line_ids = np.asarray(buffer_line_ids)
+    line_ids = np.asarray(line_ids)
+    conflicts = np.zeros(len(buffer_geometries), dtype=bool)
+
+    buffer_positions, line_positions = shapely.STRtree(
+        np.asarray(line_geometries, dtype=object)
+    ).query(buffer_geometries, predicate="intersects")
+    other_line = line_ids[line_positions] != buffer_line_ids[buffer_positions]
+    conflicts[buffer_positions[other_line]] = True
+
+    buffer_positions, _ = shapely.STRtree(
+        np.asarray(polygon_geometries, dtype=object)
+    ).query(buffer_geometries, predicate="intersects")
+    conflicts[buffer_positions] = True
+    return conflicts
@@ -0,0 +1,121 @@
+import numpy as np
+import shapely
+
+from custom_tools.generalization_tools.river.river_network import require_linestrings
+
+# Strip organized rasters have blocks of a single row, which would give one read per row
+MINIMUM_BLOCK_SIZE = 256
+
+
+def sample_raster(raster_path: str, coordinates, band: int = 1) -> np.ndarray:
+    """
+    Samples a raster at many coordinates without reading the whole raster. The coordinates are
+    grouped by the raster block they fall in, and each block holding coordinates is read once.
+
+    Args:
+        raster_path (str): Path to the raster, for instance the DTM.
+        coordinates: The (n, 2) coordinates to sample, in the coordinate system of the raster.
+        band (int): The band to sample.
+
+    Returns:
+        np.ndarray: The value of the cell at each coordinate, NaN outside the raster or on NoData.
+
+    Raises:
+        ImportError: If rasterio is not installed in the python environment.
+    """
+    # rasterio is not part of the ArcGIS Pro environment, so it is only required when sampling
+    try:
+        import rasterio
+        from rasterio.windows import Window
+    except ImportError as error:
+        raise ImportError(
+            "Sampling elevations requires rasterio, which is not part of the ArcGIS Pro python "
+            "environment. Install it in a cloned environment with 'conda install rasterio', see "
+            "setup_guide/update_clone_arcpy_environment.md."
+        ) from error
+
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    values = np.full(len(coordinates), np.nan)
+    if len(coordinates) == 0:
+        return values
+
+    with rasterio.open(raster_path) as raster:
+        columns, rows = ~raster.transform * (coordinates[:, 0], coordinates[:, 1])
+        columns = np.floor(columns).astype(np.int64)
+        rows = np.floor(rows).astype(np.int64)
+        inside = (columns >= 0) & (columns < raster.width) & (rows >= 0) & (rows < raster.height)
+
+        block_height, block_width = (
+            max(size, MINIMUM_BLOCK_SIZE) for size in raster.block_shapes[band - 1]
+        )
+        positions = np.flatnonzero(inside)
+        block_rows = rows[positions] // block_height
+        block_columns = columns[positions] // block_width
+        order = np.lexsort((block_columns, block_rows))
+        positions = positions[order]
+        block_keys = block_rows[order] * (raster.width // block_width + 1) + block_columns[order]
+
+        for block_positions in np.split(positions, np.flatnonzero(np.diff(block_keys)) + 1):
+            if len(block_positions) == 0:
+                continue
+            row_offset = rows[block_positions[0]] // block_height * block_height
+            column_offset = columns[block_positions[0]] // block_width * block_width
+            window = Window(
+                column_offset,
+                row_offset,
+                min(block_width, raster.width - column_offset),
+                min(block_height, raster.height - row_offset),
+            )
+            block = raster.read(band, window=window, masked=True)
+            block = block.astype(np.float64).filled(np.nan)
+            values[block_positions] = block[
+                rows[block_positions] - row_offset,
+                columns[block_positions] - column_offset,
+            ]
+    return values
+
+
+def sample_endpoint_heights(geometries, raster_path: str):
+    """
+    Samples the raster at the start and end point of each line.
+
+    Returns:
+        tuple: The heights at the start points and at the end points, NaN outside the raster or
+        on NoData.
+
+    Raises:
+        ValueError: If any geometry is not a LineString.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    require_linestrings(geometries)
+    endpoints = np.vstack(
+        [
+            shapely.get_coordinates(shapely.get_point(geometries, 0)),
+            shapely.get_coordinates(shapely.get_point(geometries, -1)),
+        ]
+    )
+    heights = sample_raster(raster_path, endpoints)
+    return heights[: len(geometries)], heights[len(geometries) :]
+
+
+def with_endpoint_heights(geometries, start_z, end_z):
+    """
+    Creates straight 3D lines from the start to the end point of each line, with the given
+    heights as z values.
+
+    Raises:
+        ValueError: If any geometry is not a LineString.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    require_linestrings(geometries)
+    start_points = shapely.get_coordinates(shapely.get_point(geometries, 0))
+    end_points = shapely.get_coordinates(shapely.get_point(geometries, -1))
+    return shapely.linestrings(
+        np.stack(
+            [
+                np.column_stack([start_points, start_z]),
+                np.column_stack([end_points, end_z]),
+            ],
+            axis=1,
+        )
+    )
@@ -0,0 +1,85 @@
+import numpy as np
+
+from custom_tools.generalization_tools.river.river_network import (
+    RiverNetwork,
+    compressed_adjacency,
+)
+from custom_tools.generalization_tools.river.steiner_tree import kruskal
+
+
+def find_outlet(network: RiverNetwork) -> int:
+    """
+    Finds the outlet of a network, the lowest node with a single segment.
+
+    Raises:
+        ValueError: If no node with a single segment has a z value.
+    """
+    outlet_candidates = np.flatnonzero(network.degrees() == 1)
+    if len(outlet_candidates) == 0 or np.isnan(network.node_z[outlet_candidates]).all():
+        raise ValueError("Could not find a valid starting node.")
+    return int(outlet_candidates[np.nanargmin(network.node_z[outlet_candidates])])
+
+
+def flow_direction_flips(network: RiverNetwork, outlet=None) -> np.ndarray:
+    """
+    Finds the segments drawn against the flow direction of a network with z values.
+
+    The cycles of the network are removed in one pass by taking the minimum spanning forest with
+    the highest z value of each segment as its weight, which drops the highest segment of every
+    cycle. The segments of the forest are oriented towards the outlet by a traversal from it, and
+    the dropped segments are oriented from their higher to their lower end. Segments that are not
+    connected to the outlet, and dropped segments without z values, are left as they are.
+
+    Args:
+        network (RiverNetwork): The network, with z values at the segment endpoints.
+        outlet: The node id of the outlet, by default the one found by find_outlet.
+
+    Returns:
+        np.ndarray: 1 for each segment that needs to be flipped, otherwise 0.
+    """
+    if outlet is None:
+        outlet = find_outlet(network)
+    from_nodes, to_nodes = network.from_nodes, network.to_nodes
+    flipped = np.zeros(network.number_of_edges, dtype=np.int64)
+
+    # Segments without a z value are the first to be dropped from cycles
+    z_values = np.nan_to_num(network.z_values, nan=np.inf)
+    tree_edges = kruskal(
+        network.number_of_nodes,
+        z_values,
+        np.column_stack([from_nodes, to_nodes]).tolist(),
+    )
+    in_tree = np.zeros(network.number_of_edges, dtype=bool)
+    in_tree[tree_edges] = True
+
+    offsets, neighbours, slots = (
+        array.tolist()
+        for array in compressed_adjacency(
+            network.number_of_nodes,
+            np.concatenate([from_nodes[tree_edges], to_nodes[tree_edges]]),
+            np.concatenate([to_nodes[tree_edges], from_nodes[tree_edges]]),
+        )
+    )
+    edges = np.concatenate([tree_edges, tree_edges]).tolist()
+    tree_from_nodes = from_nodes.tolist()
+
+    # In a forest every node is reached through exactly one segment, so no segment is seen twice
+    visited = np.zeros(network.number_of_nodes, dtype=bool)
+    visited[outlet] = True
+    stack = [outlet]
+    while stack:
+        node = stack.pop()
+        for slot in range(offsets[node], offsets[node + 1]):
+            neighbour = neighbours[slot]
+            if visited[neighbour]:
+                continue
+            visited[neighbour] = True
+            # The segment should run from the neighbour to the node closer to the outlet
+            flipped[edges[slots[slot]]] = int(tree_from_nodes[edges[slots[slot]]] == node)
+            stack.append(neighbour)
+
+    dropped = np.flatnonzero(~in_tree)
+    with np.errstate(invalid="ignore"):
+        runs_uphill = network.node_z[from_nodes[dropped]] < network.node_z[to_nodes[dropped]]
+    flipped[dropped[runs_uphill]] = 1
+    return flipped
@@ -0,0 +1,178 @@
+import os
+from multiprocessing import Pool
+
+import numpy as np
+import shapely
+
+from custom_tools.generalization_tools.river.river_network import RiverNetwork
+from custom_tools.generalization_tools.river.steiner_tree import (
+    assemble_edge_chains,
+    steiner_tree_edges,
+)
+
+
+def split_into_vertex_pairs(geometries):
+    """
+    Splits lines into the segments between consecutive vertices. Multipart lines are split per
+    part, so the end of one part is not joined to the start of the next.
+
+    Returns:
+        tuple: The (k, 2) start and end coordinates of the segments and the position of the line
+        each segment comes from.
+    """
+    parts, line_positions = shapely.get_parts(
+        np.asarray(geometries, dtype=object), return_index=True
+    )
+    coordinates, part_positions = shapely.get_coordinates(parts, return_index=True)
+    same_part = part_positions[1:] == part_positions[:-1]
+    return (
+        coordinates[:-1][same_part],
+        coordinates[1:][same_part],
+        line_positions[part_positions[:-1][same_part]],
+    )
+
+
+def assign_centerlines_to_lakes(lake_polygons, centerline_geometries):
+    """
+    Assigns each centerline to the lake containing its midpoint, using a spatial index over the
+    lakes. Centerlines outside all lakes get -1.
+
+    Returns:
+        np.ndarray: The position of the lake of each centerline.
+    """
+    midpoints = shapely.line_interpolate_point(
+        np.asarray(centerline_geometries, dtype=object), 0.5, normalized=True
+    )
+    centerline_positions, lake_positions = shapely.STRtree(lake_polygons).query(
+        midpoints, predicate="intersects"
+    )
+    centerline_lakes = np.full(len(midpoints), -1, dtype=np.int64)
+    # Reversed so the first lake found wins where a midpoint is on a shared boundary
+    centerline_lakes[centerline_positions[::-1]] = lake_positions[::-1]
+    return centerline_lakes
+
+
+def prune_lake(lake_task):
+    """
+    Prunes the centerline network of one lake to the approximate minimum Steiner tree connecting
+    its inlets.
+
+    Args:
+        lake_task (tuple): The lake id, the start and end coordinates of its centerline segments
+            and the coordinates of the inlet points near the lake.
+
+    Returns:
+        tuple: The lake id, the coordinates of each pruned centerline and the number of inlets
+        found on the centerline network.
+    """
+    lake_id, start_coordinates, end_coordinates, inlet_coordinates = lake_task
+    network = RiverNetwork(start_coordinates, end_coordinates)
+    terminal_nodes = network.find_nodes(inlet_coordinates)
+    terminal_nodes = np.unique(terminal_nodes[terminal_nodes >= 0])
+
+    pruned_edges = steiner_tree_edges(network, terminal_nodes)
+    chains = assemble_edge_chains(network, pruned_edges)
+    return (
+        lake_id,
+        [network.node_coordinates[chain] for chain in chains],
+        len(terminal_nodes),
+    )
+
+
+def prune_lake_centerlines(
+    lake_ids,
+    lake_polygons,
+    centerline_geometries,
+    inlet_points,
+    inlet_search_distance: float = 1.0,
+    cpu_usage_percentage: float = 0.9,
+):
+    """
+    Prunes the collapsed centerlines of many lakes in one run. The centerlines and inlets are
+    partitioned by lake with a spatial index, and each lake is pruned independently in a worker
+    pool.
+
+    Args:
+        lake_ids: The id of each lake.
+        lake_polygons: The lake polygons.
+        centerline_geometries: The collapsed centerlines of the lakes.
+        inlet_points: The inlet points the pruned centerlines must connect.
+        inlet_search_distance (float): How far from a lake an inlet can be and still belong to it.
+        cpu_usage_percentage (float): The share of the CPU cores to use for worker processes.
+
+    Returns:
+        list: (lake id, coordinates) of each pruned centerline, ordered by lake id.
+    """
+    lake_ids = np.asarray(lake_ids)
+    lake_polygons = np.asarray(lake_polygons, dtype=object)
+
+    centerline_lakes = assign_centerlines_to_lakes(lake_polygons, centerline_geometries)
+    start_coordinates, end_coordinates, line_positions = split_into_vertex_pairs(
+        centerline_geometries
+    )
+    segment_lakes = centerline_lakes[line_positions]
+
+    inlet_positions, inlet_lakes = shapely.STRtree(lake_polygons).query(
+        np.asarray(inlet_points, dtype=object),
+        predicate="dwithin",
+        distance=inlet_search_distance,
+    )
+    inlet_coordinates = shapely.get_coordinates(np.asarray(inlet_points, dtype=object))
+
+    # Sorting by lake makes the segments and inlets of each lake contiguous
+    segment_order = np.argsort(segment_lakes, kind="stable")
+    segment_starts = np.searchsorted(
+        segment_lakes[segment_order], np.arange(len(lake_polygons) + 1)
+    )
+    inlet_order = np.argsort(inlet_lakes, kind="stable")
+    inlet_starts = np.searchsorted(
+        inlet_lakes[inlet_order], np.arange(len(lake_polygons) + 1)
+    )
+
+    lake_tasks = []
+    for lake_position in range(len(lake_polygons)):
+        segments = segment_order[
+            segment_starts[lake_position] : segment_starts[lake_position + 1]
+        ]
+        if len(segments) == 0:
+            continue
+        inlets = inlet_positions[
+            inlet_order[inlet_starts[lake_position] : inlet_starts[lake_position + 1]]
+        ]
+        lake_tasks.append(
+            (
+                lake_ids[lake_position].item(),
+                start_coordinates[segments],
+                end_coordinates[segments],
+                inlet_coordinates[inlets],
+            )
+        )
+    # Large lakes first so they do not finish last
+    lake_tasks.sort(key=lambda task: len(task[1]), reverse=True)
+
+    number_of_processes = min(
+        max(1, int(os.cpu_count() * cpu_usage_percentage)), len(lake_tasks)
+    )
+    if number_of_processes <= 1:
+        lake_results = list(map(prune_lake, lake_tasks))
+    else:
+        with Pool(processes=number_of_processes) as pool:
+            lake_results = pool.map(prune_lake, lake_tasks, chunksize=8)
+
+    pruned_centerlines = []
+    lakes_without_connections = 0
+    for lake_id, chains, number_of_inlets in sorted(
+        lake_results, key=lambda result: result[0]
+    ):
+        if number_of_inlets < 2:
+            lakes_without_connections += 1
+        pruned_centerlines.extend((lake_id, chain) for chain in chains)
+
+    print(
+        f"Pruned the centerlines of {len(lake_tasks)} lakes into {len(pruned_centerlines)} lines"
+    )
+    if lakes_without_connections:
+        print(
+            f"Warning: {lakes_without_connections} lakes have fewer than two inlets on their centerline and got no pruned centerline."
+        )
+    return pruned_centerlines
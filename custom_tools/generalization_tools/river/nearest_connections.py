@@ -0,0 +1,87 @@
+import numpy as np
+import shapely
+
+
+def find_nearest_connections(
+    points,
+    point_line_ids,
+    line_geometries,
+    line_ids,
+    polygon_geometries,
+    initial_search_radius: float = 50.0,
+):
+    """
+    Finds the closest point on any other line or polygon for many points at once. The candidates
+    of all points are found with one spatial index query per search radius, and the radius is
+    doubled for the points that only found their own line until every point has a candidate or
+    the radius covers all features.
+
+    Args:
+        points: The points to connect, typically line dangles.
+        point_line_ids: The id of the line each point belongs to, so its own line is ignored.
+        line_geometries: The lines that can be connected to.
+        line_ids: The id of each line.
+        polygon_geometries: The polygons that can be connected to.
+        initial_search_radius (float): The first search radius.
+
+    Returns:
+        tuple: The (k, 2) coordinates of the points, the (k, 2) coordinates of their closest
+        point on another feature, and True for each point where a feature was found.
+    """
+    points = np.asarray(points, dtype=object)
+    point_line_ids = np.asarray(point_line_ids)
+    targets = np.concatenate(
+        [
+            np.asarray(line_geometries, dtype=object),
+            np.asarray(polygon_geometries, dtype=object),
+        ]
+    )
+    number_of_lines = len(line_geometries)
+
+    nearest_targets = np.full(len(points), -1, dtype=np.int64)
+    if len(targets) and len(points):
+        tree = shapely.STRtree(targets)
+        all_bounds = np.vstack([shapely.bounds(targets), shapely.bounds(points)])
+        largest_radius = np.hypot(
+            all_bounds[:, 2].max() - all_bounds[:, 0].min(),
+            all_bounds[:, 3].max() - all_bounds[:, 1].min(),
+        )
+
+        remaining = np.arange(len(points))
+        search_radius = initial_search_radius
+        while len(remaining):
+            point_positions, target_positions = tree.query(
+                points[remaining], predicate="dwithin", distance=search_radius
+            )
+            point_positions = remaining[point_positions]
+
+            is_line = target_positions < number_of_lines
+            own_line = np.zeros(len(target_positions), dtype=bool)
+            own_line[is_line] = (
+                np.asarray(line_ids)[target_positions[is_line]]
+                == point_line_ids[point_positions[is_line]]
+            )
+            point_positions = point_positions[~own_line]
+            target_positions = target_positions[~own_line]
+
+            # The candidate at the shortest distance comes first for each point
+            distances = shapely.distance(
+                points[point_positions], targets[target_positions]
+            )
+            order = np.lexsort((distances, point_positions))
+            point_positions = point_positions[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = point_positions[1:] != point_positions[:-1]
+            nearest_targets[point_positions[first]] = target_positions[order][first]
+
+            if search_radius >= largest_radius:
+                break
+            remaining = remaining[nearest_targets[remaining] < 0]
+            search_radius *= 2
+
+    found = nearest_targets >= 0
+    connections = shapely.shortest_line(points[found], targets[nearest_targets[found]])
+    start_coordinates = shapely.get_coordinates(points)
+    end_coordinates = np.full((len(points), 2), np.nan)
+    end_coordinates[found] = shapely.get_coordinates(shapely.get_point(connections, 1))
+    return start_coordinates, end_coordinates, found
@@ -0,0 +1,346 @@
+import numpy as np
+import shapely
+
+# The XY resolution set by environment_setup, used to snap segment endpoints to nodes
+DEFAULT_XY_RESOLUTION = 0.01
+
+
+def compressed_adjacency(number_of_nodes, from_nodes, to_nodes):
+    """
+    Stores the outgoing edges of each node as a contiguous slice (compressed sparse rows).
+
+    Returns:
+        tuple: The offsets, so the edges of node n are in [offsets[n], offsets[n + 1]), and the
+        target node and edge index of each slot.
+    """
+    from_nodes = np.asarray(from_nodes, dtype=np.int64)
+    order = np.argsort(from_nodes, kind="stable")
+    offsets = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(from_nodes, minlength=number_of_nodes), out=offsets[1:])
+    return offsets, np.asarray(to_nodes, dtype=np.int64)[order], order
+
+
+def require_linestrings(geometries):
+    """
+    Checks that every geometry is a single part line, so arrays derived from their endpoints
+    line up with the geometries.
+
+    Raises:
+        ValueError: If any geometry is missing or not a LineString.
+    """
+    not_linestring = shapely.get_type_id(geometries) != shapely.GeometryType.LINESTRING
+    if not_linestring.any():
+        raise ValueError(
+            f"{int(not_linestring.sum())} geometries are not LineStrings, explode multipart "
+            f"lines first. First invalid position: {int(np.flatnonzero(not_linestring)[0])}"
+        )
+
+
+def snap_to_node_ids(coordinates, xy_resolution=DEFAULT_XY_RESOLUTION):
+    """
+    Gives coordinates that round to the same cell of the XY resolution grid the same integer node
+    id. Coordinates closer than the resolution can still round to neighbouring cells. Node ids are
+    numbered in the order the nodes first appear.
+
+    Returns:
+        tuple: The node id of each coordinate and the index of the first coordinate of each node.
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    grid_keys = np.round(coordinates / xy_resolution).astype(np.int64)
+    _, first_index, inverse = np.unique(
+        grid_keys, axis=0, return_index=True, return_inverse=True
+    )
+    rank = np.empty(len(first_index), dtype=np.int64)
+    rank[np.argsort(first_index, kind="stable")] = np.arange(len(first_index))
+    return rank[inverse.ravel()], np.sort(first_index)
+
+
+class RiverNetwork:
+    """
+    A river network stored in NumPy arrays instead of a graph of Python objects.
+
+    Segment endpoints are snapped to integer node ids at the XY resolution, so endpoints rounding
+    to the same XY resolution grid cell share a node regardless of floating point noise. Each edge
+    keeps the index of its segment, its length and its z value, and the adjacency of the nodes is
+    stored as compressed sparse rows. Algorithms run on the arrays directly, and to_networkx gives a graph
+    view for the places that still need networkx.
+    """
+
+    def __init__(
+        self,
+        start_coordinates,
+        end_coordinates,
+        segment_indices=None,
+        lengths=None,
+        start_z=None,
+        end_z=None,
+        xy_resolution: float = DEFAULT_XY_RESOLUTION,
+    ):
+        """
+        Args:
+            start_coordinates: The (m, 2) start coordinates of the segments.
+            end_coordinates: The (m, 2) end coordinates of the segments.
+            segment_indices: The index of each segment in its source, defaults to 0 to m - 1.
+            lengths: The length of each segment, defaults to the straight line length.
+            start_z: The z value of the start of each segment, if known.
+            end_z: The z value of the end of each segment, if known.
+            xy_resolution (float): The distance below which endpoints are snapped together.
+        """
+        start_coordinates = np.asarray(start_coordinates, dtype=np.float64).reshape(-1, 2)
+        end_coordinates = np.asarray(end_coordinates, dtype=np.float64).reshape(-1, 2)
+        number_of_edges = len(start_coordinates)
+        self.xy_resolution = xy_resolution
+
+        # Interleaved so node ids follow the order the segments are listed in
+        endpoints = np.empty((2 * number_of_edges, 2), dtype=np.float64)
+        endpoints[0::2] = start_coordinates
+        endpoints[1::2] = end_coordinates
+        endpoint_node_ids, first_endpoint = snap_to_node_ids(endpoints, xy_resolution)
+
+        self.from_nodes = endpoint_node_ids[0::2]
+        self.to_nodes = endpoint_node_ids[1::2]
+        self.node_coordinates = endpoints[first_endpoint]
+
+        self.segment_indices = (
+            np.arange(number_of_edges, dtype=np.int64)
+            if segment_indices is None
+            else np.asarray(segment_indices, dtype=np.int64)
+        )
+        self.lengths = (
+            np.hypot(*(end_coordinates - start_coordinates).T)
+            if lengths is None
+            else np.asarray(lengths, dtype=np.float64)
+        )
+
+        self.start_z = None if start_z is None else np.asarray(start_z, dtype=np.float64)
+        self.end_z = None if end_z is None else np.asarray(end_z, dtype=np.float64)
+        self.node_z = None
+        if self.start_z is not None and self.end_z is not None:
+            endpoint_z = np.empty(2 * number_of_edges, dtype=np.float64)
+            endpoint_z[0::2] = self.start_z
+            endpoint_z[1::2] = self.end_z
+            self.node_z = endpoint_z[first_endpoint]
+
+        self._node_lookup = None
+        self._undirected_adjacency = None
+
+    @classmethod
+    def from_geometries(
+        cls,
+        geometries,
+        segment_indices=None,
+        start_z=None,
+        end_z=None,
+        xy_resolution=DEFAULT_XY_RESOLUTION,
+    ):
+        """
+        Builds the network from an array of shapely line geometries, one edge per line. Unless
+        start_z and end_z are given, the z values are taken from the line endpoints when the lines
+        have z.
+
+        Raises:
+            ValueError: If any geometry is not a LineString.
+        """
+        geometries = np.asarray(geometries, dtype=object)
+        require_linestrings(geometries)
+        start_points = shapely.get_point(geometries, 0)
+        end_points = shapely.get_point(geometries, -1)
+
+        if (
+            (start_z is None or end_z is None)
+            and len(geometries)
+            and shapely.has_z(geometries).all()
+        ):
+            start_z = shapely.get_coordinates(start_points, include_z=True)[:, 2]
+            end_z = shapely.get_coordinates(end_points, include_z=True)[:, 2]
+
+        return cls(
+            shapely.get_coordinates(start_points),
+            shapely.get_coordinates(end_points),
+            segment_indices=segment_indices,
+            lengths=shapely.length(geometries),
+            start_z=start_z,
+            end_z=end_z,
+            xy_resolution=xy_resolution,
+        )
+
+    @classmethod
+    def from_geodataframe(cls, features, xy_resolution=DEFAULT_XY_RESOLUTION):
+        """
+        Builds the network from the lines of a GeoDataFrame. The segment index of each edge is
+        the position of its row.
+        """
+        return cls.from_geometries(
+            features.geometry.values, xy_resolution=xy_resolution
+        )
+
+    @classmethod
+    def from_feature_class(
+        cls,
+        feature_class,
+        split_vertices: bool = False,
+        xy_resolution=DEFAULT_XY_RESOLUTION,
+    ):
+        """
+        Builds the network from a polyline feature class with one SearchCursor pass. The segment
+        index of each edge is the OBJECTID of its line.
+
+        Args:
+            feature_class: The polyline feature class.
+            split_vertices (bool): If True, each pair of consecutive vertices becomes an edge,
+                otherwise each line becomes one edge from its first to its last point.
+            xy_resolution (float): The distance below which endpoints are snapped together.
+        """
+        import arcpy
+
+        start_coordinates = []
+        end_coordinates = []
+        segment_indices = []
+        lengths = []
+        with arcpy.da.SearchCursor(feature_class, ["OID@", "SHAPE@"]) as cursor:
+            for object_id, polyline in cursor:
+                if polyline is None:
+                    continue
+                if not split_vertices:
+                    start_coordinates.append((polyline.firstPoint.X, polyline.firstPoint.Y))
+                    end_coordinates.append((polyline.lastPoint.X, polyline.lastPoint.Y))
+                    segment_indices.append(object_id)
+                    lengths.append(polyline.length)
+                    continue
+                for part in polyline:
+                    vertices = [(point.X, point.Y) for point in part if point]
+                    start_coordinates.extend(vertices[:-1])
+                    end_coordinates.extend(vertices[1:])
+                    segment_indices.extend([object_id] * (len(vertices) - 1))
+
+        return cls(
+            start_coordinates,
+            end_coordinates,
+            segment_indices=segment_indices,
+            lengths=None if split_vertices else lengths,
+            xy_resolution=xy_resolution,
+        )
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.node_coordinates)
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.from_nodes)
+
+    @property
+    def z_values(self):
+        """
+        The highest endpoint z value of each edge, or None when the network has no z.
+        """
+        if self.start_z is None or self.end_z is None:
+            return None
+        return np.maximum(self.start_z, self.end_z)
+
+    def degrees(self) -> np.ndarray:
+        """
+        The number of edge ends at each node, counting a self loop twice.
+        """
+        return np.bincount(
+            np.concatenate([self.from_nodes, self.to_nodes]),
+            minlength=self.number_of_nodes,
+        )
+
+    def directed_adjacency(self):
+        """
+        The outgoing edges of each node as compressed sparse rows, see compressed_adjacency.
+        """
+        return compressed_adjacency(self.number_of_nodes, self.from_nodes, self.to_nodes)
+
+    def undirected_adjacency(self):
+        """
+        The edges at each node in both directions as compressed sparse rows.
+
+        Returns:
+            tuple: The offsets, and the neighbouring node and edge of each slot.
+        """
+        if self._undirected_adjacency is None:
+            offsets, neighbours, slots = compressed_adjacency(
+                self.number_of_nodes,
+                np.concatenate([self.from_nodes, self.to_nodes]),
+                np.concatenate([self.to_nodes, self.from_nodes]),
+            )
+            self._undirected_adjacency = (
+                offsets,
+                neighbours,
+                slots % max(self.number_of_edges, 1),
+            )
+        return self._undirected_adjacency
+
+    def find_nodes(self, coordinates) -> np.ndarray:
+        """
+        Finds the node ids of coordinates, snapped at the XY resolution of the network.
+
+        Returns:
+            np.ndarray: The node id of each coordinate, -1 where there is no node.
+        """
+        if self._node_lookup is None:
+            grid_keys = np.round(self.node_coordinates / self.xy_resolution).astype(
+                np.int64
+            )
+            self._node_lookup = {
+                key: node for node, key in enumerate(map(tuple, grid_keys.tolist()))
+            }
+        grid_keys = np.round(
+            np.asarray(coordinates, dtype=np.float64).reshape(-1, 2) / self.xy_resolution
+        ).astype(np.int64)
+        return np.array(
+            [self._node_lookup.get(key, -1) for key in map(tuple, grid_keys.tolist())],
+            dtype=np.int64,
+        )
+
+    def subnetwork(self, edge_mask) -> "RiverNetwork":
+        """
+        Creates the network of the selected edges, with its nodes numbered from 0 again.
+        """
+        edge_mask = np.asarray(edge_mask)
+        from_nodes = self.from_nodes[edge_mask]
+        to_nodes = self.to_nodes[edge_mask]
+        network = RiverNetwork(
+            self.node_coordinates[from_nodes],
+            self.node_coordinates[to_nodes],
+            segment_indices=self.segment_indices[edge_mask],
+            lengths=self.lengths[edge_mask],
+            start_z=None if self.start_z is None else self.start_z[edge_mask],
+            end_z=None if self.end_z is None else self.end_z[edge_mask],
+            xy_resolution=self.xy_resolution,
+        )
+        return network
+
+    def to_networkx(self, directed: bool = False, multigraph: bool = False):
+        """
+        Creates a networkx view of the network for algorithms that are not run on the arrays.
+        The nodes are the node ids with a pos attribute, and each edge has the edge id, its
+        segment index, its length as weight and its z value.
+        """
+        import networkx as nx
+
+        if directed:
+            graph = nx.MultiDiGraph() if multigraph else nx.DiGraph()
+        else:
+            graph = nx.MultiGraph() if multigraph else nx.Graph()
+
+        node_z = self.node_z
+        for node, (x, y) in enumerate(self.node_coordinates.tolist()):
+            position = (x, y) if node_z is None else (x, y, float(node_z[node]))
+            graph.add_node(node, pos=position)
+
+        z_values = self.z_values
+        for edge, (from_node, to_node) in enumerate(
+            zip(self.from_nodes.tolist(), self.to_nodes.tolist())
+        ):
+            attributes = {
+                "edge": edge,
+                "index": int(self.segment_indices[edge]),
+                "weight": float(self.lengths[edge]),
+            }
+            if z_values is not None:
+                attributes["z_value"] = float(z_values[edge])
+            graph.add_edge(from_node, to_node, **attributes)
+        return graph
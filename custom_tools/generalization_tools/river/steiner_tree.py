@@ -0,0 +1,253 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from custom_tools.generalization_tools.river.river_network import RiverNetwork
+
+
+class UnionFind:
+    """
+    A disjoint set forest with path halving and union by size.
+    """
+
+    def __init__(self, number_of_elements):
+        self.parents = list(range(number_of_elements))
+        self.sizes = [1] * number_of_elements
+
+    def find(self, element):
+        parents = self.parents
+        while parents[element] != element:
+            parents[element] = parents[parents[element]]
+            element = parents[element]
+        return element
+
+    def union(self, element_a, element_b) -> bool:
+        """
+        Joins the sets of two elements. Returns False if they were already in the same set.
+        """
+        root_a, root_b = self.find(element_a), self.find(element_b)
+        if root_a == root_b:
+            return False
+        if self.sizes[root_a] < self.sizes[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parents[root_b] = root_a
+        self.sizes[root_a] += self.sizes[root_b]
+        return True
+
+
+def shortest_undirected_edges(network: RiverNetwork):
+    """
+    Keeps the shortest of each set of parallel edges and drops self loops.
+
+    Returns:
+        tuple: The edge ids kept, and their lower and higher node ids.
+    """
+    lower_nodes = np.minimum(network.from_nodes, network.to_nodes)
+    higher_nodes = np.maximum(network.from_nodes, network.to_nodes)
+    candidates = np.flatnonzero(lower_nodes != higher_nodes)
+
+    order = candidates[
+        np.lexsort(
+            (
+                network.lengths[candidates],
+                higher_nodes[candidates],
+                lower_nodes[candidates],
+            )
+        )
+    ]
+    first_of_pair = np.ones(len(order), dtype=bool)
+    first_of_pair[1:] = (lower_nodes[order][1:] != lower_nodes[order][:-1]) | (
+        higher_nodes[order][1:] != higher_nodes[order][:-1]
+    )
+    edges = order[first_of_pair]
+    return edges, lower_nodes[edges], higher_nodes[edges]
+
+
+def kruskal(number_of_nodes, edge_weights, node_pairs):
+    """
+    Finds the minimum spanning forest of a weighted undirected graph.
+
+    Returns:
+        np.ndarray: The positions of the edges in the spanning forest.
+    """
+    union_find = UnionFind(number_of_nodes)
+    return np.array(
+        [
+            position
+            for position in np.argsort(edge_weights, kind="stable").tolist()
+            if union_find.union(*node_pairs[position])
+        ],
+        dtype=np.int64,
+    )
+
+
+def prune_non_terminal_leaves(number_of_nodes, node_pairs, is_terminal):
+    """
+    Repeatedly removes the edges leading to leaves that are not terminals.
+
+    Returns:
+        np.ndarray: True for each edge that is kept.
+    """
+    keep = np.ones(len(node_pairs), dtype=bool)
+    degrees = np.bincount(node_pairs.ravel(), minlength=number_of_nodes)
+    incident_edges = [[] for _ in range(number_of_nodes)]
+    for edge, (node_a, node_b) in enumerate(node_pairs.tolist()):
+        incident_edges[node_a].append(edge)
+        incident_edges[node_b].append(edge)
+
+    leaves = np.flatnonzero((degrees == 1) & ~is_terminal).tolist()
+    while leaves:
+        leaf = leaves.pop()
+        for edge in incident_edges[leaf]:
+            if not keep[edge]:
+                continue
+            keep[edge] = False
+            node_a, node_b = node_pairs[edge]
+            other_node = node_b if node_a == leaf else node_a
+            degrees[leaf] -= 1
+            degrees[other_node] -= 1
+            if degrees[other_node] == 1 and not is_terminal[other_node]:
+                leaves.append(other_node)
+    return keep
+
+
+def steiner_tree_edges(network: RiverNetwork, terminal_nodes) -> np.ndarray:
+    """
+    Finds the edges of an approximate minimum Steiner tree connecting the terminal nodes, with
+    Mehlhorn's algorithm. The result is at most twice as long as the optimal tree.
+
+    Instead of a shortest path search between every pair of terminals, one Dijkstra search from
+    all terminals at once finds the nearest terminal of every node. Each edge between the regions
+    of two terminals gives a candidate connection between them, and the minimum spanning tree of
+    those connections is expanded back to network edges. The total cost is O(E log V).
+
+    Terminals in separate components of the network are connected within their component,
+    giving a Steiner forest.
+
+    Args:
+        network (RiverNetwork): The network, with the length of each edge as its weight.
+        terminal_nodes: The node ids of the terminals.
+
+    Returns:
+        np.ndarray: The sorted ids of the network edges in the tree.
+    """
+    terminal_nodes = np.unique(np.asarray(terminal_nodes, dtype=np.int64))
+    number_of_nodes = network.number_of_nodes
+    if len(terminal_nodes) < 2:
+        return np.empty(0, dtype=np.int64)
+
+    edges, lower_nodes, higher_nodes = shortest_undirected_edges(network)
+    weights = network.lengths[edges]
+    graph = coo_matrix(
+        # Zero length edges would be read as missing edges by the sparse graph routines
+        (np.maximum(weights, 1e-9), (lower_nodes, higher_nodes)),
+        shape=(number_of_nodes, number_of_nodes),
+    ).tocsr()
+
+    distances, predecessors, sources = dijkstra(
+        graph,
+        directed=False,
+        indices=terminal_nodes,
+        min_only=True,
+        return_predecessors=True,
+    )
+
+    # Edges between the regions of two terminals connect those terminals
+    source_a, source_b = sources[lower_nodes], sources[higher_nodes]
+    is_bridge = (source_a >= 0) & (source_b >= 0) & (source_a != source_b)
+    bridges = np.flatnonzero(is_bridge)
+    bridge_weights = (
+        distances[lower_nodes[bridges]] + weights[bridges] + distances[higher_nodes[bridges]]
+    )
+
+    terminal_index = np.full(number_of_nodes, -1, dtype=np.int64)
+    terminal_index[terminal_nodes] = np.arange(len(terminal_nodes))
+    terminal_pairs = np.column_stack(
+        [
+            terminal_index[source_a[bridges]],
+            terminal_index[source_b[bridges]],
+        ]
+    )
+    spanning_bridges = bridges[
+        kruskal(len(terminal_nodes), bridge_weights, terminal_pairs.tolist())
+    ]
+
+    # Expands each chosen connection to the shortest paths to its two terminals
+    pair_keys = lower_nodes * number_of_nodes + higher_nodes
+    key_order = np.argsort(pair_keys)
+    sorted_keys = pair_keys[key_order]
+
+    def edge_between(node_a, node_b):
+        key = min(node_a, node_b) * number_of_nodes + max(node_a, node_b)
+        return int(key_order[np.searchsorted(sorted_keys, key)])
+
+    predecessors = predecessors.tolist()
+    tree_edges = set()
+    for bridge in spanning_bridges.tolist():
+        tree_edges.add(bridge)
+        for node in (int(lower_nodes[bridge]), int(higher_nodes[bridge])):
+            while predecessors[node] >= 0:
+                previous_node = predecessors[node]
+                edge = edge_between(node, previous_node)
+                if edge in tree_edges:
+                    break
+                tree_edges.add(edge)
+                node = previous_node
+
+    # The expanded paths can share nodes, so a spanning forest of them is taken and dead ends pruned
+    tree_edges = np.array(sorted(tree_edges), dtype=np.int64)
+    tree_pairs = np.column_stack([lower_nodes[tree_edges], higher_nodes[tree_edges]])
+    tree_positions = kruskal(number_of_nodes, weights[tree_edges], tree_pairs.tolist())
+    tree_edges = tree_edges[tree_positions]
+    tree_pairs = tree_pairs[tree_positions]
+
+    is_terminal = np.zeros(number_of_nodes, dtype=bool)
+    is_terminal[terminal_nodes] = True
+    keep = prune_non_terminal_leaves(number_of_nodes, tree_pairs, is_terminal)
+    return np.sort(edges[tree_edges[keep]])
+
+
+def assemble_edge_chains(network: RiverNetwork, edge_ids):
+    """
+    Joins edges into chains of nodes running between nodes that do not have exactly two of the
+    edges, so each chain can be written as one polyline.
+
+    Returns:
+        list: The node ids of each chain, in order.
+    """
+    edge_ids = np.asarray(edge_ids, dtype=np.int64)
+    from_nodes = network.from_nodes[edge_ids].tolist()
+    to_nodes = network.to_nodes[edge_ids].tolist()
+
+    incident_edges = {}
+    for position, (from_node, to_node) in enumerate(zip(from_nodes, to_nodes)):
+        incident_edges.setdefault(from_node, []).append(position)
+        incident_edges.setdefault(to_node, []).append(position)
+
+    def other_end(position, node):
+        return to_nodes[position] if from_nodes[position] == node else from_nodes[position]
+
+    used = [False] * len(edge_ids)
+    chains = []
+    chain_ends = [node for node, edges in incident_edges.items() if len(edges) != 2]
+    # Nodes of closed loops are only reached after all other chains are assembled
+    start_nodes = chain_ends + list(incident_edges)
+    for start_node in start_nodes:
+        for position in incident_edges[start_node]:
+            if used[position]:
+                continue
+            chain = [start_node]
+            node = start_node
+            while True:
+                used[position] = True
+                node = other_end(position, node)
+                chain.append(node)
+                if len(incident_edges[node]) != 2 or node == start_node:
+                    break
+                position = next(
+                    (edge for edge in incident_edges[node] if not used[edge]), None
+                )
+                if position is None:
+                    break
+            chains.append(chain)
+    return chains
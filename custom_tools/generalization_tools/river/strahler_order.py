@@ -0,0 +1,198 @@
+from collections import deque
+
+import numpy as np
+
+from custom_tools.generalization_tools.river.river_network import compressed_adjacency
+
+
+def unique_directed_edges(number_of_nodes, from_nodes, to_nodes):
+    """
+    Collapses parallel edges, so each (from node, to node) pair is kept once, as in a networkx
+    DiGraph. The pairs are returned in the order they first appear.
+    """
+    from_nodes = np.asarray(from_nodes, dtype=np.int64)
+    to_nodes = np.asarray(to_nodes, dtype=np.int64)
+    _, first_index = np.unique(
+        from_nodes * number_of_nodes + to_nodes, return_index=True
+    )
+    first_index = np.sort(first_index)
+    return from_nodes[first_index], to_nodes[first_index]
+
+
+def find_cycle_breaking_edges(number_of_nodes, from_nodes, to_nodes):
+    """
+    Finds the edges to remove to make the graph acyclic with one iterative depth first search.
+    The search starts from the nodes in id order, and each edge leading back to a node on the
+    current search path (a back edge, including self loops) is removed. Removing all back edges
+    breaks every cycle, and each edge is visited once.
+
+    Returns:
+        np.ndarray: True for each edge to remove.
+    """
+    offsets, targets, edge_indices = compressed_adjacency(
+        number_of_nodes, from_nodes, to_nodes
+    )
+    offsets, targets, edge_indices = (
+        offsets.tolist(),
+        targets.tolist(),
+        edge_indices.tolist(),
+    )
+    is_back_edge = np.zeros(len(targets), dtype=bool)
+
+    # 0: not visited, 1: on the search path, 2: finished
+    state = [0] * number_of_nodes
+    for root in range(number_of_nodes):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [[root, offsets[root]]]
+        while stack:
+            frame = stack[-1]
+            node, position = frame
+            if position == offsets[node + 1]:
+                state[node] = 2
+                stack.pop()
+                continue
+            frame[1] = position + 1
+            target = targets[position]
+            if state[target] == 1:
+                is_back_edge[edge_indices[position]] = True
+            elif state[target] == 0:
+                state[target] = 1
+                stack.append([target, offsets[target]])
+    return is_back_edge
+
+
+def topological_order(number_of_nodes, from_nodes, to_nodes):
+    """
+    Orders the nodes of an acyclic graph so every edge goes from an earlier to a later node.
+    Nodes without incoming edges are started in id order.
+    """
+    offsets, targets, _ = compressed_adjacency(number_of_nodes, from_nodes, to_nodes)
+    offsets, targets = offsets.tolist(), targets.tolist()
+    in_degree = np.bincount(
+        np.asarray(to_nodes, dtype=np.int64), minlength=number_of_nodes
+    ).tolist()
+
+    queue = deque(node for node in range(number_of_nodes) if in_degree[node] == 0)
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for position in range(offsets[node], offsets[node + 1]):
+            target = targets[position]
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                queue.append(target)
+
+    if len(order) != number_of_nodes:
+        raise ValueError("The graph contains cycles.")
+    return order
+
+
+def calculate_strahler_orders(
+    number_of_nodes, from_nodes, to_nodes, use_common_ancestor=True
+):
+    """
+    Calculates the Strahler order of each edge of a directed river network in linear time.
+
+    Cycles are first broken by removing the back edges of one depth first search. The nodes are
+    then visited once in topological order. A node without incoming edges gets order 1, otherwise
+    it gets the highest order of its incoming edges, increased by one if more than one incoming
+    edge has that order. Each edge gets the order of its from node.
+
+    With use_common_ancestor, the order is not increased where two incoming edges have a common
+    ancestor, i.e. where a river diverged and rejoins. Any such common ancestor implies an upstream
+    bifurcation (a node with more than one outgoing edge), so instead of keeping the full ancestor
+    set of every node, each node keeps a bitset of the bifurcations upstream of it. Two from nodes
+    have a common ancestor if their bitsets share a bifurcation, or if one of them is itself a
+    bifurcation upstream of the other and has an ancestor of its own.
+
+    Args:
+        number_of_nodes (int): The number of nodes, ids are 0 to number_of_nodes - 1.
+        from_nodes: The from node id of each edge.
+        to_nodes: The to node id of each edge.
+        use_common_ancestor (bool): Whether to skip the increase where diverged rivers rejoin.
+
+    Returns:
+        np.ndarray: The Strahler order of each edge.
+    """
+    from_nodes = np.asarray(from_nodes, dtype=np.int64)
+    to_nodes = np.asarray(to_nodes, dtype=np.int64)
+
+    is_back_edge = find_cycle_breaking_edges(number_of_nodes, from_nodes, to_nodes)
+    dag_from_nodes, dag_to_nodes = unique_directed_edges(
+        number_of_nodes, from_nodes[~is_back_edge], to_nodes[~is_back_edge]
+    )
+    order = topological_order(number_of_nodes, dag_from_nodes, dag_to_nodes)
+
+    # The predecessors of each node, as compressed rows of the reversed graph
+    predecessor_offsets, predecessors, _ = compressed_adjacency(
+        number_of_nodes, dag_to_nodes, dag_from_nodes
+    )
+    predecessor_offsets, predecessors = predecessor_offsets.tolist(), predecessors.tolist()
+    out_degree = np.bincount(dag_from_nodes, minlength=number_of_nodes).tolist()
+
+    # Bifurcations get their bit in topological order
+    bifurcation_bit = [0] * number_of_nodes
+    if use_common_ancestor:
+        next_bit = 0
+        for node in order:
+            if out_degree[node] > 1:
+                bifurcation_bit[node] = 1 << next_bit
+                next_bit += 1
+
+    node_orders = [1] * number_of_nodes
+    upstream_bifurcations = [0] * number_of_nodes
+    remaining_successors = list(out_degree)
+
+    def have_common_ancestor(node_a, node_b):
+        if upstream_bifurcations[node_a] & upstream_bifurcations[node_b]:
+            return True
+        for upstream_node, downstream_node in (
+            (node_a, node_b),
+            (node_b, node_a),
+        ):
+            if (
+                bifurcation_bit[upstream_node]
+                and upstream_bifurcations[downstream_node] & bifurcation_bit[upstream_node]
+                and predecessor_offsets[upstream_node + 1]
+                > predecessor_offsets[upstream_node]
+            ):
+                return True
+        return False
+
+    for node in order:
+        node_predecessors = predecessors[
+            predecessor_offsets[node] : predecessor_offsets[node + 1]
+        ]
+        if not node_predecessors:
+            continue
+
+        incoming_orders = [node_orders[predecessor] for predecessor in node_predecessors]
+        maximum_order = max(incoming_orders)
+        if incoming_orders.count(maximum_order) > 1:
+            increase = True
+            if use_common_ancestor:
+                increase = not any(
+                    have_common_ancestor(node_predecessors[i], node_predecessors[j])
+                    for i in range(len(node_predecessors))
+                    for j in range(i + 1, len(node_predecessors))
+                )
+            if increase:
+                maximum_order += 1
+        node_orders[node] = maximum_order
+
+        if use_common_ancestor:
+            bifurcations = 0
+            for predecessor in node_predecessors:
+                bifurcations |= (
+                    upstream_bifurcations[predecessor] | bifurcation_bit[predecessor]
+                )
+                # Bitsets are released once all downstream nodes have used them
+                remaining_successors[predecessor] -= 1
+                if remaining_successors[predecessor] == 0:
+                    upstream_bifurcations[predecessor] = 0
+            upstream_bifurcations[node] = bifurcations
+
+    return np.asarray(node_orders, dtype=np.int64)[from_nodes]
@@ -86,6 +86,18 @@ class Building_N100(Enum):
         )
     )
 
+    overview__stage_cache__n100 = file_manager.generate_file_name_general_directory(
+        script_source_name=overview,
+        description="stage_cache",
+        file_type="dir",
+    )
+
+    overview__profiling__n100 = file_manager.generate_file_name_general_directory(
+        script_source_name=overview,
+        description="profiling",
+        file_type="dir",
+    )
+
     # ========================================
     #                                DATA PREPARATION
     # ========================================
@@ -892,6 +904,11 @@ class Building_N100(Enum):
         )
     )
 
+    removing_overlapping_polygons_and_points___points_after_cluster_reduction___n100_building = file_manager.generate_file_name_gdb(
+        script_source_name=removing_overlapping_polygons_and_points,
+        description="points_after_cluster_reduction",
+    )
+
     removing_overlapping_polygons_and_points___points_in_a_cluster_original___n100_building = file_manager.generate_file_name_gdb(
         script_source_name=removing_overlapping_polygons_and_points,
         description="points_in_a_cluster_original",
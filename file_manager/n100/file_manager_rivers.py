@@ -469,6 +469,13 @@ class River_N100(Enum):
         )
     )
 
+    centerline_pruning_loop__pruned_complex_centerlines__n100 = (
+        file_manager.generate_file_name_gdb(
+            script_source_name=centerline_pruning_loop,
+            description="pruned_complex_centerlines",
+        )
+    )
+
     centerline_pruning_loop__finnished_centerlines__n100 = (
         file_manager.generate_file_name_gdb(
             script_source_name=centerline_pruning_loop,
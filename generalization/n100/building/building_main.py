@@ -1,6 +1,10 @@
 # Importing modules
 from env_setup import environment_setup
 from custom_tools.decorators.timing_decorator import timing_decorator
+from custom_tools.general_tools import profiler
+from custom_tools.general_tools.pipeline_scheduler import run_pipeline
+from custom_tools.general_tools.stage_cache import StageCache
+from file_manager.n100.file_manager_buildings import Building_N100
 
 
 # Importing building scripts
@@ -23,27 +27,51 @@ from generalization.n100.building import removing_overlapping_polygons_and_point
 from generalization.n100.building import finalizing_buildings
 
 
+# The building scripts in an order that is valid when they run one at a time
+BUILDING_STAGES = [
+    data_preparation.main,
+    simplify_polygons.main,
+    calculate_polygon_values.main,
+    polygon_propogate_displacement.main,
+    polygon_resolve_building_conflicts.main,
+    polygon_to_point.main,
+    calculate_point_values.main,
+    point_propogate_displacement.main,
+    hospital_church_clusters.main,
+    point_displacement_with_buffer.main,
+    point_resolve_building_conflicts.main,
+    removing_points_and_erasing_polygons_in_water_features.main,
+    removing_overlapping_polygons_and_points.main,
+    finalizing_buildings.main,
+]
+
+
 # Main function that runs all the building scripts
 @timing_decorator
-def main():
-    """ """
+def main(run_in_parallel: bool = False, use_stage_cache: bool = False):
+    """
+    Runs all the building scripts. With run_in_parallel, scripts that do not depend on each
+    other's file manager entries run concurrently in separate processes. With use_stage_cache,
+    scripts whose inputs, source data, constants and code are unchanged since the last cached run
+    restore their outputs instead of running. The clean up always runs last, after all other
+    scripts have finished.
+    """
+    # Fix the profiling run id before any worker process starts, so all spans share one run
+    profiler.run_id()
     environment_setup.main()
-    data_preparation.main()
-    simplify_polygons.main()
-    calculate_polygon_values.main()
-    polygon_propogate_displacement.main()
-    polygon_resolve_building_conflicts.main()
-    polygon_to_point.main()
-    calculate_point_values.main()
-    point_propogate_displacement.main()
-    hospital_church_clusters.main()
-    point_displacement_with_buffer.main()
-    point_resolve_building_conflicts.main()
-    removing_points_and_erasing_polygons_in_water_features.main()
-    removing_overlapping_polygons_and_points.main()
-    finalizing_buildings.main()
+    stage_cache = None
+    if use_stage_cache:
+        stage_cache = StageCache(Building_N100.overview__stage_cache__n100.value)
+    run_pipeline(
+        BUILDING_STAGES,
+        run_in_parallel=run_in_parallel,
+        initializer=environment_setup.main,
+        stage_cache=stage_cache,
+    )
     data_clean_up.main()
 
 
 if __name__ == "__main__":
     main()
+    # Written after main returns, so the span of the whole run is closed and included
+    profiler.write_reports()
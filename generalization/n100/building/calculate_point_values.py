@@ -10,8 +10,22 @@ from collections import Counter
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
-
-
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
+
+
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_preparation___matrikkel_points___n100_building,
+        Building_N100.data_preperation___matrikkel_n50_touristcabins_points_merged___n100_building,
+        Building_N100.polygon_to_point___merged_points_final___n100_building,
+    ],
+    outputs=[
+        Building_N100.calculate_point_values___points_going_into_propagate_displacement___n100_building,
+        Building_N100.data_preparation___matrikkel_points___n100_building,
+        Building_N100.data_preperation___matrikkel_n50_touristcabins_points_merged___n100_building,
+        Building_N100.polygon_to_point___merged_points_final___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
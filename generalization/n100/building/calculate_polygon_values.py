@@ -7,8 +7,17 @@ import arcpy
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
 
 
+@stage_io_decorator(
+    inputs=[
+        Building_N100.simplify_polygons___spatial_join_polygons___n100_building,
+    ],
+    outputs=[
+        Building_N100.simplify_polygons___spatial_join_polygons___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
@@ -12,6 +12,7 @@ from env_setup import environment_setup
 import env_setup.global_config
 import config
 from custom_tools.decorators.timing_decorator import timing_decorator
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
 from custom_tools.general_tools import custom_arcpy
 from custom_tools.general_tools.polygon_processor import PolygonProcessor
 from custom_tools.general_tools.line_to_buffer_symbology import LineToBufferSymbology
@@ -24,6 +25,27 @@ from custom_tools.generalization_tools.building.begrensningskurve_land_waterbodi
 from custom_tools.general_tools.study_area_selector import StudyAreaSelector
 
 
+@stage_io_decorator(
+    inputs=[],
+    outputs=[
+        Building_N100.data_preparation___matrikkel_points___n100_building,
+        Building_N100.data_preparation___points_created_from_small_polygons___n100_building,
+        Building_N100.data_preparation___polygons_that_are_large_enough___n100_building,
+        Building_N100.data_preparation___processed_begrensningskurve___n100_building,
+        Building_N100.data_preparation___railway_stations_to_polygons___n100_building,
+        Building_N100.data_preparation___railway_stations_to_polygons_symbology___n100_building_lyrx,
+        Building_N100.data_preparation___road_symbology_buffers___n100_building,
+        Building_N100.data_preparation___unsplit_roads___n100_building,
+        Building_N100.data_preparation___urban_area_selection_n100___n100_building,
+        Building_N100.data_preperation___matrikkel_n50_touristcabins_points_merged___n100_building,
+        Building_N100.data_selection___building_point_n50_input_data___n100_building,
+        Building_N100.data_selection___building_polygon_n50_input_data___n100_building,
+        Building_N100.data_selection___displacement_feature___n100_building,
+        Building_N100.data_selection___land_cover_n100_input_data___n100_building,
+        Building_N100.data_selection___railroad_stations_n100_input_data___n100_building,
+        Building_N100.data_selection___railroad_tracks_n100_input_data___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
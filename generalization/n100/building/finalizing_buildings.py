@@ -9,8 +9,24 @@ from file_manager.n100.file_manager_buildings import Building_N100
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
-
-
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
+
+
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_selection___land_cover_n100_input_data___n100_building,
+        Building_N100.removing_overlapping_polygons_and_points___final___n100_building,
+        Building_N100.removing_overlapping_polygons_and_points___merging_final_points___n100_building,
+        Building_N100.removing_overlapping_polygons_and_points___polygons_NOT_intersecting_road_buffers___n100_building,
+    ],
+    outputs=[
+        Building_N100.BygningsPunkt,
+        Building_N100.Grunnriss,
+        Building_N100.OmrissLinje,
+        Building_N100.Piktogram,
+        Building_N100.TuristHytte,
+    ],
+)
 def main():
     environment_setup.main()
     removing_points_in_and_close_to_urban_areas()
@@ -14,9 +14,23 @@ from custom_tools.generalization_tools.building.buffer_displacement import (
 )
 from env_setup import environment_setup
 from custom_tools.decorators.timing_decorator import timing_decorator
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
 from custom_tools.general_tools import custom_arcpy
 
 
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_preparation___processed_begrensningskurve___n100_building,
+        Building_N100.data_preparation___unsplit_roads___n100_building,
+        Building_N100.data_preparation___urban_area_selection_n100___n100_building,
+        Building_N100.data_selection___railroad_stations_n100_input_data___n100_building,
+        Building_N100.data_selection___railroad_tracks_n100_input_data___n100_building,
+        Building_N100.hospital_church_clusters___final___n100_building,
+    ],
+    outputs=[
+        Building_N100.point_displacement_with_buffer___merged_buffer_displaced_points___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
@@ -140,6 +154,7 @@ def buffer_displacement():
             "buffer_displacement_meter": N100_Values.buffer_clearance_distance_m.value,
             "write_work_files_to_memory": False,
             "keep_work_files": False,
+            "incremental": True,
         },
     }
 
@@ -9,8 +9,18 @@ from file_manager.n100.file_manager_buildings import Building_N100
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
 
 
+@stage_io_decorator(
+    inputs=[
+        Building_N100.calculate_point_values___points_going_into_propagate_displacement___n100_building,
+        Building_N100.data_selection___displacement_feature___n100_building,
+    ],
+    outputs=[
+        Building_N100.point_propagate_displacement___points_after_propagate_displacement___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
@@ -22,11 +22,25 @@ import env_setup.global_config
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
 
 
 iteration_fc = config.resolve_building_conflicts_iteration_feature
 
 
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_preparation___processed_begrensningskurve___n100_building,
+        Building_N100.data_preparation___railway_stations_to_polygons___n100_building,
+        Building_N100.data_preparation___unsplit_roads___n100_building,
+        Building_N100.point_displacement_with_buffer___merged_buffer_displaced_points___n100_building,
+        Building_N100.polygon_resolve_building_conflicts___building_polygons_final___n100_building,
+    ],
+    outputs=[
+        Building_N100.point_resolve_building_conflicts___POINT_OUTPUT___n100_building,
+        Building_N100.point_resolve_building_conflicts___POLYGON_OUTPUT___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
@@ -13,8 +13,18 @@ from file_manager.n100.file_manager_buildings import Building_N100
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
-
-
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
+
+
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_selection___displacement_feature___n100_building,
+        Building_N100.simplify_polygons___spatial_join_polygons___n100_building,
+    ],
+    outputs=[
+        Building_N100.polygon_propogate_displacement___building_polygons_after_displacement___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
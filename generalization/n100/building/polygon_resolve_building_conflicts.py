@@ -18,8 +18,25 @@ from file_manager.n100.file_manager_buildings import Building_N100
 # Importing timing decorator
 
 from custom_tools.decorators.timing_decorator import timing_decorator
-
-
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
+
+
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_preparation___processed_begrensningskurve___n100_building,
+        Building_N100.data_preparation___railway_stations_to_polygons_symbology___n100_building_lyrx,
+        Building_N100.data_preparation___road_symbology_buffers___n100_building,
+        Building_N100.data_preparation___unsplit_roads___n100_building,
+        Building_N100.data_selection___building_point_n50_input_data___n100_building,
+        Building_N100.data_selection___railroad_tracks_n100_input_data___n100_building,
+        Building_N100.polygon_propogate_displacement___building_polygons_after_displacement___n100_building,
+    ],
+    outputs=[
+        Building_N100.polygon_resolve_building_conflicts___building_polygons_final___n100_building,
+        Building_N100.polygon_resolve_building_conflicts___final_merged_points___n100_building,
+        Building_N100.polygon_resolve_building_conflicts___small_building_polygons_to_point___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
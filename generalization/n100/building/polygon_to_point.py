@@ -10,8 +10,24 @@ from file_manager.n100.file_manager_buildings import Building_N100
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
-
-
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
+
+
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_preparation___points_created_from_small_polygons___n100_building,
+        Building_N100.data_preparation___polygons_that_are_large_enough___n100_building,
+        Building_N100.polygon_resolve_building_conflicts___final_merged_points___n100_building,
+        Building_N100.polygon_resolve_building_conflicts___small_building_polygons_to_point___n100_building,
+        Building_N100.simplify_polygons___aggregated_polygons_to_points___n100_building,
+        Building_N100.simplify_polygons___simplify_building_1___n100_building,
+        Building_N100.simplify_polygons___simplify_building_2___n100_building,
+        Building_N100.simplify_polygons___simplify_polygon___n100_building,
+    ],
+    outputs=[
+        Building_N100.polygon_to_point___merged_points_final___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
@@ -4,6 +4,7 @@
 
 # Import custom modules
 from custom_tools.general_tools import custom_arcpy
+from custom_tools.general_tools import point_clustering
 from env_setup import environment_setup
 from custom_tools.general_tools.file_utilities import compare_feature_classes
 from custom_tools.general_tools.polygon_processor import PolygonProcessor
@@ -15,11 +16,26 @@ from constants.n100_constants import N100_SQLResources
 
 # Importing general packages
 import arcpy
+import numpy as np
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
-
-
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
+
+
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_preparation___road_symbology_buffers___n100_building,
+        Building_N100.removing_points_and_erasing_polygons_in_water_features___final_building_polygons_merged___n100_building,
+        Building_N100.removing_points_and_erasing_polygons_in_water_features___final_points___n100_lyrx,
+        Building_N100.removing_points_and_erasing_polygons_in_water_features___final_points_merged___n100_building,
+    ],
+    outputs=[
+        Building_N100.removing_overlapping_polygons_and_points___final___n100_building,
+        Building_N100.removing_overlapping_polygons_and_points___merging_final_points___n100_building,
+        Building_N100.removing_overlapping_polygons_and_points___polygons_NOT_intersecting_road_buffers___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     environment_setup.main()
@@ -27,8 +43,6 @@ def main():
     adding_new_hierarchy_value_to_points()
     detecting_graphic_conflicts()
     selecting_points_close_to_graphic_conflict_polygons()
-    finding_clusters_amongst_the_points()
-    selecting_points_in_a_cluster_and_not_in_a_cluster()
     keep_point_with_highest_hierarchy_for_each_cluster()
     polygons_overlapping_roads_to_points()
     merging_final_points_together()
@@ -91,88 +105,65 @@ def selecting_points_close_to_graphic_conflict_polygons():
     )
 
 
-@timing_decorator
-def finding_clusters_amongst_the_points():
-    # Finding church clusters
-    arcpy.gapro.FindPointClusters(
-        input_points=Building_N100.removing_overlapping_polygons_and_points___points_close_to_graphic_conflict_polygons___n100_building.value,
-        out_feature_class=Building_N100.removing_overlapping_polygons_and_points___point_clusters___n100_building.value,
-        clustering_method="DBSCAN",
-        minimum_points="2",
-        search_distance="80 Meters",
-    )
+def find_points_to_delete_in_clusters(object_ids, cluster_ids, hierarchy_values):
+    """
+    Finds the points to delete so each cluster keeps only its point with the highest hierarchy value.
+    Ties are won by the point with the lowest OBJECTID.
 
+    Args:
+        object_ids: The OBJECTID of each point.
+        cluster_ids: The CLUSTER_ID of each point.
+        hierarchy_values: The hierarchy value of each point.
 
-@timing_decorator
-def selecting_points_in_a_cluster_and_not_in_a_cluster():
-    expression_cluster = "CLUSTER_ID > 0"
-    expression_not_cluster = "CLUSTER_ID < 0"
+    Returns:
+        np.ndarray: The OBJECTIDs of the points to delete.
+    """
+    object_ids = np.asarray(object_ids)
+    cluster_ids = np.asarray(cluster_ids)
+    hierarchy_values = np.asarray(hierarchy_values)
 
-    # Making feature class of points that are in a cluster and will be used for further proscessing
-    custom_arcpy.select_attribute_and_make_permanent_feature(
-        input_layer=Building_N100.removing_overlapping_polygons_and_points___point_clusters___n100_building.value,
-        expression=expression_cluster,
-        output_name=Building_N100.removing_overlapping_polygons_and_points___points_in_a_cluster___n100_building.value,
-        selection_type=custom_arcpy.SelectionType.NEW_SELECTION,
-    )
+    # Sorts by cluster, then by descending hierarchy and ascending OBJECTID, putting each winner first
+    order = np.lexsort((object_ids, -hierarchy_values, cluster_ids))
+    sorted_cluster_ids = cluster_ids[order]
+    is_winner = np.ones(len(order), dtype=bool)
+    is_winner[1:] = sorted_cluster_ids[1:] != sorted_cluster_ids[:-1]
+    return object_ids[order][~is_winner]
 
-    # Making feature class of points that are NOT in a cluster and will be merged at the end
-    custom_arcpy.select_attribute_and_make_permanent_feature(
-        input_layer=Building_N100.removing_overlapping_polygons_and_points___point_clusters___n100_building.value,
-        expression=expression_not_cluster,
-        output_name=Building_N100.removing_overlapping_polygons_and_points___points_not_in_a_cluster___n100_building.value,
-        selection_type=custom_arcpy.SelectionType.NEW_SELECTION,
+
+@timing_decorator
+def keep_point_with_highest_hierarchy_for_each_cluster():
+    """
+    Finds DBSCAN clusters (80 meters, minimum 2 points) amongst the points close to graphic conflicts
+    and keeps only the point with the highest hierarchy value in each cluster, together with all
+    points not in a cluster. The points are read once and the result is written once.
+    """
+    points_close_to_graphic_conflicts = (
+        Building_N100.removing_overlapping_polygons_and_points___points_close_to_graphic_conflict_polygons___n100_building.value
     )
 
-    # Copying the layer because the other one will be modified
-    arcpy.management.Copy(
-        in_data=Building_N100.removing_overlapping_polygons_and_points___points_in_a_cluster___n100_building.value,
-        out_data=Building_N100.removing_overlapping_polygons_and_points___points_in_a_cluster_original___n100_building.value,
+    object_ids, coordinates, field_values = point_clustering.read_points(
+        points_close_to_graphic_conflicts, fields=["hierarchy"]
+    )
+    cluster_ids = point_clustering.find_point_clusters(
+        coordinates, search_distance=80, minimum_points=2
     )
 
+    in_a_cluster = cluster_ids > 0
+    points_to_delete = find_points_to_delete_in_clusters(
+        object_ids[in_a_cluster],
+        cluster_ids[in_a_cluster],
+        field_values["hierarchy"][in_a_cluster],
+    )
+    points_to_keep = np.setdiff1d(object_ids, points_to_delete)
+    print(
+        f"Found {len(np.unique(cluster_ids[in_a_cluster]))} clusters, deleting {len(points_to_delete)} points"
+    )
 
-@timing_decorator
-def keep_point_with_highest_hierarchy_for_each_cluster():
-    # Iterate over each cluster
-    with arcpy.da.SearchCursor(
-        Building_N100.removing_overlapping_polygons_and_points___points_in_a_cluster___n100_building.value,
-        ["CLUSTER_ID"],
-    ) as cursor:
-        for row in cursor:
-            cluster_id = row[0]
-
-            # Create a SQL expression to select points belonging to the current cluster
-            sql_expression = f"CLUSTER_ID = {cluster_id}"
-
-            # Create a list to store the hierarchy values of points in the cluster
-            hierarchy_values = []
-
-            # Use a search cursor to iterate over points in the current cluster
-            with arcpy.da.SearchCursor(
-                Building_N100.removing_overlapping_polygons_and_points___points_in_a_cluster___n100_building.value,
-                ["OBJECTID", "hierarchy"],
-                sql_expression,
-            ) as point_cursor:
-                for point_row in point_cursor:
-                    hierarchy_values.append(
-                        (point_row[0], point_row[1])
-                    )  # Store the OBJECTID and hierarchy value
-
-            # Sort the points based on hierarchy value
-            sorted_points = sorted(hierarchy_values, key=lambda x: x[1], reverse=True)
-
-            # Keep the point with the highest hierarchy value
-            if sorted_points:
-                highest_hierarchy_point = sorted_points[0][0]
-
-                # Use a delete cursor to delete points other than the one with the highest hierarchy value
-                with arcpy.da.UpdateCursor(
-                    Building_N100.removing_overlapping_polygons_and_points___points_in_a_cluster___n100_building.value,
-                    ["OBJECTID"],
-                    f"CLUSTER_ID = {cluster_id} AND OBJECTID <> {highest_hierarchy_point}",
-                ) as delete_cursor:
-                    for delete_row in delete_cursor:
-                        delete_cursor.deleteRow()
+    point_clustering.write_points_by_object_id(
+        input_points=points_close_to_graphic_conflicts,
+        object_ids=points_to_keep,
+        output_points=Building_N100.removing_overlapping_polygons_and_points___points_after_cluster_reduction___n100_building.value,
+    )
 
 
 def polygons_overlapping_roads_to_points():
@@ -207,8 +198,7 @@ def merging_final_points_together():
         inputs=[
             Building_N100.removing_overlapping_polygons_and_points___polygons_to_points___n100_building.value,
             Building_N100.removing_overlapping_polygons_and_points___points_NOT_close_to_graphic_conflict_polygons___n100_building.value,
-            Building_N100.removing_overlapping_polygons_and_points___points_in_a_cluster___n100_building.value,
-            Building_N100.removing_overlapping_polygons_and_points___points_not_in_a_cluster___n100_building.value,
+            Building_N100.removing_overlapping_polygons_and_points___points_after_cluster_reduction___n100_building.value,
         ],
         output=Building_N100.removing_overlapping_polygons_and_points___merging_final_points___n100_building.value,
     )
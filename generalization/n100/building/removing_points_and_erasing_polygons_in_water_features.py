@@ -9,8 +9,21 @@ from input_data.input_symbology import SymbologyN100
 from custom_tools.general_tools import custom_arcpy
 from env_setup import environment_setup
 from custom_tools.decorators.timing_decorator import timing_decorator
-
-
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
+
+
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_selection___land_cover_n100_input_data___n100_building,
+        Building_N100.point_resolve_building_conflicts___POINT_OUTPUT___n100_building,
+        Building_N100.point_resolve_building_conflicts___POLYGON_OUTPUT___n100_building,
+    ],
+    outputs=[
+        Building_N100.removing_points_and_erasing_polygons_in_water_features___final_building_polygons_merged___n100_building,
+        Building_N100.removing_points_and_erasing_polygons_in_water_features___final_points___n100_lyrx,
+        Building_N100.removing_points_and_erasing_polygons_in_water_features___final_points_merged___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     environment_setup.main()
@@ -58,7 +71,7 @@ def selecting_water_features_close_to_building_polygons():
         input_layer=Building_N100.removing_points_and_erasing_polygons_in_water_features___water_features___n100_building.value,
         overlap_type=custom_arcpy.OverlapType.WITHIN_A_DISTANCE,
         search_distance="100 Meters",
-        select_features=Building_N100.point_resolve_building_conflicts___building_polygons_final___n100_building.value,
+        select_features=Building_N100.point_resolve_building_conflicts___POLYGON_OUTPUT___n100_building.value,
         output_name=Building_N100.removing_points_and_erasing_polygons_in_water_features___water_features_close_to_building_polygons___n100_building.value,
     )
 
@@ -10,9 +10,24 @@ from constants.n100_constants import N100_Values
 
 # Importing timing decorator
 from custom_tools.decorators.timing_decorator import timing_decorator
+from custom_tools.decorators.stage_io_decorator import stage_io_decorator
 
 
 # Main function
+@stage_io_decorator(
+    inputs=[
+        Building_N100.data_preparation___polygons_that_are_large_enough___n100_building,
+        Building_N100.data_preparation___unsplit_roads___n100_building,
+        Building_N100.data_selection___building_polygon_n50_input_data___n100_building,
+    ],
+    outputs=[
+        Building_N100.simplify_polygons___aggregated_polygons_to_points___n100_building,
+        Building_N100.simplify_polygons___simplify_building_1___n100_building,
+        Building_N100.simplify_polygons___simplify_building_2___n100_building,
+        Building_N100.simplify_polygons___simplify_polygon___n100_building,
+        Building_N100.simplify_polygons___spatial_join_polygons___n100_building,
+    ],
+)
 @timing_decorator
 def main():
     """
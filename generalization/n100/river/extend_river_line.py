@@ -1,7 +1,12 @@
 import arcpy
+import numpy as np
 import os
 
 from env_setup import environment_setup
+from custom_tools.general_tools.geodataframe_io import read_features
+from custom_tools.generalization_tools.river.nearest_connections import (
+    find_nearest_connections,
+)
 from file_manager.n100.file_manager_rivers import River_N100
 
 
@@ -12,26 +17,28 @@ def main():
     # Assume that the 'orig_ob_id' field in 'all_rivers' holds the original OID
     id_field = "orig_ob_id"
 
-    # Container for holding line start and end points
-    line_points = []
-
-    # Iterate over each dangle feature
-    with arcpy.da.SearchCursor(problematic_dangles, ["SHAPE@", id_field]) as cursor:
-        for row in cursor:
-            dangle_geom = row[0]  # Geometry object of the dangle
-            dangle_oid = row[1]  # OID value from the dangle feature
-
-            # Proceed with excluding the originating line and generating near table
-            near_features = exclude_originating_line(all_rivers, dangle_oid, id_field)
-            near_table = generate_near_table(dangle_geom, near_features, water_polygon)
-            coordinate_pairs = get_xy_coordinates(near_table)
-            line_points.extend(coordinate_pairs)
-            print(f"Processed dangle {dangle_oid}")
-    # After collecting coordinate_pairs and generating new lines
-    new_lines = create_lines_from_coordinates(line_points, all_rivers)
+    dangles = read_features(problematic_dangles, columns=[id_field])
+    rivers = read_features(all_rivers, columns=[id_field])
+    water_polygons = read_features(water_polygon, columns=[])
+
+    # Finds the closest point on another river or water polygon for all dangles at once
+    dangle_coordinates, nearest_coordinates, found = find_nearest_connections(
+        points=dangles.geometry.values,
+        point_line_ids=dangles[id_field].to_numpy(),
+        line_geometries=rivers.geometry.values,
+        line_ids=rivers[id_field].to_numpy(),
+        polygon_geometries=water_polygons.geometry.values,
+    )
+    print(f"Found connections for {int(np.count_nonzero(found))} of {len(dangles)} dangles")
+    line_points = list(
+        zip(
+            map(tuple, dangle_coordinates[found].tolist()),
+            map(tuple, nearest_coordinates[found].tolist()),
+        )
+    )
 
     # Now, process these new lines to integrate them with the original river network
-    final_river_network = process_new_lines(new_lines, all_rivers)
+    final_river_network = process_new_lines(line_points, all_rivers)
 
 
 def processing_preparation():
@@ -70,112 +77,11 @@ def processing_preparation():
     return problematic_dangles, all_rivers, water_polygon
 
 
-def exclude_originating_line(all_rivers, dangle_oid, id_field):
-    """
-    Create a feature layer that excludes the line from which the dangle originates.
-
-    :param all_rivers: The feature class containing all river line features.
-    :param dangle_oid: The OID of the dangle point.
-    :param id_field: The field name that holds the original OID of the river lines.
-    :return: A feature layer that excludes the originating line of the dangle.
-    """
-    excluded_rivers_layer = "excluded_rivers_layer"
-    arcpy.MakeFeatureLayer_management(all_rivers, excluded_rivers_layer)
-    arcpy.SelectLayerByAttribute_management(
-        excluded_rivers_layer, "NEW_SELECTION", f"{id_field} <> {dangle_oid}"
-    )
-    return excluded_rivers_layer
-
-
-def generate_near_table(dangle, near_features, water_polygon):
-    """
-    Generate a near table for a dangle point to find the nearest feature's closest point,
-    considering both river and water polygon features.
-
-    :param dangle: A point geometry representing the dangle.
-    :param excluded_rivers_layer: The feature layer containing all river line features excluding the originating line.
-    :param water_polygon: The feature class containing water polygon features.
-    :return: The path to the near table generated.
-    """
-    # Ensure dangle is a feature class or layer; if it's a geometry, you'll need to create a temporary feature class/layer
-    dangle_feature_class = "in_memory/dangle_point"
-    arcpy.CopyFeatures_management([dangle], dangle_feature_class)
-
-    # Set up the near table path
-    near_table = "in_memory/near_table"
-
-    # Combine both feature classes into a list for the near_features parameter
-    all_near_features = [near_features, water_polygon]
-
-    # Generate the near table
-    arcpy.GenerateNearTable_analysis(
-        in_features=dangle_feature_class,
-        near_features=all_near_features,
-        out_table=near_table,
-        closest="CLOSEST",
-        location="LOCATION",
-        method="PLANAR",
-    )
-
-    # Clean up the temporary dangle point feature class if needed
-    arcpy.Delete_management(dangle_feature_class)
-
-    return near_table
-
-
-def get_xy_coordinates(near_table):
-    """
-    Extract the XY coordinates from the near table.
-
-    :param near_table: The near table to extract coordinates from.
-    :return: A tuple of XY coordinates for the dangle and the nearest feature.
-    """
-    # Initialize a list to store the coordinate pairs
-    coordinate_pairs = []
-
-    # Fetch the results from the near table
-    with arcpy.da.SearchCursor(
-        near_table, ["FROM_X", "FROM_Y", "NEAR_X", "NEAR_Y"]
-    ) as cursor:
-        for row in cursor:
-            dangle_xy = (row[0], row[1])  # FROM_X and FROM_Y
-            nearest_feature_xy = (row[2], row[3])  # NEAR_X and NEAR_Y
-            coordinate_pairs.append((dangle_xy, nearest_feature_xy))
-
-    return coordinate_pairs
-
-
-def create_lines_from_coordinates(line_points, all_rivers):
-    """
-    Create new line features from the pairs of XY coordinates.
-
-    :param line_points: A list of tuples containing pairs of XY coordinates.
-    :return: A list of arcpy.Polyline objects representing the new lines.
-    """
-    new_lines = []
-
-    for line_start, line_end in line_points:
-        # Create arcpy.Point objects from the coordinates
-        start_point = arcpy.Point(*line_start)
-        end_point = arcpy.Point(*line_end)
-
-        # Create a line from the start point to the end point
-        line = arcpy.Polyline(
-            arcpy.Array(
-                [start_point, end_point],
-            ),
-            # spatial_reference=environment_setup.project_spatial_reference,
-        )
-        new_lines.append(line)
-
-    return new_lines
-
-
-def process_new_lines(new_lines, all_rivers):
+def process_new_lines(line_points, all_rivers):
     """
     Merge new line features with original river features and remove duplicates.
 
-    :param new_lines: A list of arcpy.Polyline objects representing new lines to be added.
+    :param line_points: A list of tuples containing the start and end XY coordinates of each new line.
     :param all_rivers: The feature class containing all river line features.
     :return: The feature class path of the final river network with new lines merged in.
     """
@@ -197,10 +103,17 @@ def process_new_lines(new_lines, all_rivers):
         geometry_type="POLYLINE",
         spatial_reference=sr,
     )
-    arcpy.management.Append(
-        inputs=new_lines,
-        target=new_lines_feature_class,
-    )
+    # Insert all new lines in a single pass
+    with arcpy.da.InsertCursor(new_lines_feature_class, ["SHAPE@"]) as cursor:
+        for line_start, line_end in line_points:
+            cursor.insertRow(
+                [
+                    arcpy.Polyline(
+                        arcpy.Array([arcpy.Point(*line_start), arcpy.Point(*line_end)]),
+                        sr,
+                    )
+                ]
+            )
 
     print("Created new lines to the river network")
     arcpy.UnsplitLine_management(
@@ -247,5 +160,6 @@ if __name__ == "__main__":
 
 """
 Tested a lot of things regarding the Resolution and Tolerance issues. Current theory is that it is somewhere in
- the creation of line in "create_lines_from_coordinates". Or perhaps an issue with the near table itself. 
+ the creation of the new lines in "process_new_lines", when the connection end points are written and snapped to
+ the XY resolution of the output feature class.
 """
@@ -1,9 +1,11 @@
 import arcpy
-import networkx as nx
 import os
-from itertools import combinations
-import math
 
+from custom_tools.generalization_tools.river.river_network import RiverNetwork
+from custom_tools.generalization_tools.river.steiner_tree import (
+    assemble_edge_chains,
+    steiner_tree_edges,
+)
 from env_setup import environment_setup
 from file_manager.n100.file_manager_rivers import River_N100
 
@@ -14,15 +16,20 @@ def main():
     print("Pruning centerline...")
 
     # Load the network and the connection nodes
-    G = load_network_from_features(centerline_feature)
-    connection_nodes = load_start_nodes(connection_node_feature)
+    network = load_network_from_features(centerline_feature)
+    connection_nodes = network.find_nodes(load_start_nodes(connection_node_feature))
+    if (connection_nodes < 0).any():
+        print(
+            f"Warning: {(connection_nodes < 0).sum()} connection nodes are not on the centerline network."
+        )
+    connection_nodes = connection_nodes[connection_nodes >= 0]
 
-    # Compute minimum spanning tree for collapsed network
-    mst_tree = minimum_spanning_tree_for_terminals(G, connection_nodes)
+    # Approximate the minimum Steiner tree connecting the connection nodes
+    pruned_edges = steiner_tree_edges(network, connection_nodes)
 
     # Save the pruned network
     print("Saving pruned network...")
-    save_pruned_network(mst_tree, pruned_centerline_output, G)
+    save_pruned_network(network, pruned_edges, pruned_centerline_output)
 
 
 def copy_input_featrues():
@@ -47,32 +54,8 @@ pruned_centerline_output = River_N100.centerline_pruning__pruned_centerline__n10
 
 
 def load_network_from_features(centerline_feature):
-    G = nx.Graph()
-    with arcpy.da.SearchCursor(centerline_feature, ["SHAPE@"]) as cursor:
-        for row in cursor:
-            polyline = row[0]
-            for part in polyline:
-                for i in range(len(part) - 1):
-                    start_point = part[i]
-                    end_point = part[i + 1]
-                    # Set the 'pos' attribute for each node
-                    G.add_node(
-                        (start_point.X, start_point.Y),
-                        pos=(start_point.X, start_point.Y),
-                    )
-                    G.add_node(
-                        (end_point.X, end_point.Y), pos=(end_point.X, end_point.Y)
-                    )
-                    # Calculate the distance between points as the weight
-                    weight = math.hypot(
-                        end_point.X - start_point.X, end_point.Y - start_point.Y
-                    )
-                    G.add_edge(
-                        (start_point.X, start_point.Y),
-                        (end_point.X, end_point.Y),
-                        weight=weight,
-                    )
-    return G
+    # Each pair of consecutive vertices becomes an edge weighted by its length
+    return RiverNetwork.from_feature_class(centerline_feature, split_vertices=True)
 
 
 def load_start_nodes(connection_node_feature):
@@ -85,53 +68,7 @@ def load_start_nodes(connection_node_feature):
     return start_nodes
 
 
-def minimum_spanning_tree_for_terminals(G, terminal_nodes):
-    # Ensure all terminal nodes are in the same connected component
-    connected_subgraph = max(
-        (G.subgraph(c) for c in nx.connected_components(G)), key=len
-    )
-    connected_terminals = set(connected_subgraph.nodes()).intersection(
-        set(terminal_nodes)
-    )
-
-    # Check if there are terminal nodes not in the largest connected component
-    isolated_terminals = set(terminal_nodes) - connected_terminals
-    if isolated_terminals:
-        print(
-            f"Warning: The following terminal nodes are in isolated subgraphs and cannot be connected: {isolated_terminals}"
-        )
-        # To handle potential nodes which can not be connected
-
-    # Create a complete graph for the connected terminal nodes with the shortest path distance as edge weight
-    complete_graph = nx.Graph()
-    for u, v in combinations(
-        connected_terminals, 2
-    ):  # All pairs of connected terminal nodes
-        try:
-            distance = nx.shortest_path_length(
-                connected_subgraph, source=u, target=v, weight="weight"
-            )
-            complete_graph.add_edge(u, v, weight=distance)
-        except nx.NetworkXNoPath:
-            print(f"No path between terminal nodes {u} and {v}.")
-            continue
-
-    # Calculate the MST of the complete graph
-    mst = nx.minimum_spanning_tree(complete_graph, weight="weight")
-
-    # Translate the MST back to the original graph's terms
-    mst_full = nx.Graph()
-    for u, v in mst.edges():
-        path = nx.shortest_path(G, source=u, target=v)
-        for i in range(len(path) - 1):
-            mst_full.add_edge(
-                path[i], path[i + 1], weight=G[path[i]][path[i + 1]]["weight"]
-            )
-
-    return mst_full
-
-
-def save_pruned_network(pruned_network, pruned_centerline_output, G):
+def save_pruned_network(network, pruned_edges, pruned_centerline_output):
     # Ensure the workspace is set to the geodatabase directory
     arcpy.env.workspace = os.path.dirname(pruned_centerline_output)
 
@@ -151,19 +88,13 @@ def save_pruned_network(pruned_network, pruned_centerline_output, G):
     )
     print(f"Created feature class at {pruned_centerline_output}")
 
-    # Insert the pruned edges into the new feature class
+    # Insert each chain of pruned edges between junctions and ends as one polyline
     with arcpy.da.InsertCursor(pruned_centerline_output, ["SHAPE@"]) as cursor:
-        for u, v in pruned_network.edges():
-            # Make sure to check if the path exists before trying to retrieve it
-            if nx.has_path(G, u, v):
-                path = nx.shortest_path(G, source=u, target=v)
-                points = [
-                    arcpy.Point(G.nodes[p]["pos"][0], G.nodes[p]["pos"][1])
-                    for p in path
-                ]
-                # Create a polyline from the ordered list of points
-                line = arcpy.Polyline(arcpy.Array(points), sr)
-                cursor.insertRow([line])
+        for chain in assemble_edge_chains(network, pruned_edges):
+            points = [
+                arcpy.Point(x, y) for x, y in network.node_coordinates[chain].tolist()
+            ]
+            cursor.insertRow([arcpy.Polyline(arcpy.Array(points), sr)])
 
 
 if __name__ == "__main__":
@@ -3,6 +3,10 @@ import os
 
 from env_setup import environment_setup
 from custom_tools.general_tools import custom_arcpy
+from custom_tools.general_tools.geodataframe_io import read_features
+from custom_tools.generalization_tools.river.lake_pruning import (
+    prune_lake_centerlines,
+)
 from file_manager.n100.file_manager_rivers import River_N100
 from input_data import input_n50
 from custom_tools.general_tools.file_utilities import FeatureClassCreator
@@ -14,6 +18,7 @@ def main():
     create_collapsed_centerline()
 
     filter_complicated_lakes()
+    prune_complex_lake_centerlines()
 
     # create_feature_class()
 
@@ -37,6 +42,9 @@ complex_centerlines = (
     River_N100.centerline_pruning_loop__complex_centerlines__n100.value
 )
 simple_centerlines = River_N100.centerline_pruning_loop__simple_centerlines__n100.value
+pruned_complex_centerlines = (
+    River_N100.centerline_pruning_loop__pruned_complex_centerlines__n100.value
+)
 
 
 def prepare_data():
@@ -477,6 +485,53 @@ def filter_complicated_lakes():
     create_lake_centerline_feature.run()
 
 
+def prune_complex_lake_centerlines():
+    """
+    Prunes the centerlines of all complex lakes to the approximate minimum Steiner tree
+    connecting their inlets. The lakes, centerlines and inlets are read once, each lake is pruned
+    independently in a worker pool, and all pruned centerlines are written in one insert pass with
+    the OBJECTID of their lake in the lake_id field.
+    """
+    lakes = read_features(complex_lakes, columns=[])
+    centerlines = read_features(complex_centerlines, columns=[])
+    inlets = read_features(river_inlet_nodes, columns=[])
+    print(
+        f"Pruning centerlines of {len(lakes)} complex lakes with {len(inlets)} inlets..."
+    )
+
+    pruned_centerlines = prune_lake_centerlines(
+        lake_ids=lakes.index.values,
+        lake_polygons=lakes.geometry.values,
+        centerline_geometries=centerlines.geometry.values,
+        inlet_points=inlets.geometry.values,
+    )
+
+    spatial_reference = arcpy.Describe(complex_centerlines).spatialReference
+    if arcpy.Exists(pruned_complex_centerlines):
+        arcpy.Delete_management(pruned_complex_centerlines)
+    arcpy.CreateFeatureclass_management(
+        out_path=os.path.dirname(pruned_complex_centerlines),
+        out_name=os.path.basename(pruned_complex_centerlines),
+        geometry_type="POLYLINE",
+        spatial_reference=spatial_reference,
+    )
+    arcpy.AddField_management(
+        in_table=pruned_complex_centerlines,
+        field_name="lake_id",
+        field_type="LONG",
+    )
+
+    with arcpy.da.InsertCursor(
+        pruned_complex_centerlines, ["SHAPE@", "lake_id"]
+    ) as cursor:
+        for lake_id, coordinates in pruned_centerlines:
+            points = [arcpy.Point(x, y) for x, y in coordinates.tolist()]
+            cursor.insertRow(
+                [arcpy.Polyline(arcpy.Array(points), spatial_reference), lake_id]
+            )
+    print(f"Created {pruned_complex_centerlines}")
+
+
 def create_feature_class():
     # create_lake_centerline_feature = FeatureClassCreator(
     #     template_fc=input_rivers,
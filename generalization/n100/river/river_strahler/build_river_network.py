@@ -4,27 +4,27 @@ Script to build the network of rivers that can be traversed.
 import geopandas as gpd
 import networkx as nx
 import matplotlib.pyplot as plt
-from shapely.geometry import Point
 import config
 
+from custom_tools.generalization_tools.river.river_network import RiverNetwork
+
 bias = 0  # Bias for flowing "down"
 height_river_path = config.output_folder + r"\river_basin_combined_3D.shp"
 
 gdf = gpd.read_file(height_river_path)
-G = nx.Graph()
 
 # Build the network of rivers
-for idx, row in gdf.iterrows():
-    coords = list(row.geometry.coords)
-    start = Point(coords[0])
-    end = Point(coords[-1])
-    start_elev = start.z
-    end_elev = end.z
-    
-    G.add_node(start, pos=(start.x, start.y, start.z))
-    G.add_node(end, pos=(end.x, end.y, end.z))
-
-    G.add_edge(start, end, weight=abs(start_elev - end_elev), elevation_change=end_elev - start_elev)
+network = RiverNetwork.from_geodataframe(gdf)
+G = network.to_networkx()
+for start_node, end_node, start_elev, end_elev in zip(
+    network.from_nodes.tolist(),
+    network.to_nodes.tolist(),
+    network.start_z.tolist(),
+    network.end_z.tolist(),
+):
+    G[start_node][end_node].update(
+        weight=abs(start_elev - end_elev), elevation_change=end_elev - start_elev
+    )
 
 def correct_river_flow(G):
     """
@@ -1,50 +1,69 @@
-import geopandas as gpd
-from shapely.geometry import LineString
-import networkx as nx
+"""
+This script counts the cycles in the river network of every drainage basin, to decide which basins
+are safe for Strahler ordering. The rivers and basins are read once, and the statistics of each
+basin are computed in parallel worker processes and saved to a CSV file.
+"""
 import matplotlib.pyplot as plt
+import networkx as nx
+import pandas as pd
 import config
 
-river_height_path = config.output_folder + r"\river_basin_combined_3D.shp"
+from custom_tools.generalization_tools.river.basin_batch import (
+    assign_rivers_to_basins,
+    map_basins,
+    read_rivers_and_basins,
+)
+from custom_tools.generalization_tools.river.cycle_analysis import (
+    basin_cycle_statistics,
+    biconnected_components,
+)
 
-river_height_df = gpd.read_file(river_height_path)
 
-data = river_height_df["geometry"]
-to_be_flipped_df = gpd.GeoDataFrame({
-    "geometry": data,
-})
+def main():
+    gdb_path = config.n50_path
+    drainage_basin_path = config.drainage_basin_path
+    output_folder = config.output_folder
+    basin_list = None
 
-def extract_start_end_coords(line):
-    coords = list(line.coords)
-    start = tuple(coords[0])
-    end = tuple(coords[-1])
-    return start, end
+    rivers, basins = read_rivers_and_basins(
+        f"{gdb_path}\\ElvBekk", drainage_basin_path, "nedborfelt", basin_list
+    )
+    basin_rivers = assign_rivers_to_basins(rivers, basins, "nedborfelt")
 
-G = nx.Graph()
+    statistics = pd.DataFrame.from_dict(
+        map_basins(basin_rivers, basin_cycle_statistics), orient="index"
+    )
+    statistics.index.name = "nedborfelt"
+    statistics["percentage_edges_in_cycles"] = (
+        100 * statistics["edges_in_cycles"] / statistics["number_of_edges"]
+    )
 
-for idx, row in to_be_flipped_df.iterrows():
-    start, end = extract_start_end_coords(row.geometry)
-    G.add_edge(start, end, index=idx)
+    print(f"Number of edges in cycles: {statistics['edges_in_cycles'].sum()}")
+    print(f"Total edges: {statistics['number_of_edges'].sum()}")
+    print(f"Basins without cycles: {(statistics['cyclomatic_number'] == 0).sum()}")
 
-def count_edges_in_cycles(G):
-    cycles = nx.cycle_basis(G)
-    edges_in_cycles = set()
-    for cycle in cycles:
-        cycle_edges = list(zip(cycle, cycle[1:] + [cycle[0]]))
-        edges_in_cycles.update(cycle_edges)
-    return len(edges_in_cycles), edges_in_cycles
+    statistics_path = f"{output_folder}\\basin_cycle_statistics.csv"
+    statistics.to_csv(statistics_path)
+    print("Saved cycle statistics to:", statistics_path)
 
-num_edges_in_cycles, edges_in_cycles = count_edges_in_cycles(G)
-total_edges = len(G.edges)
 
-print(f"Number of edges in cycles: {num_edges_in_cycles}")
-print(f"Total edges: {total_edges}")
-print(f"Percentage of edges in cycles: {100 * num_edges_in_cycles / total_edges:.2f}%")
+def display_graph_with_cycles(network):
+    """
+    Draws the river network of a basin with the edges on a cycle in red.
 
-
-def display_graph_with_cycles(G, edges_in_cycles):
-    pos = {node: node[:2] for node in G.nodes}
-    edge_colors = ['red' if edge in edges_in_cycles or (edge[1], edge[0]) in edges_in_cycles else 'black' for edge in G.edges]
+    Parameters:
+    network (RiverNetwork): The river network of a basin.
+    """
+    _, is_bridge, _ = biconnected_components(network)
+    G = network.to_networkx(multigraph=True)
+    pos = {node: data["pos"][:2] for node, data in G.nodes(data=True)}
+    edge_colors = [
+        "black" if is_bridge[data["edge"]] else "red"
+        for _, _, data in G.edges(data=True)
+    ]
     nx.draw(G, pos, with_labels=True, node_size=50, font_size=3, edge_color=edge_colors)
     plt.show()
 
-display_graph_with_cycles(G, edges_in_cycles)
\ No newline at end of file
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,32 @@
 """
 This script extracts height data for river points, reconstructs 3D river lines, and saves the new 3D lines to a shapefile.
+The heights are sampled from the raster at the endpoints of the lines directly, without writing intermediate point shapefiles.
 """
-import arcpy
 import geopandas as gpd
-from shapely.geometry import Point, LineString
 import config
 
+from custom_tools.general_tools.geodataframe_io import read_features, write_features
+from custom_tools.generalization_tools.river.elevation_sampling import (
+    sample_endpoint_heights,
+    with_endpoint_heights,
+)
+
 raster_path = config.raster_path
 output_fc = config.output_folder + r"\river_basin_combined.shp"
-output_points_fc = config.output_folder + r"\river_points.shp"
-height_points_fc = config.output_folder + r"\height_points.shp"
 updated_lines_fc = config.output_folder + r"\river_basin_combined_3D.shp"
 
-arcpy.FeatureVerticesToPoints_management(output_fc, output_points_fc, "BOTH_ENDS") # ALL BOTH_ENDS
-
-# Extract height values to points
-arcpy.sa.ExtractValuesToPoints(output_points_fc, raster_path, height_points_fc, interpolate_values="NONE", add_attributes="VALUE_ONLY")
-
-height_gdf = gpd.read_file(height_points_fc)
-
-# Function to reconstruct lines with z-coordinates
-def create_3d_lines(df):
-    grouped = df.groupby("ORIG_FID")
-    lines = []
+# The sampling works on single part lines
+rivers = read_features(output_fc, columns=[]).explode(index_parts=False)
 
-    for name, group in grouped:
-        points = [Point(xy) for xy in zip(group.geometry.x, group.geometry.y, group["RASTERVALU"])]
-        lines.append(LineString(points))
-    
-    return gpd.GeoDataFrame(geometry=lines, crs=df.crs)
+# Sample the heights at the start and end point of each line
+start_z, end_z = sample_endpoint_heights(rivers.geometry.values, raster_path)
 
-lines_gdf = create_3d_lines(height_gdf)
+# Reconstruct the lines from their endpoints with z-coordinates
+lines_gdf = gpd.GeoDataFrame(
+    geometry=with_endpoint_heights(rivers.geometry.values, start_z, end_z),
+    crs=rivers.crs,
+)
 
-lines_gdf.to_file(updated_lines_fc)
+write_features(lines_gdf, updated_lines_fc)
 
-print(f"New 3D lines feature class created: {updated_lines_fc}")
\ No newline at end of file
+print(f"New 3D lines feature class created: {updated_lines_fc}")
@@ -3,6 +3,8 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import config
 
+from custom_tools.generalization_tools.river.river_network import RiverNetwork
+
 def load_shapefile(shapefile_path):
     """
     Load a shapefile and return a GeoDataFrame.
@@ -25,15 +27,7 @@ def create_network(gdf):
     Returns:
     nx.Graph: The created network.
     """
-    G = nx.Graph()
-    
-    for idx, row in gdf.iterrows():
-        line = row.geometry
-        start = (line.coords[0][0], line.coords[0][1])
-        end = (line.coords[-1][0], line.coords[-1][1])
-        G.add_edge(start, end, index=idx)
-    
-    return G
+    return RiverNetwork.from_geodataframe(gdf).to_networkx()
 
 def find_and_display_cycles(G):
     """
@@ -51,7 +45,7 @@ def find_and_display_cycles(G):
             if G.has_edge(*edge):
                 cycle_edges.add((cycle[i], cycle[(i + 1) % len(cycle)]))
     
-    pos = {node: node for node in G.nodes}
+    pos = {node: data["pos"][:2] for node, data in G.nodes(data=True)}
     
     plt.figure(figsize=(10, 10))
     nx.draw(G, pos, node_color='blue', edge_color='black', with_labels=False, node_size=10)
@@ -1,11 +1,14 @@
 import arcpy
-import multiprocessing
-from multiprocessing import Pool, Manager
+import numpy as np
 
 import config
 from env_setup import environment_setup
 from input_data import input_n50
 from custom_tools.general_tools import custom_arcpy
+from custom_tools.general_tools.geodataframe_io import read_features
+from custom_tools.generalization_tools.river.dangle_conflicts import (
+    find_dangle_conflicts,
+)
 from file_manager.n100.file_manager_rivers import River_N100
 
 
@@ -13,8 +16,6 @@ def main():
     geomotry_search_tolerance = 15
     id_field = "orig_ob_id"
     dangle_id_field = "dang_id"
-    cpu_usage_percentage = 0.9
-    num_cores = int(multiprocessing.cpu_count() * cpu_usage_percentage)
     environment_setup.main()
     copy_input_features(geomotry_search_tolerance)
 
@@ -24,42 +25,12 @@ def main():
     polygon_fc = (
         River_N100.unconnected_river_geometry__water_area_features_selected__n100.value
     )
-    point_fc = River_N100.unconnected_river_geometry__river_dangles__n100.value
-
-    # Determine total number of buffers
-    total_buffers = int(arcpy.GetCount_management(buffer_fc)[0])
-
-    # Define the percentage of the dataset to process in each batch (e.g., 25%)
-    batch_percentage = 0.05
-    batch_size = int(total_buffers * batch_percentage)
-
-    # Prepare arguments for each batch
-    batch_args = [
-        (
-            start,
-            min(start + batch_size, total_buffers),
-            line_fc,
-            polygon_fc,
-            buffer_fc,
-            id_field,
-            dangle_id_field,
-        )
-        for start in range(0, total_buffers, batch_size)
-    ]
-
-    print("starting processing unconnected river geometry loop...")
-    with Manager() as manager:
-        shared_results = manager.list()  # Shared list for results
-        queue = manager.Queue()  # Manager Queue for progress tracking
-
-        # Include both shared_results and queue in the tuples
-        args_with_shared_results = [(*arg, shared_results, queue) for arg in batch_args]
 
-        with Pool(processes=num_cores) as pool:
-            pool.starmap(process_batch, args_with_shared_results)
-
-        all_problematic_ids = list(shared_results)
-        print("All problematic IDs:", all_problematic_ids)
+    print("starting processing unconnected river geometry...")
+    all_problematic_ids = find_problematic_ids(
+        line_fc, polygon_fc, buffer_fc, id_field, dangle_id_field
+    )
+    print("All problematic IDs:", all_problematic_ids)
 
     try:
         resolve_geometry(id_field, dangle_id_field, all_problematic_ids)
@@ -161,48 +132,32 @@ def copy_input_features(geomotry_search_tolerance):
     point_fc = River_N100.unconnected_river_selected_river_dangles__n100.value
 
 
-def process_batch(
-    start,
-    end,
-    line_fc,
-    polygon_fc,
-    buffer_fc,
-    id_field,
-    dangle_id_field,
-    shared_results,
-    queue,
-):
-    lines = [
-        (row[0], row[1]) for row in arcpy.da.SearchCursor(line_fc, [id_field, "SHAPE@"])
-    ]
-    polygons = [row[0] for row in arcpy.da.SearchCursor(polygon_fc, ["SHAPE@"])]
-
-    query = f"OBJECTID >= {start} AND OBJECTID < {end}"
-    with arcpy.da.SearchCursor(
-        buffer_fc, [id_field, dangle_id_field, "SHAPE@"], where_clause=query
-    ) as buffer_cursor:
-        for buffer_row in buffer_cursor:
-            buffer_id, dangle_id, buffer_geom = buffer_row
-
-            line_intersect = any(
-                line_id != buffer_id
-                and (
-                    not buffer_geom.disjoint(line_geom)
-                    or buffer_geom.touches(line_geom)
-                )
-                for line_id, line_geom in lines
-            )
-
-            polygon_intersect = any(
-                not buffer_geom.disjoint(poly_geom) or buffer_geom.touches(poly_geom)
-                for poly_geom in polygons
-            )
-
-            if line_intersect or polygon_intersect:
-                buffer_id, dangle_id, buffer_geom = buffer_row
-                shared_results.append((buffer_id, dangle_id))
-
-    queue.put(1)
+def find_problematic_ids(line_fc, polygon_fc, buffer_fc, id_field, dangle_id_field):
+    """
+    Reads the lines, water polygons and dangle buffers once and finds the dangles whose buffer
+    intersects another line or a water polygon.
+
+    Returns:
+        list: (line id, dangle id) of each problematic dangle.
+    """
+    lines = read_features(line_fc, columns=[id_field])
+    polygons = read_features(polygon_fc, columns=[])
+    buffers = read_features(buffer_fc, columns=[id_field, dangle_id_field])
+
+    conflicts = find_dangle_conflicts(
+        buffer_geometries=buffers.geometry.values,
+        buffer_line_ids=buffers[id_field].to_numpy(),
+        line_geometries=lines.geometry.values,
+        line_ids=lines[id_field].to_numpy(),
+        polygon_geometries=polygons.geometry.values,
+    )
+    print(f"Found {int(np.count_nonzero(conflicts))} of {len(buffers)} dangles in conflict")
+    return list(
+        zip(
+            buffers[id_field].to_numpy()[conflicts].tolist(),
+            buffers[dangle_id_field].to_numpy()[conflicts].tolist(),
+        )
+    )
 
 
 def resolve_geometry(
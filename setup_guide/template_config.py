@@ -4,6 +4,13 @@
 cpu_percentage = "90%"
 select_study_area = True
 
+# ========================================
+#                 PROFILING
+# ========================================
+# Records wall time, CPU time, memory and feature counts of timed functions and custom_arcpy
+# calls to the profiling folder of each run
+enable_profiling = False
+
 # ========================================
 #                 WORKSPACE ENVIRONMENT PATHS
 # ========================================